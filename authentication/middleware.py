@@ -18,7 +18,10 @@ class NoCacheAfterLogoutMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
         # Apply to all pages that require authentication
         if request.user.is_authenticated:
-            response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
+            # view ที่รองรับ conditional GET (มี ETag) ใช้ private, no-cache แทน no-store
+            # browser เก็บไว้ได้แต่ต้องถามเซิร์ฟเวอร์ทุกครั้ง - หลัง logout จะถูก redirect ไป login เหมือนเดิม
+            if not response.has_header('ETag'):
+                response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
             response['Pragma'] = 'no-cache'
             response['Expires'] = '0'
 
@@ -0,0 +1,267 @@
+"""
+Map Data
+ข้อมูลจุด Ticket ของแผนที่หลัก (โหลดเฉพาะกรอบที่มองเห็นผ่าน /dashboard/map/features/)
+
+- feature มีแค่ id, พิกัด, status, category_id, urgency - ชื่อหมวด/สถานะแปลงฝั่ง browser
+  อ่านจาก TicketListEntry (แถวแคบกว่า tickets - ไม่มี description/ฟิลด์อื่นของ Ticket)
+  รายละเอียดและรูปโหลดทีละ Ticket ตอนคลิก (/dashboard/map/tickets/<id>/)
+- ทศนิยมของพิกัดตามระดับซูม (ละเอียดกว่า 1 pixel ไม่ต้องส่ง)
+- จำกัดไม่เกิน MAP_FEATURE_LIMIT จุด (Ticket ใหม่ก่อน) และ stream JSON ทีละ chunk
+- ซูมไม่เกิน MAP_CLUSTER_MAX_ZOOM: รวมจุดเป็นกลุ่มบนกริด (แบบ ST_SnapToGrid) ใน SQL
+  พร้อมจำนวนแยกสถานะ/หมวด - ช่องกริดจัดอยู่ใน tile (z, x, y) แบบองศา
+  และเก็บผลใน cache ต่อ tile ตาม ticket data version (tickets/data_cache.py)
+"""
+
+import json
+import math
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.db.models import Count, FloatField, Func, Max, Min, Sum
+from django.db.models.functions import Floor
+from tickets import data_cache
+from tickets.models import TicketListEntry
+from .stats import COMPLETED_STATUSES, IN_PROGRESS_STATUSES
+
+STATUS_FILTERS = {
+    'pending': ['PENDING'],
+    'in_progress': IN_PROGRESS_STATUSES,
+    'completed': COMPLETED_STATUSES,
+}
+
+MAX_ZOOM = 22
+
+# จำนวนช่องกริดต่อด้านของ tile (tile 256 px -> ช่องละ 64 px)
+CELLS_PER_TILE = 4
+
+# tile ที่คำนวณได้สูงสุดต่อคำขอ (กันกรอบใหญ่ผิดปกติ)
+MAX_TILES = 256
+
+
+def parse_bbox(text):
+    """'west,south,east,north' (องศา) -> tuple (ValueError ถ้าไม่ถูกต้อง)"""
+    try:
+        west, south, east, north = (float(v) for v in text.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('bbox must be west,south,east,north')
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        raise ValueError('bbox out of range')
+    return west, south, east, north
+
+
+def parse_zoom(text):
+    try:
+        zoom = int(text)
+    except (TypeError, ValueError):
+        raise ValueError('zoom must be an integer')
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ValueError(f'zoom must be between 0 and {MAX_ZOOM}')
+    return zoom
+
+
+def coordinate_digits(zoom):
+    """จำนวนทศนิยมที่ละเอียดพอระดับ pixel ที่ซูมนี้ (1 pixel = 360 / (256 * 2^z) องศา)"""
+    return min(7, max(0, math.ceil(math.log10(256 * 2 ** zoom / 360))))
+
+
+def filter_tickets(tickets, status='all', category='all'):
+    """กรองตามตัวเลือกสถานะ/หมวดของหน้าแผนที่"""
+    if status in STATUS_FILTERS:
+        tickets = tickets.filter(status__in=STATUS_FILTERS[status])
+    if category != 'all':
+        tickets = tickets.filter(category_id=category)
+    return tickets
+
+
+def feature_rows(bbox, status='all', category='all', limit=None):
+    """
+    แถว (id, location, status, category_id, urgency_level) ในกรอบ เรียงจากใหม่ไปเก่า
+
+    คืนเกิน limit 1 แถวเพื่อให้รู้ว่าถูกตัด
+    """
+    limit = limit or settings.MAP_FEATURE_LIMIT
+    area = Polygon.from_bbox(bbox)
+    area.srid = 4326
+    tickets = filter_tickets(TicketListEntry.objects.filter(location__within=area), status, category)
+    return tickets.order_by('-created_at').values_list(
+        'ticket_id', 'location', 'status', 'category_id', 'urgency_level'
+    )[:limit + 1]
+
+
+def stream_features(rows, zoom, limit=None, chunk_size=2000):
+    """
+    FeatureCollection เป็นข้อความทีละ chunk (ใช้กับ StreamingHttpResponse)
+
+    ต่อท้ายด้วย "truncated": true เมื่อมีจุดเกิน limit
+    """
+    limit = limit or settings.MAP_FEATURE_LIMIT
+    digits = coordinate_digits(zoom)
+    yield '{"type":"FeatureCollection","features":['
+
+    count = 0
+    truncated = False
+    buffer = []
+    for ticket_id, location, status, category_id, urgency in rows.iterator(chunk_size=chunk_size):
+        if count == limit:
+            truncated = True
+            break
+        buffer.append(json.dumps({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(location.x, digits), round(location.y, digits)]},
+            'properties': {'id': ticket_id, 'status': status, 'category_id': category_id, 'urgency': urgency},
+        }, separators=(',', ':')))
+        count += 1
+        if len(buffer) == chunk_size:
+            yield ('' if count == len(buffer) else ',') + ','.join(buffer)
+            buffer = []
+
+    if buffer:
+        yield ('' if count == len(buffer) else ',') + ','.join(buffer)
+    yield '],"truncated":%s}' % ('true' if truncated else 'false')
+
+
+def ticket_details(ticket):
+    """รายละเอียดของ popup/แผงข้อมูลเมื่อคลิกจุด"""
+    before_photo = after_photo = None
+    for photo in ticket.before_after_photos.all():
+        if photo.photo_type == 'BEFORE' and not before_photo:
+            before_photo = photo.image.url
+        elif photo.photo_type == 'AFTER' and not after_photo:
+            after_photo = photo.image.url
+
+    # ไม่มีรูปก่อนทำ -> ใช้ไฟล์แนบแรก (prefetch แล้ว ไม่ query เพิ่ม)
+    if not before_photo:
+        attachments = ticket.attachments.all()
+        if attachments:
+            before_photo = attachments[0].file.url
+
+    return {
+        'id': ticket.id,
+        'title': ticket.title,
+        'description': ticket.description,
+        'status': ticket.status,
+        'status_display': ticket.get_status_display(),
+        'category': ticket.category.name,
+        'urgency': ticket.urgency_level,
+        'urgency_display': ticket.get_urgency_level_display(),
+        'created_at': ticket.created_at.strftime('%d/%m/%Y %H:%M'),
+        'before_photo': before_photo,
+        'after_photo': after_photo,
+    }
+
+
+def tile_size(zoom):
+    """ความกว้าง tile (องศา) - tile แบ่งองศาเท่ากันทั้ง lon/lat เริ่มจาก (-180, -90)"""
+    return 360.0 / 2 ** zoom
+
+
+def tiles_for_bbox(bbox, zoom):
+    """tile (x, y) ที่ครอบกรอบนี้ (ValueError ถ้าเกิน MAX_TILES)"""
+    size = tile_size(zoom)
+    west, south, east, north = bbox
+    xs = range(math.floor((west + 180) / size), math.floor((east + 180) / size) + 1)
+    ys = range(math.floor((south + 90) / size), math.floor((north + 90) / size) + 1)
+    if len(xs) * len(ys) > MAX_TILES:
+        raise ValueError('bbox too large for this zoom')
+    return [(x, y) for x in xs for y in ys]
+
+
+def tile_bbox(zoom, x, y):
+    size = tile_size(zoom)
+    return (x * size - 180, y * size - 90, (x + 1) * size - 180, (y + 1) * size - 90)
+
+
+def cluster_rows(bbox, zoom, status='all', category='all'):
+    """
+    GROUP BY ช่องกริด × status × หมวด ใน SQL
+
+    Returns:
+        values ของ (cx, cy, status, category_id, count, sum_x, sum_y, first_id, urgency)
+        first_id/urgency ตรงกับ Ticket จริงเมื่อกลุ่มมีใบเดียว
+    """
+    cell = tile_size(zoom) / CELLS_PER_TILE
+    area = Polygon.from_bbox(bbox)
+    area.srid = 4326
+    x = Func('location', function='ST_X', output_field=FloatField())
+    y = Func('location', function='ST_Y', output_field=FloatField())
+
+    # intersects: จุดบนขอบกรอบนับด้วย แล้วจัดเข้า tile ตาม floor ของช่อง
+    tickets = filter_tickets(TicketListEntry.objects.filter(location__intersects=area), status, category)
+    return tickets.annotate(
+        cx=Floor((x + 180.0) / cell),
+        cy=Floor((y + 90.0) / cell),
+    ).values('cx', 'cy', 'status', 'category_id').annotate(
+        count=Count('ticket_id'),
+        sum_x=Sum(x),
+        sum_y=Sum(y),
+        first_id=Min('ticket_id'),
+        urgency=Max('urgency_level'),
+    ).order_by()
+
+
+def fold_clusters(rows, zoom):
+    """
+    รวมแถวจาก cluster_rows เป็น feature ต่อ tile
+
+    ช่องที่มี Ticket ใบเดียวส่งเป็นจุดปกติ (มี id) ช่องอื่นเป็นกลุ่ม:
+    properties = cluster, count, status {status: n}, category {category_id: n}
+
+    Returns:
+        dict (x, y) ของ tile -> list ของ feature
+    """
+    digits = coordinate_digits(zoom)
+    cells = defaultdict(lambda: {'count': 0, 'sum_x': 0.0, 'sum_y': 0.0, 'status': Counter(), 'category': Counter()})
+    singles = {}
+    for row in rows:
+        key = (int(row['cx']), int(row['cy']))
+        cell = cells[key]
+        cell['count'] += row['count']
+        cell['sum_x'] += row['sum_x']
+        cell['sum_y'] += row['sum_y']
+        cell['status'][row['status']] += row['count']
+        cell['category'][row['category_id']] += row['count']
+        singles[key] = row
+
+    tiles = defaultdict(list)
+    for (cx, cy), cell in cells.items():
+        point = [round(cell['sum_x'] / cell['count'], digits), round(cell['sum_y'] / cell['count'], digits)]
+        if cell['count'] == 1:
+            row = singles[(cx, cy)]
+            properties = {
+                'id': row['first_id'], 'status': row['status'],
+                'category_id': row['category_id'], 'urgency': row['urgency'],
+            }
+        else:
+            properties = {
+                'cluster': True,
+                'count': cell['count'],
+                'status': dict(cell['status']),
+                'category': {str(k): v for k, v in cell['category'].items()},
+            }
+        tiles[(cx // CELLS_PER_TILE, cy // CELLS_PER_TILE)].append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': point},
+            'properties': properties,
+        })
+    return tiles
+
+
+def clusters(bbox, zoom, status='all', category='all', request=None):
+    """
+    feature แบบกลุ่มของทุก tile ที่ครอบกรอบนี้ (ผลต่อ tile อยู่ใน cache)
+    """
+    tiles = tiles_for_bbox(bbox, zoom)
+
+    def build(missing):
+        # query เดียวครอบ tile ที่ยังไม่มีใน cache
+        xs = [vary[1] for vary in missing]
+        ys = [vary[2] for vary in missing]
+        west, south, _, _ = tile_bbox(zoom, min(xs), min(ys))
+        _, _, east, north = tile_bbox(zoom, max(xs), max(ys))
+        folded = fold_clusters(cluster_rows((west, south, east, north), zoom, status, category), zoom)
+        return {vary: folded.get((vary[1], vary[2]), []) for vary in missing}
+
+    values = data_cache.cached_many(
+        'map_clusters', [(zoom, x, y, status, category) for x, y in tiles], build, request=request
+    )
+    return [feature for tile in values.values() for feature in tile]
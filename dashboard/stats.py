@@ -0,0 +1,131 @@
+"""
+Dashboard Statistics
+ตัวเลขสรุปของหน้า admin_summary จาก aggregate query ชุดเล็ก
+
+- จำนวน Ticket ตามสถานะ/หมวด/ความเร่งด่วนอ่านจากตารางสรุปรายวัน (tickets/rollups.py)
+- เวลาตอบสนอง/ปิดงานเฉลี่ยคำนวณด้วย Avg ของ interval ใน SQL จากทุกแถว (ไม่สุ่มตัวอย่าง)
+- สถิติช่างมาจาก query เดียว: ตัวนับบน TechnicianPresence + Subquery คะแนนรีวิวเฉลี่ย
+จำนวน query ของหน้าจึงคงที่ไม่ว่าข้อมูลจะมีมากแค่ไหน
+"""
+
+from django.db.models import Avg, Count, DurationField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from tickets import rollups
+from tickets.models import Ticket, TicketDailyStat, TicketFeedback
+from authentication.models import User
+
+IN_PROGRESS_STATUSES = ['IN_PROGRESS', 'INSPECTING', 'WORKING']
+COMPLETED_STATUSES = ['COMPLETED', 'CLOSED']
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 1) if duration else 0
+
+
+def _total(**filters):
+    return Coalesce(Sum('count', filter=Q(**filters) if filters else None), 0)
+
+
+def ticket_counts():
+    """
+    จำนวน Ticket ตามกลุ่มสถานะจากตารางสรุปรายวัน (1 query)
+
+    Returns:
+        dict: total, pending, in_progress, completed, rejected
+    """
+    return TicketDailyStat.objects.aggregate(
+        total=_total(),
+        pending=_total(status='PENDING'),
+        in_progress=_total(status__in=IN_PROGRESS_STATUSES),
+        completed=_total(status__in=COMPLETED_STATUSES),
+        rejected=_total(status='REJECTED'),
+    )
+
+
+def ticket_summary():
+    """
+    จำนวน Ticket ตามกลุ่มสถานะและเวลาเฉลี่ย (2 query)
+
+    Returns:
+        dict: total, pending, in_progress, completed, rejected,
+        avg_response_hours, avg_completion_hours
+    """
+    summary = ticket_counts()
+    durations = Ticket.objects.aggregate(
+        # เวลาจากแจ้งถึงมอบหมาย (ประมาณจาก updated_at ของ Ticket ที่มีช่างและพ้น PENDING แล้ว)
+        avg_response=Avg(
+            F('updated_at') - F('created_at'),
+            filter=Q(assigned_to__isnull=False) & ~Q(status='PENDING'),
+            output_field=DurationField()
+        ),
+        avg_completion=Avg(
+            F('completed_at') - F('created_at'),
+            filter=Q(status__in=COMPLETED_STATUSES, completed_at__isnull=False),
+            output_field=DurationField()
+        ),
+    )
+    summary['avg_response_hours'] = _hours(durations['avg_response'])
+    summary['avg_completion_hours'] = _hours(durations['avg_completion'])
+    return summary
+
+
+def tickets_by(field, order_by):
+    """จำนวน Ticket แยกตามฟิลด์จากตารางสรุปรายวัน (1 query)"""
+    rows = rollups.totals(field)
+    rows.sort(key=lambda row: row[order_by.lstrip('-')], reverse=order_by.startswith('-'))
+    return rows
+
+
+def technician_stats():
+    """
+    สถิติช่างทุกคน (1 query) เรียงตาม completion rate
+
+    Returns:
+        list of dict: name, username, assigned, completed, completion_rate, avg_rating, is_available
+    """
+    avg_rating = TicketFeedback.objects.filter(
+        ticket__assigned_to=OuterRef('pk')
+    ).order_by().values('ticket__assigned_to').annotate(avg=Avg('overall_rating')).values('avg')
+
+    # ช่างที่ยังไม่มีแถว presence ถือว่าตัวนับเป็น 0 และว่าง (ค่า default ของ TechnicianPresence)
+    technicians = User.objects.filter(role='technician').annotate(
+        open_count=Coalesce('presence__open_tickets', 0),
+        completed_count=Coalesce('presence__completed_tickets', 0),
+        rejected_count=Coalesce('presence__rejected_tickets', 0),
+        available=Coalesce('presence__is_available', Value(True)),
+        avg_rating=Subquery(avg_rating),
+    )
+
+    stats = []
+    for tech in technicians:
+        assigned = tech.open_count + tech.completed_count + tech.rejected_count
+        stats.append({
+            'name': tech.get_display_name(),
+            'username': tech.username,
+            'assigned': assigned,
+            'completed': tech.completed_count,
+            'completion_rate': round(tech.completed_count / assigned * 100, 1) if assigned > 0 else 0,
+            'avg_rating': round(tech.avg_rating, 1) if tech.avg_rating else 0,
+            'is_available': tech.available,
+        })
+
+    stats.sort(key=lambda x: x['completion_rate'], reverse=True)
+    return stats
+
+
+def feedback_summary():
+    """จำนวนรีวิวและคะแนนเฉลี่ย (1 query)"""
+    summary = TicketFeedback.objects.aggregate(total=Count('id'), avg=Avg('overall_rating'))
+    return {
+        'total': summary['total'],
+        'avg_rating': round(summary['avg'], 1) if summary['avg'] else 0,
+    }
+
+
+def user_summary():
+    """จำนวนผู้ใช้ตาม role (1 query)"""
+    return User.objects.aggregate(
+        total=Count('id'),
+        technicians=Count('id', filter=Q(role='technician')),
+        regular=Count('id', filter=Q(role='user')),
+    )
@@ -6,6 +6,10 @@ app_name = 'dashboard'
 urlpatterns = [
     path('', views.map_view, name='map'),  # Main Page - All Tickets Map (now at /dashboard/)
     path('summary/', views.admin_summary, name='admin_summary'),  # Admin Summary (moved from /dashboard/)
+    path('map/features/', views.map_features, name='map_features'),  # จุด Ticket ตามกรอบแผนที่ (JSON)
+    path('map/tickets/<int:ticket_id>/', views.map_ticket, name='map_ticket'),  # รายละเอียดเมื่อคลิกจุด
+    path('tiles/<int:zoom>/<int:x>/<int:y>.mvt', views.map_tile, name='map_tile'),  # vector tile ของ Ticket
+    path('cache-stats/', views.cache_stats, name='cache_stats'),  # hit/miss ของ dashboard cache (JSON)
     path('admin/change-status/', views.admin_change_status, name='admin_change_status'),  # Admin change ticket status
     path('admin/close-ticket/', views.admin_close_ticket, name='admin_close_ticket'),  # Admin close ticket
 ]
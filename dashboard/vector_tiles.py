@@ -0,0 +1,132 @@
+"""
+Vector Tiles
+Mapbox Vector Tile ของ Ticket (/dashboard/tiles/{z}/{x}/{y}.mvt) จาก ST_AsMVT ของ PostGIS 3
+
+- layer "tickets": จุด Ticket พร้อม id, status, category_id, urgency ให้ browser ใส่สีเอง
+  (ไม่เกิน MAP_FEATURE_LIMIT จุดต่อ tile, ใหม่ก่อน)
+- layer "heat": จำนวน Ticket ต่อช่อง 64×64 ช่องของ tile (ST_SnapToGrid) สำหรับ heat map
+- เก็บไฟล์ .mvt ใน MAP_TILE_CACHE_DIR โดยชื่อไฟล์มี version ของ tile (tickets/tile_versions.py)
+  Ticket เปลี่ยน -> version ของ tile ที่จุดนั้นอยู่เพิ่ม -> ไฟล์เดิมไม่ถูกอ่านอีกและถูกลบตอนเขียนไฟล์ใหม่
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.db import connection
+from tickets import data_cache, tile_versions
+from .map_data import STATUS_FILTERS
+
+# ความละเอียดพิกัดภายใน tile และขอบที่เผื่อไว้ (หน่วย extent) ตามค่าปกติของ MVT
+EXTENT = 4096
+BUFFER = 64
+
+HEAT_CELLS_PER_TILE = 64
+
+# ครึ่งความยาวเส้นศูนย์สูตรของ Web Mercator (เมตร)
+MERCATOR_HALF = 20037508.342789244
+
+TILE_SQL = """
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(zoom)s, %(x)s, %(y)s) AS geom
+),
+points AS (
+    SELECT t.id, t.status, t.category_id, t.urgency_level AS urgency, t.created_at,
+           ST_Transform(t.location, 3857) AS geom
+    FROM tickets t, bounds
+    WHERE t.location && ST_Transform(bounds.geom, 4326){filters}
+),
+ticket_layer AS (
+    SELECT p.id, p.status, p.category_id, p.urgency,
+           ST_AsMVTGeom(p.geom, bounds.geom, %(extent)s, %(buffer)s, true) AS geom
+    FROM (SELECT * FROM points ORDER BY created_at DESC LIMIT %(limit)s) p, bounds
+),
+heat_layer AS (
+    SELECT count(*) AS count,
+           ST_AsMVTGeom(ST_Centroid(ST_Collect(p.geom)), bounds.geom, %(extent)s, 0, true) AS geom
+    FROM points p, bounds
+    GROUP BY ST_SnapToGrid(p.geom, %(cell)s), bounds.geom
+)
+SELECT COALESCE((SELECT ST_AsMVT(ticket_layer, 'tickets', %(extent)s, 'geom') FROM ticket_layer), ''::bytea)
+    || COALESCE((SELECT ST_AsMVT(heat_layer, 'heat', %(extent)s, 'geom') FROM heat_layer), ''::bytea)
+"""
+
+
+def parse_tile(zoom, x, y):
+    """ตรวจว่า tile อยู่ในช่วงที่ให้บริการ (ValueError ถ้าไม่ใช่)"""
+    if not settings.MAP_TILE_MIN_ZOOM <= zoom <= settings.MAP_TILE_MAX_ZOOM:
+        raise ValueError(
+            f'zoom must be between {settings.MAP_TILE_MIN_ZOOM} and {settings.MAP_TILE_MAX_ZOOM}'
+        )
+    if not (0 <= x < 2 ** zoom and 0 <= y < 2 ** zoom):
+        raise ValueError('tile out of range')
+    return zoom, x, y
+
+
+def parse_filters(status, category):
+    """status/category ของหน้าแผนที่ (ใช้เป็นส่วนของชื่อไฟล์จึงต้องตรวจก่อน)"""
+    if status != 'all' and status not in STATUS_FILTERS:
+        raise ValueError(f'status must be all or one of {", ".join(STATUS_FILTERS)}')
+    if category != 'all' and not category.isdigit():
+        raise ValueError('category must be an id or all')
+    return status, category
+
+
+def render(zoom, x, y, status='all', category='all'):
+    """สร้าง tile จากฐานข้อมูล (bytes, tile ว่าง = b'')"""
+    filters = ''
+    params = {
+        'zoom': zoom, 'x': x, 'y': y,
+        'extent': EXTENT, 'buffer': BUFFER,
+        'limit': settings.MAP_FEATURE_LIMIT,
+        'cell': 2 * MERCATOR_HALF / 2 ** zoom / HEAT_CELLS_PER_TILE,
+    }
+    if status in STATUS_FILTERS:
+        filters += ' AND t.status = ANY(%(statuses)s)'
+        params['statuses'] = list(STATUS_FILTERS[status])
+    if category != 'all':
+        filters += ' AND t.category_id = %(category)s'
+        params['category'] = int(category)
+
+    with connection.cursor() as cursor:
+        cursor.execute(TILE_SQL.format(filters=filters), params)
+        return bytes(cursor.fetchone()[0])
+
+
+def tile_path(zoom, x, y, status, category, version):
+    return Path(settings.MAP_TILE_CACHE_DIR) / str(zoom) / str(x) / f'{y}-{status}-{category}-{version}.mvt'
+
+
+def _store(path, data):
+    """เขียนไฟล์ใหม่แบบ atomic แล้วลบไฟล์ version เก่าของ tile/ตัวกรองเดียวกัน"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(temp, path)
+
+    prefix = path.name.rsplit('-', 1)[0]
+    for old in path.parent.glob(f'{prefix}-*.mvt'):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def tile(zoom, x, y, status='all', category='all', request=None):
+    """
+    tile จากไฟล์ของ version ปัจจุบัน หรือ render แล้วเก็บไฟล์
+
+    Returns:
+        bytes ของ MVT
+    """
+    if not data_cache.is_enabled('map_tiles', request):
+        return render(zoom, x, y, status, category)
+
+    path = tile_path(zoom, x, y, status, category, tile_versions.version(zoom, x, y))
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    data = render(zoom, x, y, status, category)
+    _store(path, data)
+    return data
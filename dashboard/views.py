@@ -1,11 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Q, Avg, F, ExpressionWrapper, DurationField
+from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
-from tickets.models import Ticket, Category, TicketFeedback, BeforeAfterPhoto, TechnicianPresence, TicketStatusHistory
-from authentication.models import User, LoginLog
+from tickets.models import Ticket, TicketListEntry, Category, TicketFeedback, TicketStatusHistory
+from tickets import conditional, data_cache, pagination, priority_queue, tile_versions
+from tickets.query import STATUS_GROUPS
+from . import map_data, stats, vector_tiles
 import json
 
 @login_required
@@ -15,112 +17,57 @@ def admin_summary(request):
         messages.error(request, 'คุณไม่มีสิทธิ์เข้าถึงหน้านี้')
         return redirect('dashboard:map')
 
-    # === Basic Statistics ===
-    total_tickets = Ticket.objects.count()
-    pending_tickets = Ticket.objects.filter(status='PENDING').count()
-    in_progress_tickets = Ticket.objects.filter(status__in=['IN_PROGRESS', 'INSPECTING', 'WORKING']).count()
-    completed_tickets = Ticket.objects.filter(status__in=['COMPLETED', 'CLOSED']).count()
-    rejected_tickets = Ticket.objects.filter(status='REJECTED').count()
+    # context ทั้งหน้าเก็บใน cache ตาม ticket data version (ดู tickets/data_cache.py)
+    context = data_cache.cached('admin_summary', build_admin_summary_context, request=request)
+    # หัวคิวเปลี่ยนตาม rescore ด้วย (version แยก - ดู tickets/priority_queue.py)
+    context = {**context, 'queued_tickets': priority_queue.cached_top(10, request)}
+    return render(request, 'dashboard/admin_summary.html', context)
+
+
+@login_required
+def cache_stats(request):
+    """hit/miss ของ cache หน้า dashboard (JSON สำหรับ admin)"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    return JsonResponse(data_cache.metrics())
+
+
+def build_admin_summary_context():
+    """context ของหน้า admin_summary (ไม่มี QuerySet - pickle เก็บใน cache ได้)"""
+    # === Basic Statistics + Performance metrics (aggregate query เดียว) ===
+    summary = stats.ticket_summary()
 
     # === Tickets by Status ===
     tickets_by_status = {
-        'PENDING': pending_tickets,
-        'IN_PROGRESS': in_progress_tickets,
-        'COMPLETED': completed_tickets,
-        'REJECTED': rejected_tickets,
+        'PENDING': summary['pending'],
+        'IN_PROGRESS': summary['in_progress'],
+        'COMPLETED': summary['completed'],
+        'REJECTED': summary['rejected'],
     }
 
-    # === Tickets by Category ===
-    tickets_by_category = list(Ticket.objects.values('category__name').annotate(count=Count('id')).order_by('-count'))
-
-    # === Tickets by Urgency ===
-    tickets_by_urgency = list(Ticket.objects.values('urgency_level').annotate(count=Count('id')).order_by('urgency_level'))
-
-    # === Average Response Time (time from created to first assignment) ===
-    # Calculate average time for tickets that have been assigned
-    assigned_tickets = Ticket.objects.filter(assigned_to__isnull=False).exclude(status='PENDING')
-    avg_response_seconds = 0
-    if assigned_tickets.exists():
-        # Rough estimate using created_at and updated_at
-        total_response = sum([
-            (ticket.updated_at - ticket.created_at).total_seconds()
-            for ticket in assigned_tickets[:100]  # Sample for performance
-        ])
-        avg_response_seconds = total_response / min(assigned_tickets.count(), 100)
-    avg_response_hours = round(avg_response_seconds / 3600, 1) if avg_response_seconds else 0
-
-    # === Average Completion Time ===
-    completed_with_time = Ticket.objects.filter(
-        status__in=['COMPLETED', 'CLOSED'],
-        completed_at__isnull=False
-    )
-    avg_completion_seconds = 0
-    if completed_with_time.exists():
-        total_completion = sum([
-            (ticket.completed_at - ticket.created_at).total_seconds()
-            for ticket in completed_with_time[:100]
-        ])
-        avg_completion_seconds = total_completion / min(completed_with_time.count(), 100)
-    avg_completion_hours = round(avg_completion_seconds / 3600, 1) if avg_completion_seconds else 0
+    # === Tickets by Category / Urgency ===
+    tickets_by_category = stats.tickets_by('category__name', '-count')
+    tickets_by_urgency = stats.tickets_by('urgency_level', 'urgency_level')
 
     # === Technician Performance ===
-    technicians = User.objects.filter(role='technician')
-    technician_stats = []
-    for tech in technicians:
-        assigned_count = Ticket.objects.filter(assigned_to=tech).count()
-        completed_count = Ticket.objects.filter(
-            assigned_to=tech,
-            status__in=['COMPLETED', 'CLOSED']
-        ).count()
-
-        # Calculate completion rate
-        completion_rate = round((completed_count / assigned_count * 100), 1) if assigned_count > 0 else 0
-
-        # Average rating
-        avg_rating = TicketFeedback.objects.filter(
-            ticket__assigned_to=tech
-        ).aggregate(avg=Avg('overall_rating'))['avg']
-        avg_rating = round(avg_rating, 1) if avg_rating else 0
-
-        # Check availability
-        try:
-            presence = TechnicianPresence.objects.get(technician=tech)
-            is_available = presence.is_available
-        except TechnicianPresence.DoesNotExist:
-            is_available = True
-
-        technician_stats.append({
-            'name': tech.get_display_name(),
-            'username': tech.username,
-            'assigned': assigned_count,
-            'completed': completed_count,
-            'completion_rate': completion_rate,
-            'avg_rating': avg_rating,
-            'is_available': is_available,
-        })
-
-    # Sort by completion rate
-    technician_stats.sort(key=lambda x: x['completion_rate'], reverse=True)
+    # จำนวนงานอ่านจากตัวนับบน TechnicianPresence (ดู tickets/counters.py)
+    technician_stats = stats.technician_stats()
 
     # === Feedback Summary ===
-    total_feedbacks = TicketFeedback.objects.count()
-    avg_overall_rating = TicketFeedback.objects.aggregate(avg=Avg('overall_rating'))['avg']
-    avg_overall_rating = round(avg_overall_rating, 1) if avg_overall_rating else 0
+    feedback = stats.feedback_summary()
 
     # Recent feedbacks
-    recent_feedbacks = TicketFeedback.objects.select_related(
+    recent_feedbacks = list(TicketFeedback.objects.select_related(
         'ticket', 'ticket__assigned_to', 'ticket__created_by'
-    ).order_by('-created_at')[:5]
+    ).order_by('-created_at')[:5])
 
     # === Recent Tickets ===
-    recent_tickets = Ticket.objects.select_related(
+    recent_tickets = list(Ticket.objects.select_related(
         'created_by', 'assigned_to', 'category'
-    ).order_by('-created_at')[:10]
+    ).order_by('-created_at')[:10])
 
     # === User Statistics ===
-    total_users = User.objects.count()
-    total_technicians = technicians.count()
-    total_regular_users = User.objects.filter(role='user').count()
+    users = stats.user_summary()
 
     # === Prepare data for charts (JSON) ===
     status_chart_data = json.dumps({
@@ -138,17 +85,17 @@ def admin_summary(request):
         'data': [item['count'] for item in tickets_by_urgency]
     })
 
-    context = {
+    return {
         # Basic stats
-        'total_tickets': total_tickets,
-        'pending_tickets': pending_tickets,
-        'in_progress_tickets': in_progress_tickets,
-        'completed_tickets': completed_tickets,
-        'rejected_tickets': rejected_tickets,
+        'total_tickets': summary['total'],
+        'pending_tickets': summary['pending'],
+        'in_progress_tickets': summary['in_progress'],
+        'completed_tickets': summary['completed'],
+        'rejected_tickets': summary['rejected'],
 
         # Performance metrics
-        'avg_response_hours': avg_response_hours,
-        'avg_completion_hours': avg_completion_hours,
+        'avg_response_hours': summary['avg_response_hours'],
+        'avg_completion_hours': summary['avg_completion_hours'],
 
         # Charts data
         'status_chart_data': status_chart_data,
@@ -159,131 +106,167 @@ def admin_summary(request):
         'technician_stats': technician_stats,
 
         # Feedback summary
-        'total_feedbacks': total_feedbacks,
-        'avg_overall_rating': avg_overall_rating,
+        'total_feedbacks': feedback['total'],
+        'avg_overall_rating': feedback['avg_rating'],
         'recent_feedbacks': recent_feedbacks,
 
         # Recent activity
         'recent_tickets': recent_tickets,
 
         # User stats
-        'total_users': total_users,
-        'total_technicians': total_technicians,
-        'total_regular_users': total_regular_users,
+        'total_users': users['total'],
+        'total_technicians': users['technicians'],
+        'total_regular_users': users['regular'],
     }
 
-    return render(request, 'dashboard/admin_summary.html', context)
+
+def latest_ticket_list(status_filter, cursor=None):
+    """
+    Ticket ล่าสุดของหน้าแผนที่ทีละ 10 ใบ (pagination.Page - เก็บใน cache ได้)
+
+    Raises:
+        ValueError: cursor ไม่ถูกต้อง
+    """
+    latest_tickets = TicketListEntry.objects.all()  # แถวพร้อมแสดง ไม่ join หมวด/ผู้ใช้
+
+    # Apply status filter for latest tickets (pending / in_progress / completed)
+    if status_filter in STATUS_GROUPS:
+        latest_tickets = latest_tickets.filter(status__in=STATUS_GROUPS[status_filter])
+
+    return pagination.paginate(latest_tickets, '-created_at', cursor, page_size=10)
+
+
+def data_version_validators(request, *args, **kwargs):
+    """หน้า/ข้อมูลที่สร้างจาก ticket data version (ตัวเลขสรุป, Ticket ล่าสุด, จุดบนแผนที่)"""
+    return (data_cache.version(),), None
+
+
+def map_tile_validators(request, zoom, x, y):
+    try:
+        vector_tiles.parse_tile(zoom, x, y)
+    except ValueError:
+        return None  # view ตอบ 404
+    return (tile_versions.version(zoom, x, y),), None
+
 
 @login_required
+@conditional.conditional(data_version_validators)
 def map_view(request):
     """Main Page - แผนที่หลักแสดง Tickets ทั้งหมด (สำหรับทุก role)"""
+    latest_status_filter = request.GET.get('latest_status', 'all')
+    if request.GET.get('fragment'):
+        # ปุ่ม "โหลดเพิ่ม" ของ Ticket ล่าสุด - หน้าถัดไปไม่เก็บ cache
+        try:
+            page = latest_ticket_list(latest_status_filter, request.GET.get('cursor'))
+        except ValueError:
+            return HttpResponseBadRequest('Invalid cursor')
+        return pagination.fragment(request, 'dashboard/_latest_rows.html', {'latest_tickets': page}, page)
+
     # Get filter parameters
     status_filter = request.GET.get('status', 'all')
     category_filter = request.GET.get('category', 'all')
 
-    # Base queryset with prefetch for photos
-    tickets = Ticket.objects.exclude(location__isnull=True).select_related(
-        'category', 'created_by', 'assigned_to'
-    ).prefetch_related('before_after_photos', 'attachments')
-
-    # Apply filters
-    if status_filter == 'pending':
-        tickets = tickets.filter(status='PENDING')
-    elif status_filter == 'in_progress':
-        tickets = tickets.filter(status__in=['IN_PROGRESS', 'INSPECTING', 'WORKING'])
-    elif status_filter == 'completed':
-        tickets = tickets.filter(status__in=['COMPLETED', 'CLOSED'])
-
-    if category_filter != 'all':
-        tickets = tickets.filter(category_id=category_filter)
-
-    tickets = tickets.order_by('-created_at')
-
-    # Statistics
-    total_tickets = Ticket.objects.count()
-    pending_count = Ticket.objects.filter(status='PENDING').count()
-    in_progress_count = Ticket.objects.filter(status__in=['IN_PROGRESS', 'INSPECTING', 'WORKING']).count()
-    completed_count = Ticket.objects.filter(status__in=['COMPLETED', 'CLOSED']).count()
-
-    # Convert to GeoJSON for Leaflet
-    tickets_geojson = []
-    for ticket in tickets:
-        if ticket.location:
-            # Get photos from BeforeAfterPhoto model
-            before_photo = None
-            after_photo = None
-
-            for photo in ticket.before_after_photos.all():
-                if photo.photo_type == 'BEFORE' and not before_photo:
-                    before_photo = photo.image.url
-                elif photo.photo_type == 'AFTER' and not after_photo:
-                    after_photo = photo.image.url
-
-            # Get first attachment if no before photo
-            if not before_photo:
-                first_attachment = ticket.attachments.first()
-                if first_attachment:
-                    before_photo = first_attachment.file.url
-
-            tickets_geojson.append({
-                'type': 'Feature',
-                'geometry': {
-                    'type': 'Point',
-                    'coordinates': [ticket.location.x, ticket.location.y]
-                },
-                'properties': {
-                    'id': ticket.id,
-                    'title': ticket.title,
-                    'description': ticket.description,
-                    'status': ticket.status,
-                    'status_display': ticket.get_status_display(),
-                    'category': ticket.category.name,
-                    'category_id': ticket.category.id,
-                    'category_color': ticket.category.color if hasattr(ticket.category, 'color') else '#3B82F6',
-                    'urgency': ticket.urgency_level,
-                    'urgency_display': ticket.get_urgency_level_display(),
-                    'created_at': ticket.created_at.strftime('%d/%m/%Y %H:%M'),
-                    'before_photo': before_photo,
-                    'after_photo': after_photo,
-                }
-            })
+    # Statistics (ตารางสรุปรายวัน)
+    summary = data_cache.cached('map_counts', stats.ticket_counts, request=request)
+
+    # จุดบนแผนที่โหลดตามกรอบที่มองเห็นจาก map_features (ดู map_data.py)
 
     # Get categories for filter
     categories = Category.objects.filter(is_active=True)
 
     # === Latest 10 Tickets Section ===
-    latest_status_filter = request.GET.get('latest_status', 'all')
-    latest_tickets = Ticket.objects.select_related(
-        'category', 'created_by', 'assigned_to'
-    ).order_by('-created_at')
-
-    # Apply status filter for latest tickets
-    if latest_status_filter == 'pending':
-        latest_tickets = latest_tickets.filter(status='PENDING')
-    elif latest_status_filter == 'in_progress':
-        latest_tickets = latest_tickets.filter(status__in=['IN_PROGRESS', 'INSPECTING', 'WORKING'])
-    elif latest_status_filter == 'completed':
-        latest_tickets = latest_tickets.filter(status__in=['COMPLETED', 'CLOSED'])
-
-    latest_tickets = latest_tickets[:10]
+    latest_tickets = data_cache.cached(
+        'latest_tickets', lambda: latest_ticket_list(latest_status_filter),
+        vary=(latest_status_filter,), request=request
+    )
 
     context = {
-        'tickets_geojson': json.dumps(tickets_geojson),  # Convert to JSON string
-        'tickets': tickets,
-        'total_tickets': total_tickets,
-        'pending_count': pending_count,
-        'in_progress_count': in_progress_count,
-        'completed_count': completed_count,
+        # ชื่อหมวด/สถานะสำหรับแปลง feature ฝั่ง browser
+        'category_names': json.dumps({c.id: c.name for c in Category.objects.only('id', 'name')}),
+        'status_labels': json.dumps(dict(Ticket.STATUS_CHOICES)),
+        'status_filters': json.dumps(map_data.STATUS_FILTERS),
+        'total_tickets': summary['total'],
+        'pending_count': summary['pending'],
+        'in_progress_count': summary['in_progress'],
+        'completed_count': summary['completed'],
         'categories': categories,
         'status_filter': status_filter,
         'category_filter': category_filter,
         'latest_tickets': latest_tickets,
         'latest_status_filter': latest_status_filter,
+        'cluster_max_zoom': settings.MAP_CLUSTER_MAX_ZOOM,
+        'tile_min_zoom': settings.MAP_TILE_MIN_ZOOM,
+        'tile_max_zoom': settings.MAP_TILE_MAX_ZOOM,
     }
 
     return render(request, 'dashboard/main_page.html', context)
 
 
+@login_required
+@conditional.conditional(data_version_validators, page=False)
+def map_features(request):
+    """
+    จุด Ticket ในกรอบที่มองเห็น (GeoJSON แบบย่อ, stream)
+
+    GET: bbox=west,south,east,north, zoom, status, category
+    ซูมไม่เกิน MAP_CLUSTER_MAX_ZOOM คืนกลุ่มจุด (properties.cluster) แทนจุดทีละใบ
+    """
+    try:
+        bbox = map_data.parse_bbox(request.GET.get('bbox'))
+        zoom = map_data.parse_zoom(request.GET.get('zoom'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    category = request.GET.get('category', 'all')
+    if category != 'all' and not category.isdigit():
+        return JsonResponse({'error': 'category must be an id or all'}, status=400)
+
+    status = request.GET.get('status', 'all')
+    if zoom <= settings.MAP_CLUSTER_MAX_ZOOM:
+        # ซูมออก: กลุ่มจุดบนกริดที่คำนวณใน SQL (cache ต่อ tile)
+        try:
+            features = map_data.clusters(bbox, zoom, status, category, request=request)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'type': 'FeatureCollection', 'clustered': True, 'features': features})
+
+    rows = map_data.feature_rows(bbox, status, category)
+    return StreamingHttpResponse(map_data.stream_features(rows, zoom), content_type='application/json')
+
+
+@login_required
+@conditional.conditional(map_tile_validators, page=False)
+def map_tile(request, zoom, x, y):
+    """
+    Mapbox Vector Tile ของ Ticket (layer tickets + heat)
+
+    GET: status, category (ตัวกรองเดียวกับหน้าแผนที่)
+    """
+    try:
+        vector_tiles.parse_tile(zoom, x, y)
+    except ValueError as e:
+        raise Http404(str(e))
+    try:
+        status, category = vector_tiles.parse_filters(
+            request.GET.get('status', 'all'), request.GET.get('category', 'all')
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    data = vector_tiles.tile(zoom, x, y, status, category, request=request)
+    return HttpResponse(data, content_type='application/vnd.mapbox-vector-tile')
+
+
+@login_required
+def map_ticket(request, ticket_id):
+    """รายละเอียด Ticket เมื่อคลิกจุดบนแผนที่"""
+    ticket = get_object_or_404(
+        Ticket.objects.select_related('category').prefetch_related('before_after_photos', 'attachments'),
+        id=ticket_id
+    )
+    return JsonResponse(map_data.ticket_details(ticket))
+
+
 @login_required
 def admin_change_status(request):
     """Admin changes ticket status"""
@@ -1,10 +1,13 @@
 """
 WebSocket Consumer for Real-time Notifications
 """
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from .map_deltas import MAP_GROUP
 
 User = get_user_model()
 
@@ -90,6 +93,16 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'unread_count': event.get('unread_count', 0)
         }))
 
+    async def dispatch_result(self, event):
+        """
+        Called when the dispatch worker finishes assigning a ticket
+        Lets pages showing "assigning…" update in place
+        """
+        await self.send(text_data=json.dumps({
+            'type': 'dispatch_result',
+            'result': event['result'],
+        }))
+
     @database_sync_to_async
     def mark_notification_read(self, notification_id):
         """Mark a notification as read (database operation)"""
@@ -104,3 +117,48 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             return True
         except Notification.DoesNotExist:
             return False
+
+
+class MapConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer for live updates of the main map
+
+    Usage:
+        ws://localhost:8000/ws/map/
+
+    delta ที่เข้ามาภายใน MAP_DELTA_WINDOW_MS รวมเป็นข้อความเดียว
+    (Ticket เดียวกันเหลือค่าล่าสุด) - batch ใหญ่ไม่ทำให้ browser ต้องวาดใหม่ทีละรายการ
+    """
+
+    async def connect(self):
+        self.user = self.scope['user']
+        if self.user.is_anonymous:
+            await self.close()
+            return
+
+        self.pending = {}
+        self.flush_task = None
+        await self.channel_layer.group_add(MAP_GROUP, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if getattr(self, 'flush_task', None):
+            self.flush_task.cancel()
+        await self.channel_layer.group_discard(MAP_GROUP, self.channel_name)
+
+    async def map_deltas(self, event):
+        """delta จาก notify.map_deltas.publish - เก็บไว้ส่งเมื่อครบช่วงเวลา"""
+        for delta in event['deltas']:
+            self.pending[delta['id']] = delta
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(settings.MAP_DELTA_WINDOW_MS / 1000)
+        deltas = list(self.pending.values())
+        self.pending = {}
+        self.flush_task = None
+        await self.send(text_data=json.dumps({
+            'type': 'map_deltas',
+            'deltas': deltas,
+        }))
@@ -0,0 +1,55 @@
+"""
+Map Deltas
+ส่งการเปลี่ยนแปลงของ Ticket ไปยังหน้าแผนที่ที่เปิดอยู่ผ่าน WebSocket (group "map_updates")
+
+- delta ต่อ Ticket: id, lon, lat, status, category_id, urgency (ลบ = id + deleted)
+- ส่งหลัง commit เท่านั้น และรวมทั้ง batch เป็นข้อความเดียว (Batch Dispatcher)
+- MapConsumer รวม delta ที่เข้ามาภายใน MAP_DELTA_WINDOW_MS (Ticket เดียวกันเหลือค่าล่าสุด)
+  แล้วส่งให้ browser ครั้งเดียว
+"""
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+MAP_GROUP = 'map_updates'
+
+
+def ticket_delta(ticket):
+    location = ticket.location
+    return {
+        'id': ticket.id,
+        'lon': round(location.x, 7) if location else None,
+        'lat': round(location.y, 7) if location else None,
+        'status': ticket.status,
+        'category_id': ticket.category_id,
+        'urgency': ticket.urgency_level,
+    }
+
+
+def deleted_delta(ticket_id):
+    return {'id': ticket_id, 'deleted': True}
+
+
+def publish(deltas):
+    """ส่ง delta ไปยังทุกหน้าแผนที่ทันที"""
+    channel_layer = get_channel_layer()
+    if channel_layer and deltas:
+        async_to_sync(channel_layer.group_send)(MAP_GROUP, {
+            'type': 'map_deltas',
+            'deltas': deltas,
+        })
+
+
+def publish_on_commit(deltas):
+    """ส่งหลัง commit (ถ้า rollback หน้าแผนที่จะไม่เห็นข้อมูลที่ไม่เคยบันทึก)"""
+    deltas = list(deltas)
+    transaction.on_commit(lambda: publish(deltas))
+
+
+def tickets_changed(tickets):
+    publish_on_commit([ticket_delta(ticket) for ticket in tickets])
+
+
+def ticket_deleted(ticket_id):
+    publish_on_commit([deleted_delta(ticket_id)])
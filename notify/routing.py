@@ -6,4 +6,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
+    re_path(r'ws/map/$', consumers.MapConsumer.as_asgi()),
 ]
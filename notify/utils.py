@@ -1,6 +1,7 @@
 """
 Notification Helper Functions
 """
+from django.db import transaction
 from .models import Notification
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
@@ -26,8 +27,8 @@ def create_notification(user, title, message, ticket=None, notification_type='IN
         notification_type=notification_type
     )
 
-    # Send real-time notification via WebSocket
-    send_notification_to_user(user.id, notification)
+    # Send real-time notification via WebSocket (หลัง commit - เช่น worker มอบหมายช่างยังอาจ rollback)
+    transaction.on_commit(lambda: send_notification_to_user(user.id, notification))
 
     return notification
 
@@ -72,6 +73,37 @@ def send_notification_to_user(user_id, notification):
         )
 
 
+def send_dispatch_result(user_id, ticket, assigned):
+    """
+    ส่งผลการมอบหมายช่างจาก dispatch worker ผ่าน WebSocket
+    หน้าเว็บที่แสดง "กำลังมอบหมาย…" จะอัปเดตตาม ticket_id
+
+    Args:
+        user_id: ID ของผู้ใช้ที่รอผล
+        ticket: Ticket ที่ประมวลผลแล้ว
+        assigned: True ถ้ามอบหมายช่างได้
+    """
+    channel_layer = get_channel_layer()
+    group_name = f'notifications_{user_id}'
+
+    result_data = {
+        'ticket_id': ticket.id,
+        'assigned': assigned,
+        'technician': ticket.assigned_to.get_display_name() if ticket.assigned_to else None,
+        'status': ticket.status,
+        'status_display': ticket.get_status_display(),
+    }
+
+    if channel_layer:
+        async_to_sync(channel_layer.group_send)(
+            group_name,
+            {
+                'type': 'dispatch_result',
+                'result': result_data,
+            }
+        )
+
+
 def notify_ticket_assigned(ticket):
     """แจ้งเตือนเมื่อ ticket ถูก assign ให้ช่าง"""
     if ticket.assigned_to:
@@ -84,6 +116,34 @@ def notify_ticket_assigned(ticket):
         )
 
 
+def notify_tickets_assigned(tickets):
+    """
+    แจ้งเตือนช่างเมื่อได้รับงานจาก Batch Dispatcher
+    บันทึก notification แบบ bulk และส่ง WebSocket ช่างละครั้ง
+    """
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            recipient=ticket.assigned_to,
+            title='งานใหม่ถูกมอบหมาย',
+            message=f'คุณได้รับมอบหมายงาน: {ticket.title}',
+            ticket=ticket,
+            notification_type='ASSIGNED'
+        )
+        for ticket in tickets if ticket.assigned_to
+    ], batch_size=1000)
+
+    latest = {}
+    for notification in notifications:
+        latest[notification.recipient_id] = notification
+
+    def send_all():
+        for user_id, notification in latest.items():
+            send_notification_to_user(user_id, notification)
+
+    # ส่งหลัง commit เท่านั้น (batch อาจถูก rollback เช่น --dry-run)
+    transaction.on_commit(send_all)
+
+
 def notify_ticket_accepted(ticket):
     """แจ้งเตือนผู้แจ้งเมื่อช่างรับงาน"""
     create_notification(
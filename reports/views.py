@@ -2,9 +2,11 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
-from django.db.models import Count, Avg
-from tickets.models import Ticket, TicketFeedback
+from django.db.models import Avg, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from tickets.models import Ticket, TicketDailyStat, TicketFeedback
 from authentication.models import User
+from dashboard import stats
 
 
 @login_required
@@ -14,28 +16,28 @@ def analytics_dashboard(request):
         messages.error(request, 'คุณไม่มีสิทธิ์เข้าถึงหน้านี้')
         return redirect('tickets:my_tickets')
 
-    # Basic statistics
-    total_tickets = Ticket.objects.count()
-    pending = Ticket.objects.filter(status='PENDING').count()
-    in_progress = Ticket.objects.filter(status__in=['IN_PROGRESS', 'INSPECTING', 'WORKING']).count()
-    completed = Ticket.objects.filter(status__in=['COMPLETED', 'CLOSED']).count()
+    # Basic statistics (ตารางสรุปรายวัน - ดู tickets/rollups.py)
+    counts = stats.ticket_counts()
 
     # Tickets by category
-    by_category = Ticket.objects.values('category__name').annotate(count=Count('id'))
+    by_category = stats.tickets_by('category__name', '-count')
 
     # Average ratings
     avg_rating = TicketFeedback.objects.aggregate(avg=Avg('overall_rating'))
 
     # Technician performance
+    assigned = TicketDailyStat.objects.filter(
+        technician=OuterRef('pk')
+    ).order_by().values('technician').annotate(total=Sum('count')).values('total')
     technicians = User.objects.filter(role='technician').annotate(
-        assigned_count=Count('assigned_tickets')
+        assigned_count=Coalesce(Subquery(assigned), 0)
     )
 
     context = {
-        'total_tickets': total_tickets,
-        'pending': pending,
-        'in_progress': in_progress,
-        'completed': completed,
+        'total_tickets': counts['total'],
+        'pending': counts['pending'],
+        'in_progress': counts['in_progress'],
+        'completed': counts['completed'],
         'by_category': by_category,
         'avg_rating': avg_rating['avg'],
         'technicians': technicians,
@@ -1,101 +1,73 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponseBadRequest
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from tickets.models import Ticket, TicketStatusHistory, BeforeAfterPhoto, TechnicianPresence
-from tickets.dispatcher import auto_dispatch_ticket
+from tickets.models import Ticket, TicketListEntry, TicketStatusHistory, BeforeAfterPhoto, TechnicianPresence
+from tickets import conditional, pagination
+from tickets.query import TicketQuery
+from tickets.dispatch_queue import enqueue_dispatch
 from notify.utils import notify_ticket_accepted, notify_ticket_rejected, notify_ticket_completed, notify_status_changed
 
+def job_list_validators(request):
+    """job_list เปลี่ยนเมื่องานที่ได้รับมอบหมายหรือสถานะว่าง/ตัวนับของช่างเปลี่ยน"""
+    if request.user.role != 'technician':
+        return None
+    last, count = conditional.queryset_state(Ticket.objects.filter(assigned_to=request.user))
+    presence = TechnicianPresence.objects.filter(technician=request.user).values_list(
+        'is_available', 'pending_tickets', 'in_progress_tickets'
+    ).first()
+    return (last, count, presence), last
+
+
 @login_required
+@conditional.conditional(job_list_validators)
 def job_list(request):
     """รายการงานของช่าง พร้อม Search & Filter"""
     if request.user.role != 'technician':
         messages.error(request, 'คุณไม่มีสิทธิ์เข้าถึงหน้านี้')
         return redirect('tickets:my_tickets')
 
-    # Base queryset - งานที่ได้รับมอบหมาย
-    assigned_tickets = Ticket.objects.filter(assigned_to=request.user).exclude(
+    # Base queryset - งานที่ได้รับมอบหมาย (แถวพร้อมแสดงของ TicketListEntry - ไม่ join หมวด/ผู้แจ้ง)
+    assigned_tickets = TicketListEntry.objects.filter(assigned_to=request.user).exclude(
         status__in=['CLOSED', 'REJECTED']
-    ).select_related('category', 'created_by')
-
-    # Get filter parameters
-    search_query = request.GET.get('search', '').strip()
-    status_filter = request.GET.get('status', '')
-    category_filter = request.GET.get('category', '')
-    urgency_filter = request.GET.get('urgency', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    sort_by = request.GET.get('sort', '-created_at')
-
-    # Apply search
-    if search_query:
-        from django.db.models import Q
-        assigned_tickets = assigned_tickets.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+    )
 
-    # Apply filters
-    if status_filter:
-        assigned_tickets = assigned_tickets.filter(status=status_filter)
-
-    if category_filter:
-        assigned_tickets = assigned_tickets.filter(category_id=category_filter)
-
-    if urgency_filter:
-        assigned_tickets = assigned_tickets.filter(urgency_level=urgency_filter)
-
-    if date_from:
-        from datetime import datetime
-        try:
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d')
-            assigned_tickets = assigned_tickets.filter(created_at__gte=date_from_obj)
-        except ValueError:
-            pass
-
-    if date_to:
-        from datetime import datetime, timedelta
-        try:
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d')
-            assigned_tickets = assigned_tickets.filter(created_at__lt=date_to_obj + timedelta(days=1))
-        except ValueError:
-            pass
-
-    # Apply sorting
-    if sort_by in ['-created_at', 'created_at', '-urgency_level', 'urgency_level']:
-        assigned_tickets = assigned_tickets.order_by(sort_by)
-    else:
-        assigned_tickets = assigned_tickets.order_by('-created_at')
+    # ตัวกรอง/ค้นหา/เรียง (ดู tickets/query.py)
+    query = TicketQuery(request.GET)
+
+    # หน้าปัจจุบัน (keyset pagination - ปุ่ม "โหลดเพิ่ม" ส่ง cursor ของหน้าถัดไปมา)
+    try:
+        page = query.page(assigned_tickets, request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid cursor')
+
+    if request.GET.get('fragment'):
+        return pagination.fragment(request, 'technician/_job_rows.html', {'assigned_tickets': page}, page)
+
+    # จำนวนผลลัพธ์ (เฉพาะเมื่อกรอง - นับจริงเมื่อขอ ?count=exact)
+    if query.is_filtered:
+        pagination.count(page, query.apply(assigned_tickets), exact=request.GET.get('count') == 'exact')
 
     # Get categories for filter dropdown
     from tickets.models import Category
     categories = Category.objects.filter(is_active=True)
 
-    # Get availability status
-    try:
-        presence = TechnicianPresence.objects.get(technician=request.user)
-        is_available = presence.is_available
-    except TechnicianPresence.DoesNotExist:
-        is_available = True  # Default to available
-
-    # Count statistics (all assigned tickets, not filtered)
-    all_assigned = Ticket.objects.filter(assigned_to=request.user).exclude(status__in=['CLOSED', 'REJECTED'])
+    # Get availability status and counters (all assigned tickets, not filtered)
+    presence = TechnicianPresence.objects.filter(technician=request.user).first()
+    if presence is None:
+        presence = TechnicianPresence(technician=request.user)  # Default to available, no tickets
 
     context = {
-        'assigned_tickets': assigned_tickets,
+        'assigned_tickets': page,
         'categories': categories,
-        'pending_count': all_assigned.filter(status='PENDING').count(),
-        'in_progress_count': all_assigned.filter(status__in=['IN_PROGRESS', 'INSPECTING', 'WORKING']).count(),
-        'is_available': is_available,
+        'pending_count': presence.pending_tickets,
+        'in_progress_count': presence.in_progress_tickets,
+        'is_available': presence.is_available,
         # Pass filter values back to template
-        'search_query': search_query,
-        'status_filter': status_filter,
-        'category_filter': category_filter,
-        'urgency_filter': urgency_filter,
-        'date_from': date_from,
-        'date_to': date_to,
-        'sort_by': sort_by,
-        'filtered_count': assigned_tickets.count(),
+        **query.context(),
+        'filtered_count': page.count,
+        'count_estimated': page.count_estimated,
     }
 
     return render(request, 'technician/job_list.html', context)
@@ -196,21 +168,25 @@ def reject_job(request, ticket_id):
     # Notify creator about rejection
     notify_ticket_rejected(ticket, old_tech)
 
-    # Auto-dispatch to find new technician
-    auto_dispatch_ticket(ticket)
-    ticket.refresh_from_db()
+    # Auto-dispatch to find new technician (ผ่านคิว - ไม่ต้องรอ worker)
+    job = enqueue_dispatch(ticket, requested_by=request.user)
 
     # Show result message
-    if ticket.assigned_to:
-        messages.success(
-            request,
-            f'✅ มอบหมายใหม่ให้ {ticket.assigned_to.get_display_name()} แล้ว'
-        )
+    if job.status == 'QUEUED':
+        messages.info(request, '🔄 ปฏิเสธงานแล้ว ระบบกำลังมอบหมายช่างใหม่…')
     else:
-        messages.warning(
-            request,
-            '⚠️ ไม่พบช่างที่พร้อมรับงาน กรุณามอบหมายด้วยตนเอง'
-        )
+        ticket.refresh_from_db()
+
+        if ticket.assigned_to:
+            messages.success(
+                request,
+                f'✅ มอบหมายใหม่ให้ {ticket.assigned_to.get_display_name()} แล้ว'
+            )
+        else:
+            messages.warning(
+                request,
+                '⚠️ ไม่พบช่างที่พร้อมรับงาน กรุณามอบหมายด้วยตนเอง'
+            )
 
     return redirect('technician:job_list')
 
@@ -268,7 +244,8 @@ def update_availability(request):
 
     # Toggle availability
     presence.is_available = not presence.is_available
-    presence.save()
+    # ไม่เขียนทับตัวนับงานซึ่งอาจเปลี่ยนไปแล้วระหว่าง request
+    presence.save(update_fields=['is_available', 'updated_at'])
 
     # Show message
     if presence.is_available:
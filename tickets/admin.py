@@ -2,8 +2,10 @@ from django.contrib import admin
 from django.contrib.gis.admin import GISModelAdmin
 from .models import (
     Category, Department, Ticket, TicketStatusHistory, Attachment,
-    TechnicianPresence, AssignmentRule, TicketFeedback, BeforeAfterPhoto
+    TechnicianPresence, AssignmentRule, TicketFeedback, BeforeAfterPhoto,
+    DispatchJob, TechnicianCategory
 )
+from . import search
 
 
 @admin.register(Category)
@@ -28,6 +30,20 @@ class TicketAdmin(GISModelAdmin):
     readonly_fields = ('created_at', 'updated_at', 'priority_score')
     date_hierarchy = 'created_at'
 
+    def get_search_results(self, request, queryset, search_term):
+        """ค้นด้วยเลข id ตามเดิม ข้อความค้นแบบทนคำสะกดต่างบนหัวข้อ/สถานที่ (search.similar)"""
+        term = search_term.strip()
+        if not term or term.isdigit():
+            return super().get_search_results(request, queryset, search_term)
+        return search.similar(queryset, search_term), False
+
+    def get_ordering(self, request):
+        # ผลค้นหาเรียงตามความคล้าย (ถ้าไม่ได้คลิกเรียงคอลัมน์)
+        term = request.GET.get('q', '').strip()
+        if term and not term.isdigit():
+            return ['-similarity', '-created_at']
+        return super().get_ordering(request)
+
     fieldsets = (
         ('ข้อมูลพื้นฐาน', {
             'fields': ('title', 'description', 'category')
@@ -67,15 +83,26 @@ class AttachmentAdmin(admin.ModelAdmin):
 
 @admin.register(TechnicianPresence)
 class TechnicianPresenceAdmin(GISModelAdmin):
-    list_display = ('technician', 'is_available', 'updated_at')
+    list_display = ('technician', 'is_available', 'open_tickets', 'pending_tickets', 'in_progress_tickets', 'updated_at')
     list_filter = ('is_available',)
     search_fields = ('technician__username',)
+    # ตัวนับดูแลโดยระบบ - แก้ด้วย manage.py reconcile_counters
+    readonly_fields = ('open_tickets', 'pending_tickets', 'in_progress_tickets', 'completed_tickets', 'rejected_tickets')
+
+
+@admin.register(TechnicianCategory)
+class TechnicianCategoryAdmin(admin.ModelAdmin):
+    list_display = ('technician', 'category', 'proficiency', 'created_at')
+    list_filter = ('category', 'proficiency')
+    list_editable = ('proficiency',)
+    search_fields = ('technician__username', 'technician__displayname_th', 'category__name')
+    autocomplete_fields = ('technician',)
 
 
 @admin.register(AssignmentRule)
 class AssignmentRuleAdmin(admin.ModelAdmin):
-    list_display = ('max_open_tickets', 'weight_distance', 'weight_workload', 'is_active', 'created_at')
-    list_filter = ('is_active',)
+    list_display = ('max_open_tickets', 'weight_distance', 'weight_workload', 'scoring_strategy', 'is_active', 'created_at')
+    list_filter = ('is_active', 'scoring_strategy')
 
 
 @admin.register(TicketFeedback)
@@ -121,3 +148,11 @@ class BeforeAfterPhotoAdmin(admin.ModelAdmin):
             'fields': ('uploaded_by', 'file_size', 'uploaded_at')
         }),
     )
+
+
+@admin.register(DispatchJob)
+class DispatchJobAdmin(admin.ModelAdmin):
+    list_display = ('ticket', 'status', 'attempts', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('ticket__title', 'last_error')
+    readonly_fields = ('created_at', 'finished_at')
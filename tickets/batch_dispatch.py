@@ -0,0 +1,125 @@
+"""
+Batch Dispatcher
+มอบหมาย Ticket ค้าง (PENDING) ทั้งชุดพร้อมกันแบบ global optimum
+แทนการมอบหมายทีละใบตามลำดับเวลา (greedy) ของ AutoDispatcher.dispatch
+
+แนวคิด:
+- สร้าง cost matrix ขนาด ticket × (ช่าง × ช่องงานว่าง) ด้วย NumPy
+- ช่องงานที่ k ของช่างแต่ละคนคิด workload ที่ open_tickets + k
+  ทำให้ max_open_tickets เป็น capacity constraint และงานกระจายตัวเอง
+- แก้ปัญหา min-cost assignment ทั้งชุดด้วย scipy linear_sum_assignment
+"""
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from .scoring import haversine_m, score_candidates
+
+# คะแนนของคู่ที่ช่างไม่มีทักษะตรงหมวด - ต่ำพอที่ solver จะเลือกเมื่อไม่มีทางอื่นเท่านั้น
+INELIGIBLE_SCORE = -1e6
+
+
+def distance_matrix_km(ticket_xy, tech_xy):
+    """
+    ระยะทาง ticket × ช่าง (กม.)
+
+    Args:
+        ticket_xy: array (T, 2) ของ (lon, lat) - NaN ถ้า Ticket ไม่มีพิกัด
+        tech_xy: array (N, 2) ของ (lon, lat) - NaN ถ้าไม่ทราบตำแหน่งช่าง
+    """
+    return haversine_m(
+        ticket_xy[:, None, 0], ticket_xy[:, None, 1],
+        tech_xy[None, :, 0], tech_xy[None, :, 1]
+    ) / 1000.0
+
+
+def solve_batch(ticket_xy, tech_xy, tech_open, rule, ratings=None, eligible=None):
+    """
+    หา assignment ที่ score รวมสูงสุดของทั้งชุด
+
+    Ticket ควรเรียงตาม priority มาแล้ว - ถ้าช่องงานว่างไม่พอ
+    จะเลือกเฉพาะ Ticket ลำดับต้นๆ ที่มีช่างรับได้ ตามจำนวนช่องที่มี
+
+    Args:
+        ticket_xy: array (T, 2)
+        tech_xy: array (N, 2)
+        tech_open: int array (N,) จำนวนงานเปิดของช่างแต่ละคน
+        rule: AssignmentRule (หรือ object ที่มี max_open_tickets, weight_distance, weight_workload)
+        ratings: array (N,) คะแนนรีวิวเฉลี่ย หรือ None
+        eligible: bool array (T, N) ช่างรับงานหมวดของ Ticket ได้หรือไม่ หรือ None
+
+    Returns:
+        list of (ticket_index, tech_index, score, distance_km)
+    """
+    max_open = rule.max_open_tickets
+    free = np.clip(max_open - tech_open, 0, None).astype(int)
+    total_slots = int(free.sum())
+
+    if total_slots == 0 or len(ticket_xy) == 0:
+        return []
+
+    # ตัด Ticket ที่ไม่มีช่างรับได้ก่อน แล้วจึงตัดส่วนที่เกินจำนวนช่องงานว่าง (เก็บลำดับ priority สูงไว้)
+    # ไม่เช่นนั้น Ticket ที่ไม่มีใครรับได้จะกินโควตาของ Ticket ที่มอบหมายได้
+    if eligible is not None:
+        kept = np.flatnonzero(eligible.any(axis=1))[:total_slots]
+        eligible = eligible[kept]
+    else:
+        kept = np.arange(min(len(ticket_xy), total_slots))
+    if len(kept) == 0:
+        return []
+    ticket_xy = ticket_xy[kept]
+
+    # ขยายช่างเป็นช่องงาน: ช่องที่ k ของช่าง j มี workload = open_j + k
+    slot_tech = np.repeat(np.arange(len(free)), free)
+    slot_rank = np.arange(total_slots) - np.repeat(np.cumsum(free) - free, free)
+    slot_load = tech_open[slot_tech] + slot_rank
+
+    distance_km = distance_matrix_km(ticket_xy, tech_xy)
+    scores = score_candidates(
+        rule,
+        distance_km[:, slot_tech],
+        slot_load[None, :],
+        ratings=ratings[slot_tech][None, :] if ratings is not None else None,
+        ticket_located=~np.isnan(ticket_xy[:, :1])
+    )
+
+    if eligible is not None:
+        scores = np.where(eligible[:, slot_tech], scores, INELIGIBLE_SCORE)
+
+    rows, cols = linear_sum_assignment(scores, maximize=True)
+
+    techs = slot_tech[cols]
+    return [
+        (int(kept[r]), int(t), float(scores[r, c]), float(distance_km[r, t]))
+        for r, c, t in zip(rows, cols, techs)
+        if scores[r, c] > INELIGIBLE_SCORE
+    ]
+
+
+def solve_greedy(ticket_xy, tech_xy, tech_open, rule, ratings=None):
+    """
+    มอบหมายทีละ Ticket ตามลำดับแบบ AutoDispatcher.dispatch (ใช้เปรียบเทียบใน benchmark)
+
+    Returns:
+        list of (ticket_index, tech_index, score, distance_km)
+    """
+    max_open = rule.max_open_tickets
+    load = tech_open.astype(float).copy()
+    distance_km = distance_matrix_km(ticket_xy, tech_xy)
+
+    assignments = []
+    for i in range(len(ticket_xy)):
+        scores = score_candidates(
+            rule,
+            distance_km[i],
+            load,
+            ratings=ratings,
+            ticket_located=not np.isnan(ticket_xy[i, 0])
+        )
+        scores[load >= max_open] = -np.inf
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            break
+        load[best] += 1
+        assignments.append((i, best, float(scores[best]), float(distance_km[i, best])))
+
+    return assignments
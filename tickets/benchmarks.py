@@ -0,0 +1,504 @@
+"""
+Benchmarks สำหรับ manage.py benchmark <target>
+
+แต่ละ benchmark ใช้ข้อมูลสังเคราะห์รอบวิทยาเขตรังสิต
+และเขียนผลออกทาง stdout ของ command
+"""
+
+import time
+import numpy as np
+from types import SimpleNamespace
+from .batch_dispatch import solve_batch, solve_greedy
+from .scoring import haversine_m, score_candidates
+from .simulator import CAMPUS_LAT, CAMPUS_LON, random_points
+
+
+def _summarize(assignments, n_techs):
+    """สรุปคุณภาพของ assignment: score รวม, ระยะทาง, ความไม่สมดุลของงาน"""
+    if not assignments:
+        return {'assigned': 0, 'total_score': 0.0, 'mean_km': 0.0, 'p95_km': 0.0, 'load_std': 0.0}
+
+    scores = np.array([a[2] for a in assignments])
+    distances = np.array([a[3] for a in assignments])
+    loads = np.bincount([a[1] for a in assignments], minlength=n_techs)
+
+    return {
+        'assigned': len(assignments),
+        'total_score': float(scores.sum()),
+        'mean_km': float(np.nanmean(distances)),
+        'p95_km': float(np.nanpercentile(distances, 95)),
+        'load_std': float(loads.std()),
+    }
+
+
+def bench_dispatch(out, tickets=10000, technicians=500, seed=42, **kwargs):
+    """Batch (min-cost assignment) vs greedy ทีละใบ"""
+    rng = np.random.default_rng(seed)
+    rule = SimpleNamespace(max_open_tickets=5, weight_distance=0.6, weight_workload=0.4)
+
+    ticket_xy = random_points(rng, tickets)
+    tech_xy = random_points(rng, technicians)
+    tech_open = rng.integers(0, rule.max_open_tickets, technicians)
+
+    out.write(
+        f'{tickets} tickets x {technicians} technicians '
+        f'({int((rule.max_open_tickets - tech_open).sum())} free slots)'
+    )
+
+    results = {}
+    for name, solver in (('greedy', solve_greedy), ('batch', solve_batch)):
+        started = time.perf_counter()
+        assignments = solver(ticket_xy, tech_xy, tech_open, rule)
+        elapsed = time.perf_counter() - started
+        results[name] = dict(_summarize(assignments, technicians), seconds=elapsed)
+
+    out.write(f'{"mode":<8}{"seconds":>10}{"assigned":>10}{"score":>12}{"mean km":>10}{"p95 km":>10}{"load std":>10}')
+    for name, r in results.items():
+        out.write(
+            f'{name:<8}{r["seconds"]:>10.2f}{r["assigned"]:>10}{r["total_score"]:>12.1f}'
+            f'{r["mean_km"]:>10.2f}{r["p95_km"]:>10.2f}{r["load_std"]:>10.2f}'
+        )
+
+    return results
+
+
+def _score_loop(rule, ticket_lonlat, candidates):
+    """การให้คะแนนแบบเดิม: ทีละช่าง, ระยะทาง degree * 111000, เก็บเป็น dict"""
+    scored = []
+    for tech in candidates:
+        score = 0.0
+        dx = tech['lon'] - ticket_lonlat[0]
+        dy = tech['lat'] - ticket_lonlat[1]
+        distance_km = (dx ** 2 + dy ** 2) ** 0.5 * 111000 / 1000
+        if distance_km <= 1:
+            score += 1.0 * rule.weight_distance
+        elif distance_km <= 5:
+            score += 0.5 * rule.weight_distance
+        else:
+            score += 0.1 * rule.weight_distance
+        score += (1.0 - tech['open_tickets'] / rule.max_open_tickets) * rule.weight_workload
+        scored.append({'technician': tech, 'score': score, 'distance_km': distance_km})
+    return max(scored, key=lambda x: x['score'])
+
+
+def _score_vectorized(rule, ticket_lonlat, tech_xy, tech_open):
+    distances_km = haversine_m(ticket_lonlat[0], ticket_lonlat[1], tech_xy[:, 0], tech_xy[:, 1]) / 1000.0
+    return int(np.argmax(score_candidates(rule, distances_km, tech_open)))
+
+
+def bench_scoring(out, seed=42, repeat=200, **kwargs):
+    """Scoring engine แบบ vectorized vs loop ต่อช่าง ที่ 50 / 500 / 5000 candidates"""
+    rng = np.random.default_rng(seed)
+    rule = SimpleNamespace(max_open_tickets=5, weight_distance=0.6, weight_workload=0.4)
+    repeat = int(repeat)
+    ticket_lonlat = (CAMPUS_LON, CAMPUS_LAT)
+
+    out.write(f'{"candidates":<12}{"loop ms":>10}{"numpy ms":>10}{"speedup":>10}')
+    results = {}
+    for n in (50, 500, 5000):
+        tech_xy = random_points(rng, n)
+        tech_open = rng.integers(0, rule.max_open_tickets, n)
+        candidates = [
+            {'lon': lon, 'lat': lat, 'open_tickets': int(o)}
+            for (lon, lat), o in zip(tech_xy.tolist(), tech_open)
+        ]
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            _score_loop(rule, ticket_lonlat, candidates)
+        loop_ms = (time.perf_counter() - started) * 1000 / repeat
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            _score_vectorized(rule, ticket_lonlat, tech_xy, tech_open)
+        numpy_ms = (time.perf_counter() - started) * 1000 / repeat
+
+        results[n] = {'loop_ms': loop_ms, 'numpy_ms': numpy_ms}
+        out.write(f'{n:<12}{loop_ms:>10.3f}{numpy_ms:>10.3f}{loop_ms / numpy_ms:>9.1f}x')
+
+    return results
+
+
+def bench_skills(out, technicians=600, categories=6, seed=42, repeat=200, **kwargs):
+    """ขนาด candidate set และเวลาคัดช่าง เมื่อกรองด้วย skill bitmask ก่อนให้คะแนน"""
+    from .skills import SkillMatrix
+
+    rng = np.random.default_rng(seed)
+    rule = SimpleNamespace(max_open_tickets=5, weight_distance=0.6, weight_workload=0.4)
+    repeat = int(repeat)
+
+    tech_ids = np.arange(1, technicians + 1, dtype=np.int64)
+    tech_xy = random_points(rng, technicians)
+    tech_open = rng.integers(0, rule.max_open_tickets, technicians)
+
+    # ช่างแต่ละคนมี 1-2 ทักษะ (ช่างประปา, ช่างไฟฟ้า, IT, ...)
+    matrix = SkillMatrix()
+    matrix.bits = {category_id: category_id for category_id in range(categories)}
+    matrix.ids = tech_ids
+    matrix.masks = np.zeros((technicians, 1), dtype=np.uint64)
+    for row in range(technicians):
+        for category_id in rng.choice(categories, size=rng.integers(1, 3), replace=False):
+            matrix.masks[row, 0] |= np.uint64(1) << np.uint64(category_id)
+    matrix._loaded_at = float('inf')  # ไม่โหลดจากฐานข้อมูล
+
+    def pick(category_id=None):
+        xy, load = tech_xy, tech_open
+        if category_id is not None:
+            keep = matrix.eligible(tech_ids, category_id)
+            xy, load = xy[keep], load[keep]
+        distances_km = haversine_m(CAMPUS_LON, CAMPUS_LAT, xy[:, 0], xy[:, 1]) / 1000.0
+        return len(xy), int(np.argmax(score_candidates(rule, distances_km, load)))
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        all_count, _ = pick()
+    all_ms = (time.perf_counter() - started) * 1000 / repeat
+
+    started = time.perf_counter()
+    sizes = []
+    for i in range(repeat):
+        count, _ = pick(i % categories)
+        sizes.append(count)
+    skill_ms = (time.perf_counter() - started) * 1000 / repeat
+
+    out.write(f'{"mode":<10}{"candidates":>12}{"ms":>10}')
+    out.write(f'{"all":<10}{all_count:>12}{all_ms:>10.3f}')
+    out.write(f'{"skills":<10}{np.mean(sizes):>12.1f}{skill_ms:>10.3f}')
+
+    return {'all': (all_count, all_ms), 'skills': (float(np.mean(sizes)), skill_ms)}
+
+
+def bench_simulate(out, tickets=1000000, technicians=550, days=365, seed=42, **kwargs):
+    """Capacity simulator: เวลาที่ใช้จำลอง Ticket จำนวนมาก (เป้าหมาย 1M ใบไม่ถึงนาที)"""
+    from . import simulator
+
+    rng = np.random.default_rng(seed)
+    rule = SimpleNamespace(max_open_tickets=5, weight_distance=0.6, weight_workload=0.4)
+    categories = ['ไฟฟ้า', 'ประปา', 'IT/คอมพิวเตอร์', 'แอร์/ระบายอากาศ', 'อาคาร/โครงสร้าง']
+    per_cell = tickets / days / (len(categories) * len(simulator.URGENCY_LEVELS))
+    model = simulator.manual_arrivals(
+        {(name, level): per_cell for name in categories for level in simulator.URGENCY_LEVELS},
+        service_hours={name: 1.0 for name in categories}
+    )
+
+    started = time.perf_counter()
+    generated = simulator.generate_tickets(model, days, rng)
+    techs = simulator.make_technicians(
+        technicians, len(categories), simulator.parse_shifts('06-14,14-22,22-06'), rng, skills_per_tech=2
+    )
+    result = simulator.simulate(generated, techs, rule, days)
+    elapsed = time.perf_counter() - started
+
+    out.write(f'{result["tickets"]} tickets x {technicians} technicians over {days} days: {elapsed:.2f}s')
+    out.write(
+        f'SLA breach {result["sla_breach_rate"]:.2%}, mean wait {result["mean_wait_min"]:.1f} min, '
+        f'utilization {result["utilization"]:.0%}'
+    )
+
+    return dict(result, seconds=elapsed)
+
+
+class _Rows(list):
+    """แถวสังเคราะห์ที่มี .iterator() แบบ QuerySet (ใช้กับ map_data.stream_features)"""
+
+    def iterator(self, chunk_size=None):
+        return iter(self)
+
+
+def bench_map(out, tickets=50000, zoom=15, seed=42, **kwargs):
+    """
+    ขนาดข้อมูลและเวลาสร้างของแผนที่หลัก: inline ทุก Ticket (แบบเดิม) vs จุดในกรอบ vs กลุ่มจุด
+
+    กลุ่มจุด GROUP BY ด้วย NumPy แทน SQL - วัดเฉพาะการรวมผลและ JSON ฝั่ง Python
+    markers = จำนวน marker ที่ browser ต้องวาด
+    """
+    import json
+    from django.conf import settings
+    from dashboard import map_data
+
+    rng = np.random.default_rng(seed)
+    xy = random_points(rng, tickets, spread_deg=0.01)
+    status = rng.choice(['PENDING', 'IN_PROGRESS', 'COMPLETED', 'CLOSED'], tickets)
+    category = rng.integers(1, 7, tickets)
+    point = SimpleNamespace
+
+    results = {}
+
+    started = time.perf_counter()
+    legacy = json.dumps([
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [float(x), float(y)]},
+            'properties': {
+                'id': i, 'title': 'แอร์ไม่เย็น ห้อง 301', 'description': 'รายละเอียดปัญหา ' * 10,
+                'status': s, 'status_display': s, 'category': 'แอร์/ระบายอากาศ', 'category_id': int(c),
+                'category_color': 'blue', 'urgency': 'MEDIUM', 'urgency_display': 'ปกติ',
+                'created_at': '01/01/2026 08:00', 'before_photo': '/media/ticket_images/2026/01/photo.jpg',
+                'after_photo': None,
+            },
+        }
+        for i, (x, y, s, c) in enumerate(zip(xy[:, 0], xy[:, 1], status, category))
+    ])
+    results['inline'] = (len(legacy.encode()), time.perf_counter() - started, tickets)
+
+    started = time.perf_counter()
+    rows = _Rows(
+        (i, point(x=float(x), y=float(y)), s, int(c), 'MEDIUM')
+        for i, (x, y, s, c) in enumerate(zip(xy[:, 0], xy[:, 1], status, category))
+    )
+    body = ''.join(map_data.stream_features(rows, zoom=17))
+    results['bbox'] = (len(body.encode()), time.perf_counter() - started, min(tickets, settings.MAP_FEATURE_LIMIT))
+
+    started = time.perf_counter()
+    cell = map_data.tile_size(zoom) / map_data.CELLS_PER_TILE
+    cx = np.floor((xy[:, 0] + 180) / cell).astype(np.int64)
+    cy = np.floor((xy[:, 1] + 90) / cell).astype(np.int64)
+    groups = {}
+    for i in range(tickets):
+        key = (cx[i], cy[i], status[i], category[i])
+        group = groups.setdefault(key, [0, 0.0, 0.0, i])
+        group[0] += 1
+        group[1] += xy[i, 0]
+        group[2] += xy[i, 1]
+    grouped = [
+        {'cx': k[0], 'cy': k[1], 'status': k[2], 'category_id': int(k[3]), 'count': g[0],
+         'sum_x': g[1], 'sum_y': g[2], 'first_id': g[3], 'urgency': 'MEDIUM'}
+        for k, g in groups.items()
+    ]
+    grouping = time.perf_counter() - started
+    started = time.perf_counter()
+    features = [f for tile in map_data.fold_clusters(grouped, zoom).values() for f in tile]
+    body = json.dumps({'type': 'FeatureCollection', 'clustered': True, 'features': features}, separators=(',', ':'))
+    results['clusters'] = (len(body.encode()), time.perf_counter() - started, len(features))
+
+    out.write(f'{tickets} tickets, cluster zoom {zoom} ({len(grouped)} grouped rows, NumPy group {grouping:.2f}s)')
+    out.write(f'{"mode":<10}{"KB":>10}{"seconds":>10}{"markers":>10}')
+    for name, (size, seconds, markers) in results.items():
+        out.write(f'{name:<10}{size / 1024:>10.0f}{seconds:>10.3f}{markers:>10}')
+
+    return results
+
+
+def bench_polling(out, polls=240, changes=8, tickets=30, seed=42, **kwargs):
+    """
+    ช่าง poll หน้า job_list ตลอดกะ (เช่น ทุก 2 นาที 8 ชม. = 240 ครั้ง) ระหว่างนั้นงานเปลี่ยน changes ครั้ง
+
+    full = render ทุกครั้ง (แบบเดิม), conditional = ส่ง If-None-Match ของครั้งก่อน
+    ใช้ฐานข้อมูลจริง: สร้างช่าง/Ticket สังเคราะห์ใน transaction ที่ rollback ตอนจบ
+    """
+    from collections import Counter
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.contrib.gis.geos import Point
+    from django.db import connection, transaction
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from .models import Category, Ticket
+
+    User = get_user_model()
+    rng = np.random.default_rng(seed)
+    change_at = set(rng.choice(polls, size=min(changes, polls), replace=False).tolist())
+    host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+
+    results = {}
+    with transaction.atomic():
+        category = Category.objects.create(name=f'benchmark-polling-{seed}')
+        reporter = User.objects.create_user(username=f'benchmark-reporter-{seed}', role='user')
+        technician = User.objects.create_user(username=f'benchmark-technician-{seed}', role='technician')
+        rows = [
+            Ticket.objects.create(
+                title=f'Benchmark Ticket {i}',
+                description='Synthetic polling benchmark',
+                category=category,
+                created_by=reporter,
+                assigned_to=technician,
+                location=Point(lon, lat, srid=4326)
+            )
+            for i, (lon, lat) in enumerate(random_points(rng, tickets))
+        ]
+
+        for mode in ('full', 'conditional'):
+            client = Client(HTTP_HOST=host)
+            client.force_login(technician)
+            etag = None
+            statuses = Counter()
+            size = queries = 0
+            seconds = 0.0
+
+            for i in range(polls):
+                if i in change_at:
+                    ticket = rows[i % len(rows)]
+                    ticket.status = 'WORKING' if ticket.status == 'PENDING' else 'PENDING'
+                    ticket.save()
+
+                headers = {'HTTP_IF_NONE_MATCH': etag} if mode == 'conditional' and etag else {}
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get('/technician/jobs/', **headers)
+                    seconds += time.perf_counter() - started
+
+                statuses[response.status_code] += 1
+                size += len(response.content)
+                queries += len(captured)
+                etag = response.get('ETag', etag)
+
+            results[mode] = (statuses[200], statuses[304], size, seconds, queries)
+
+        transaction.set_rollback(True)
+
+    out.write(f'{polls} polls of job_list, {len(change_at)} change(s), {tickets} assigned tickets')
+    out.write(f'{"mode":<13}{"200":>6}{"304":>6}{"KB":>10}{"seconds":>10}{"queries":>9}')
+    for name, (ok, not_modified, size, seconds, queries) in results.items():
+        out.write(f'{name:<13}{ok:>6}{not_modified:>6}{size / 1024:>10.0f}{seconds:>10.3f}{queries:>9}')
+
+    return results
+
+
+# คำสำหรับสร้างข้อความ Ticket สังเคราะห์ (bench_search)
+SEARCH_WORDS = (
+    'แอร์', 'ไม่เย็น', 'น้ำรั่ว', 'ไฟดับ', 'หลอดไฟ', 'ก๊อกน้ำ', 'ประตู', 'หน้าต่าง', 'ลิฟต์', 'ห้องน้ำ',
+    'ปลั๊กไฟ', 'พัดลม', 'ท่อตัน', 'กลิ่นเหม็น', 'ชำรุด', 'เสียงดัง', 'wifi', 'projector', 'อาคาร', 'ชั้น',
+)
+SEARCH_PLACES = ('SC', 'บร.', 'อาคารเรียนรวม', 'หอพัก', 'โรงอาหาร', 'หอสมุด', 'ยิม', 'ลานจอดรถ')
+SEARCH_QUERIES = ('แอร์', 'น้ำรั่ว ห้องน้ำ', 'ไฟดับ', 'ลิฟต์ชำรุด', 'projector', 'โรงอาหาร', 'ท่อตัน', 'wifi หอพัก')
+
+
+def _create_search_tickets(rng, tickets, seed):
+    """สร้าง Ticket สังเคราะห์ด้วย bulk_create (ไม่มี search_vector) คืนเวลาที่ใช้ - เรียกใน transaction"""
+    from django.contrib.auth import get_user_model
+    from django.contrib.gis.geos import Point
+    from .models import Category, Ticket
+
+    def sentence(n):
+        return ' '.join(SEARCH_WORDS[i] for i in rng.integers(0, len(SEARCH_WORDS), n))
+
+    category = Category.objects.create(name=f'benchmark-search-{seed}')
+    reporter = get_user_model().objects.create_user(username=f'benchmark-search-{seed}', role='user')
+
+    started = time.perf_counter()
+    for start in range(0, tickets, 10000):
+        Ticket.objects.bulk_create([
+            Ticket(
+                title=sentence(3),
+                description=sentence(12),
+                address_description=f'{SEARCH_PLACES[i % len(SEARCH_PLACES)]} ชั้น {i % 9 + 1}',
+                category=category,
+                created_by=reporter,
+                location=Point(lon, lat, srid=4326)
+            )
+            for i, (lon, lat) in enumerate(random_points(rng, min(10000, tickets - start)), start)
+        ])
+    return time.perf_counter() - started
+
+
+def bench_search(out, tickets=1000000, repeat=20, seed=42, **kwargs):
+    """
+    ค้นหา Ticket: ILIKE '%..%' (แบบเดิม) vs full-text search (search_vector + GIN)
+
+    ใช้ฐานข้อมูลจริง: สร้าง Ticket สังเคราะห์ใน transaction ที่ rollback ตอนจบ
+    วัดเวลา backfill search_vector และ p50/p95 ของแต่ละคำค้น (หน้าแรก 20 แถว + count)
+    """
+    from django.db import transaction
+    from django.db.models import Q
+    from . import search
+    from .models import Ticket
+
+    rng = np.random.default_rng(seed)
+
+    def page(queryset):
+        list(queryset[:20])
+        queryset.count()
+
+    modes = {
+        'ilike': lambda text: Ticket.objects.filter(
+            Q(title__icontains=text) | Q(description__icontains=text)
+        ).order_by('-created_at'),
+        'fts': lambda text: search.search(Ticket.objects.all(), text).order_by('-search_rank', '-created_at'),
+    }
+
+    with transaction.atomic():
+        inserted = _create_search_tickets(rng, tickets, seed)
+
+        started = time.perf_counter()
+        search.backfill(chunk_size=5000, missing_only=True)
+        backfilled = time.perf_counter() - started
+
+        results = {}
+        for text in SEARCH_QUERIES:
+            for mode, build in modes.items():
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    page(build(text))
+                    timings.append(time.perf_counter() - started)
+                results[(text, mode)] = np.percentile(timings, [50, 95]) * 1000
+
+        transaction.set_rollback(True)
+
+    out.write(f'{tickets} tickets (insert {inserted:.1f}s, backfill search_vector {backfilled:.1f}s), '
+              f'{repeat} runs per query')
+    out.write(f'{"query":<20}{"mode":<7}{"p50 ms":>10}{"p95 ms":>10}')
+    for (text, mode), (p50, p95) in results.items():
+        out.write(f'{text:<20}{mode:<7}{p50:>10.1f}{p95:>10.1f}')
+
+    return results
+
+
+# คำค้นที่สะกดต่างจากข้อมูล (bench_similar)
+SIMILAR_QUERIES = ('แอร์ ตึก SC', 'แอ ไม่เย็น', 'น้ำรัว หอพัก', 'ไฟดบ', 'projecter', 'wi-fi หอสมุด', 'ลิฟท์ ชำรุด')
+
+
+def bench_similar(out, tickets=500000, repeat=20, target_ms=100, seed=42, **kwargs):
+    """
+    ค้นหาแบบทนคำสะกดต่าง (search.similar, pg_trgm GIN) - ตรวจ p95 ของทุกคำค้นเทียบ target_ms
+
+    ใช้ฐานข้อมูลจริง: สร้าง Ticket สังเคราะห์ใน transaction ที่ rollback ตอนจบ
+    วัดแบบ endpoint similar/ (Ticket ที่ยังเปิดอยู่ SEARCH_SIMILAR_LIMIT แถวแรก)
+    """
+    from django.conf import settings
+    from django.db import connection, transaction
+    from . import search
+    from .models import Ticket
+
+    rng = np.random.default_rng(seed)
+    open_tickets = Ticket.objects.exclude(status__in=['COMPLETED', 'CLOSED', 'REJECTED'])
+
+    with transaction.atomic():
+        inserted = _create_search_tickets(rng, tickets, seed)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tickets')
+        search.configure_connection(connection)
+
+        results = {}
+        for text in SIMILAR_QUERIES:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                found = list(search.similar(open_tickets, text)[:settings.SEARCH_SIMILAR_LIMIT])
+                timings.append(time.perf_counter() - started)
+            p50, p95 = np.percentile(timings, [50, 95]) * 1000
+            results[text] = (len(found), p50, p95)
+
+        transaction.set_rollback(True)
+
+    out.write(f'{tickets} tickets (insert {inserted:.1f}s), threshold {settings.SEARCH_SIMILARITY_THRESHOLD}, '
+              f'{repeat} runs per query, target p95 {target_ms} ms')
+    out.write(f'{"query":<20}{"found":>7}{"p50 ms":>10}{"p95 ms":>10}')
+    for text, (found, p50, p95) in results.items():
+        out.write(f'{text:<20}{found:>7}{p50:>10.1f}{p95:>10.1f}')
+
+    worst = max(p95 for _, _, p95 in results.values())
+    out.write(f'worst p95 {worst:.1f} ms: {"PASS" if worst <= target_ms else "FAIL"}')
+    return results
+
+
+BENCHMARKS = {
+    'dispatch': bench_dispatch,
+    'map': bench_map,
+    'polling': bench_polling,
+    'scoring': bench_scoring,
+    'search': bench_search,
+    'similar': bench_similar,
+    'simulate': bench_simulate,
+    'skills': bench_skills,
+}
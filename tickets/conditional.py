@@ -0,0 +1,86 @@
+"""
+Conditional GET
+ETag/Last-Modified ของหน้ารายการ/dashboard และข้อมูลแผนที่ที่ถูก poll บ่อย
+
+- validators ของแต่ละ view คำนวณจาก query เล็ก (Max(updated_at) + Count ของ queryset ที่หน้าใช้)
+  หรือจาก ticket data version ใน cache (ไม่แตะฐานข้อมูล)
+- ETag ผูกกับผู้ใช้, query string และ CSRF secret - หน้า HTML รวมจำนวนแจ้งเตือนที่ยังไม่อ่าน (navbar) ด้วย
+- ตรงกับ If-None-Match / If-Modified-Since -> 304 โดยไม่ render หน้า
+- response มี Cache-Control: private, no-cache - browser เก็บได้แต่ต้องถามเซิร์ฟเวอร์ทุกครั้ง
+  (NoCacheAfterLogoutMiddleware ยังใส่ no-store ให้หน้าอื่นตามเดิม)
+"""
+
+import hashlib
+from functools import wraps
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from notify.models import Notification
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def queryset_state(queryset, field='updated_at'):
+    """(ค่าล่าสุดของ field, จำนวนแถว) ของ queryset (1 query) - จำนวนแถวจับการลบ/ย้ายออกจากรายการ"""
+    state = queryset.order_by().aggregate(last=Max(field), count=Count('pk'))
+    return state['last'], state['count']
+
+
+def unread_count(user):
+    return Notification.objects.filter(recipient=user, is_read=False).count()
+
+
+def make_etag(request, parts, page=True):
+    """weak ETag จาก parts + ผู้ใช้ + query string (+ แจ้งเตือนที่ยังไม่อ่านสำหรับหน้า HTML)"""
+    values = [
+        request.user.pk,
+        request.get_full_path(),
+        # token ใน form ของหน้าเดิมต้องยังใช้ได้ (เปลี่ยนเมื่อ login ใหม่)
+        request.META.get('CSRF_COOKIE'),
+        *parts,
+    ]
+    if page:
+        values.append(unread_count(request.user))
+    digest = hashlib.sha1(repr(values).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def conditional(validators, page=True):
+    """
+    decorator ของ view ที่รองรับ conditional GET
+
+    Args:
+        validators: callable(request, *args, **kwargs) -> (parts, last_modified) หรือ None (ไม่ใช้)
+            parts = ค่าที่เปลี่ยนเมื่อเนื้อหาของ response เปลี่ยน, last_modified = datetime หรือ None
+        page: True สำหรับหน้า HTML (navbar มีจำนวนแจ้งเตือน และข้อความ flash)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            # มีข้อความ flash รอแสดง - ต้อง render ใหม่เพื่อให้ข้อความถูกแสดง
+            if page and len(messages.get_messages(request)):
+                return view(request, *args, **kwargs)
+
+            result = validators(request, *args, **kwargs)
+            if result is None:
+                return view(request, *args, **kwargs)
+
+            parts, last_modified = result
+            etag = make_etag(request, parts, page=page)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if timestamp is not None:
+                    response.headers.setdefault('Last-Modified', http_date(timestamp))
+            response.headers.setdefault('ETag', etag)
+            response['Cache-Control'] = CACHE_CONTROL
+            return response
+        return wrapper
+    return decorator
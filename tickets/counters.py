@@ -0,0 +1,175 @@
+"""
+Technician Counters
+ตัวนับงานของช่างบน TechnicianPresence แทนการ count() ตาราง tickets ทุกครั้ง
+
+- Ticket.save / ลบ Ticket / bulk_update ของ Batch Dispatcher
+  ปรับตัวนับด้วย F() ใน transaction เดียวกับการเปลี่ยน Ticket
+- ช่างที่ยังไม่มีแถว presence จะถูกสร้างพร้อมนับใหม่จากตาราง tickets
+- reconcile() ตรวจและซ่อมค่าที่คลาดเคลื่อน (manage.py reconcile_counters)
+"""
+
+from collections import Counter, defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from .models import Ticket, TechnicianPresence
+
+# สถานะที่นับว่างานยังเปิดอยู่ (ไม่ใช่ COMPLETED, CLOSED, REJECTED)
+OPEN_STATUSES = ['PENDING', 'IN_PROGRESS', 'INSPECTING', 'WORKING']
+
+# สถานะ -> ฟิลด์ตัวนับรายสถานะ
+STATUS_COUNTERS = {
+    'PENDING': 'pending_tickets',
+    'IN_PROGRESS': 'in_progress_tickets',
+    'INSPECTING': 'in_progress_tickets',
+    'WORKING': 'in_progress_tickets',
+    'COMPLETED': 'completed_tickets',
+    'CLOSED': 'completed_tickets',
+    'REJECTED': 'rejected_tickets',
+}
+
+COUNTER_FIELDS = ['open_tickets', 'pending_tickets', 'in_progress_tickets', 'completed_tickets', 'rejected_tickets']
+
+
+def _add(delta, status, amount):
+    field = STATUS_COUNTERS.get(status)
+    if field:
+        delta[field] += amount
+    if status in OPEN_STATUSES:
+        delta['open_tickets'] += amount
+
+
+def state_before_save(ticket):
+    """
+    (assigned_to_id, status) ที่ตัวนับรู้จักก่อน save ครั้งนี้
+
+    ต้องเรียกก่อน super().save() - หลัง save แล้ว _state.adding เป็น False และแถวใหม่อ่านได้จากฐานข้อมูล
+    """
+    state = getattr(ticket, '_counted_state', None)
+    if state is not None:
+        return state
+    if ticket._state.adding:
+        return (None, None)
+    # โหลดแบบ defer ฟิลด์ที่ใช้นับ - อ่านค่าในฐานข้อมูลแทน
+    row = Ticket.objects.filter(pk=ticket.pk).values_list('assigned_to_id', 'status').first()
+    return row or (None, None)
+
+
+def apply_changes(changes):
+    """
+    ปรับตัวนับตามการเปลี่ยนแปลงของ Ticket (ต้องเรียกภายใน transaction เดียวกัน)
+
+    Args:
+        changes: iterable of ((old_technician_id, old_status), (new_technician_id, new_status))
+    """
+    deltas = defaultdict(Counter)
+    for (old_tech, old_status), (new_tech, new_status) in changes:
+        if (old_tech, old_status) == (new_tech, new_status):
+            continue
+        if old_tech:
+            _add(deltas[old_tech], old_status, -1)
+        if new_tech:
+            _add(deltas[new_tech], new_status, 1)
+
+    for technician_id, delta in deltas.items():
+        updates = {field: F(field) + amount for field, amount in delta.items() if amount}
+        if not updates:
+            continue
+        if not TechnicianPresence.objects.filter(technician_id=technician_id).update(**updates):
+            _create_presence(technician_id, updates)
+
+
+def _create_presence(technician_id, updates):
+    """สร้างแถว presence ให้ช่างพร้อมตัวนับจากตาราง tickets (ซึ่งรวมการเปลี่ยนแปลงนี้แล้ว)"""
+    try:
+        with transaction.atomic():
+            TechnicianPresence.objects.create(
+                technician_id=technician_id,
+                **recount([technician_id]).get(technician_id, {})
+            )
+    except IntegrityError:
+        # process อื่นสร้างแถวไปก่อนแล้ว
+        TechnicianPresence.objects.filter(technician_id=technician_id).update(**updates)
+
+
+def ticket_saved(ticket, old):
+    """เรียกจาก Ticket.save หลังบันทึกแล้ว (old = state_before_save ก่อนบันทึก)"""
+    new = (ticket.assigned_to_id, ticket.status)
+    apply_changes([(old, new)])
+    ticket._counted_state = new
+
+
+def ticket_deleted(ticket):
+    apply_changes([((ticket.assigned_to_id, ticket.status), (None, None))])
+
+
+def recount(technician_ids=None):
+    """
+    นับตัวนับจริงจากตาราง tickets
+
+    Returns:
+        dict technician_id -> {field: count}
+    """
+    rows = Ticket.objects.filter(assigned_to__isnull=False)
+    if technician_ids is not None:
+        rows = rows.filter(assigned_to_id__in=technician_ids)
+
+    counts = defaultdict(Counter)
+    for technician_id, status, count in rows.values_list(
+        'assigned_to_id', 'status'
+    ).annotate(count=Count('id')).order_by():
+        _add(counts[technician_id], status, count)
+
+    return {
+        technician_id: {field: delta[field] for field in COUNTER_FIELDS}
+        for technician_id, delta in counts.items()
+    }
+
+
+def reconcile(dry_run=False):
+    """
+    เทียบตัวนับกับตาราง tickets แล้วแก้ให้ตรง
+
+    Returns:
+        dict: checked (จำนวนช่าง), drifted (จำนวนช่างที่ค่าไม่ตรง),
+        created (แถว presence ที่สร้างใหม่), drift (ผลรวม |ส่วนต่าง| ต่อฟิลด์)
+    """
+    with transaction.atomic():
+        actual = recount()
+        presences = {
+            p.technician_id: p
+            for p in TechnicianPresence.objects.select_for_update()
+        }
+
+        drift = Counter()
+        changed = []
+        for technician_id, presence in presences.items():
+            expected = actual.get(technician_id, {})
+            dirty = False
+            for field in COUNTER_FIELDS:
+                diff = expected.get(field, 0) - getattr(presence, field)
+                if diff:
+                    drift[field] += abs(diff)
+                    setattr(presence, field, expected.get(field, 0))
+                    dirty = True
+            if dirty:
+                changed.append(presence)
+
+        missing = [
+            TechnicianPresence(technician_id=technician_id, **counts)
+            for technician_id, counts in actual.items()
+            if technician_id not in presences
+        ]
+        for presence in missing:
+            for field in COUNTER_FIELDS:
+                drift[field] += getattr(presence, field)
+
+        if not dry_run:
+            TechnicianPresence.objects.bulk_update(changed, COUNTER_FIELDS, batch_size=500)
+            TechnicianPresence.objects.bulk_create(missing, batch_size=500)
+
+    return {
+        'checked': len(presences) + len(missing),
+        'drifted': len(changed) + len(missing),
+        'created': len(missing),
+        'drift': dict(drift),
+    }
@@ -0,0 +1,170 @@
+"""
+Ticket Data Cache
+cache ของข้อมูลหน้า dashboard ที่ผูกกับ "ticket data version" ตัวเดียวทั้งระบบ
+
+- version เพิ่มขึ้นหลัง commit ทุกครั้งที่ Ticket/ประวัติสถานะ/รีวิวเปลี่ยน (signals)
+  และหลัง bulk_update ของ Batch Dispatcher
+- rescore คิวไม่เพิ่ม version นี้ (ทำตามรอบเวลา) - ใช้ version แยก priority_queue.QUEUE_VERSION_KEY
+- key ของค่าใน cache มี version อยู่ด้วย - เปลี่ยน version = ค่าเดิมทั้งหมดหมดอายุทันที
+  โดยไม่ต้องไล่ลบ (ค่าเก่าจะถูก backend ทิ้งเองตาม timeout)
+- ข้อมูลที่ไม่ผูกกับ Ticket (เช่น สถานะว่างของช่าง) ใหม่ภายใน DASHBOARD_CACHE_TIMEOUT วินาที
+- ใช้ได้ทั้ง LocMemCache/FileBasedCache ตอน dev และ Redis ที่ทุก process ใช้ร่วมกันตอน production
+- นับ hit/miss/bypass ต่อชื่อ (metrics()) และปิด cache รายชื่อได้ด้วย DASHBOARD_CACHE_DISABLED
+  หรือ ?nocache=1 (DEBUG หรือ admin) สำหรับ debug
+"""
+
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'ticket-data:version'
+METRIC_NAMES_KEY = 'ticket-data:metrics'
+METRIC_KINDS = ('hit', 'miss', 'bypass')
+
+_seen_names = set()
+
+
+def version(key=VERSION_KEY):
+    """ticket data version ปัจจุบัน (key อื่น = version แยกของข้อมูลย่อย เช่นลำดับคิว priority)"""
+    value = cache.get(key)
+    if value is None:
+        # เริ่มจากเวลาปัจจุบัน - ถ้า key ถูก evict จะไม่ย้อนกลับไปชน version เก่า
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def bump(key=VERSION_KEY):
+    """เพิ่ม version ทันที (ใช้ bump_on_commit เมื่ออยู่ใน transaction)"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # ยังไม่มี key (หรือถูก evict) - ตั้งใหม่ให้มากกว่าเดิมแน่นอน
+        cache.set(key, int(time.time() * 1000), timeout=None)
+        return cache.get(key)
+
+
+def bump_on_commit(key=VERSION_KEY):
+    """
+    เพิ่ม version หลัง transaction commit
+
+    ถ้าเพิ่มก่อน commit request อื่นอาจอ่านข้อมูลเดิมแล้วเก็บไว้ใต้ version ใหม่
+    """
+    transaction.on_commit(lambda: bump(key))
+
+
+def is_enabled(name, request=None):
+    disabled = settings.DASHBOARD_CACHE_DISABLED
+    if 'all' in disabled or name in disabled:
+        return False
+    if request is not None and request.GET.get('nocache'):
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or getattr(user, 'role', None) == 'admin':
+            return False
+    return True
+
+
+def _count(name, kind, amount=1):
+    key = f'ticket-data:metrics:{name}:{kind}'
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+    if name not in _seen_names:
+        names = cache.get(METRIC_NAMES_KEY) or []
+        if name not in names:
+            cache.set(METRIC_NAMES_KEY, sorted({*names, name}), timeout=None)
+        _seen_names.add(name)
+
+
+def cached(name, build, vary=(), request=None, timeout=None):
+    """
+    คืนค่าจาก cache ของ version ปัจจุบัน หรือเรียก build() แล้วเก็บไว้
+
+    Args:
+        name: ชื่อของข้อมูล (ใช้ใน key, metrics และ DASHBOARD_CACHE_DISABLED)
+        build: callable ที่สร้างค่า (ต้อง pickle ได้ - QuerySet ให้แปลงเป็น list ก่อน)
+        vary: ค่าที่ทำให้ผลต่างกัน เช่น filter ของหน้า
+        request: ใช้ตรวจ ?nocache=1
+    """
+    if not is_enabled(name, request):
+        _count(name, 'bypass')
+        return build()
+
+    key = ':'.join(['ticket-data', name, str(version()), *map(str, vary)])
+    value = cache.get(key)
+    if value is not None:
+        _count(name, 'hit')
+        return value
+
+    _count(name, 'miss')
+    value = build()
+    cache.set(key, value, settings.DASHBOARD_CACHE_TIMEOUT if timeout is None else timeout)
+    return value
+
+
+def cached_many(name, varies, build_many, request=None, timeout=None):
+    """
+    cached() หลายค่าพร้อมกัน (get_many/set_many) - ค่าที่ไม่มีใน cache สร้างใน build_many ครั้งเดียว
+
+    Args:
+        varies: list ของ tuple vary แต่ละค่า
+        build_many: callable(list ของ vary ที่ไม่มีใน cache) -> dict vary -> ค่า
+
+    Returns:
+        dict vary -> ค่า
+    """
+    if not is_enabled(name, request):
+        _count(name, 'bypass')
+        return build_many(list(varies))
+
+    prefix = ['ticket-data', name, str(version())]
+    keys = {vary: ':'.join([*prefix, *map(str, vary)]) for vary in varies}
+    found = cache.get_many(list(keys.values()))
+
+    values = {vary: found[key] for vary, key in keys.items() if key in found}
+    missing = [vary for vary in keys if vary not in values]
+    if values:
+        _count(name, 'hit', len(values))
+
+    if missing:
+        _count(name, 'miss', len(missing))
+        built = build_many(missing)
+        cache.set_many(
+            {keys[vary]: built[vary] for vary in missing},
+            settings.DASHBOARD_CACHE_TIMEOUT if timeout is None else timeout
+        )
+        values.update(built)
+
+    return values
+
+
+def metrics():
+    """
+    จำนวน hit/miss/bypass ต่อชื่อ (รวมทุก process เมื่อใช้ cache ร่วมกัน)
+
+    Returns:
+        dict: version, caches -> {name: {hit, miss, bypass, hit_rate}}
+    """
+    names = cache.get(METRIC_NAMES_KEY) or []
+    keys = [f'ticket-data:metrics:{name}:{kind}' for name in names for kind in METRIC_KINDS]
+    values = cache.get_many(keys)
+
+    caches = {}
+    for name in names:
+        counts = {kind: values.get(f'ticket-data:metrics:{name}:{kind}', 0) for kind in METRIC_KINDS}
+        lookups = counts['hit'] + counts['miss']
+        counts['hit_rate'] = round(counts['hit'] / lookups, 3) if lookups else 0.0
+        caches[name] = counts
+
+    return {'version': version(), 'caches': caches}
+
+
+def reset_metrics():
+    names = cache.get(METRIC_NAMES_KEY) or []
+    cache.delete_many([f'ticket-data:metrics:{name}:{kind}' for name in names for kind in METRIC_KINDS])
+    cache.delete(METRIC_NAMES_KEY)
+    _seen_names.clear()
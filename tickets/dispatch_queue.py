@@ -0,0 +1,142 @@
+"""
+Dispatch Queue
+คิวงาน Auto Dispatcher บนฐานข้อมูล - view แค่ enqueue แล้วตอบกลับทันที
+ส่วนการมอบหมายช่างทำโดย worker (manage.py run_dispatcher)
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import DispatchJob
+from .dispatcher import AutoDispatcher
+from .presence_index import can_stay_coherent
+from notify.utils import send_dispatch_result
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def runs_async():
+    """
+    ให้ worker มอบหมายช่างหรือไม่
+
+    ผลจาก worker ส่งถึงหน้าเว็บผ่าน channel layer - InMemoryChannelLayer (ไม่ได้ตั้ง REDIS_URL)
+    ส่งได้แค่ใน process เดียวกัน ผู้แจ้งจะค้างที่ "กำลังมอบหมาย…" จึงมอบหมายใน request แทน
+    """
+    return settings.DISPATCH_ASYNC and can_stay_coherent()
+
+
+def enqueue_dispatch(ticket, requested_by=None):
+    """
+    ส่ง Ticket เข้าคิวเพื่อมอบหมายช่าง
+
+    ถ้า DISPATCH_ASYNC = False (เช่นตอน dev ที่ไม่ได้รัน worker) หรือ channel layer
+    ส่งข้าม process ไม่ได้ จะประมวลผลทันทีใน request เดิม (ดู runs_async)
+
+    Returns:
+        DispatchJob
+    """
+    job = DispatchJob.objects.create(ticket=ticket, requested_by=requested_by)
+
+    if not runs_async():
+        process_job(job.id)
+        job.refresh_from_db()
+
+    return job
+
+
+def pending_dispatch_ids(ticket_ids):
+    """คืน set ของ ticket id ที่ยังรอ worker มอบหมายช่าง (ใช้แสดง "กำลังมอบหมาย…")"""
+    return set(
+        DispatchJob.objects.filter(
+            ticket_id__in=ticket_ids,
+            status='QUEUED'
+        ).values_list('ticket_id', flat=True)
+    )
+
+
+def process_next_job():
+    """
+    ดึงงานถัดไปจากคิวด้วย SELECT ... FOR UPDATE SKIP LOCKED แล้วประมวลผล
+
+    worker หลายตัวจึงรันพร้อมกันได้โดยไม่หยิบงานซ้ำ และถ้า worker ตาย
+    ระหว่างทำงาน transaction จะ rollback ทำให้งานกลับเข้าคิวเอง
+
+    Returns:
+        DispatchJob ที่ประมวลผลแล้ว หรือ None ถ้าคิวว่าง
+    """
+    with transaction.atomic():
+        job = DispatchJob.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            status='QUEUED',
+            available_at__lte=timezone.now()  # งานที่ล้มเหลวรอ backoff ก่อน
+        ).order_by('available_at', 'id').first()
+
+        if job is None:
+            return None
+
+        _run(job)
+
+    return job
+
+
+def process_job(job_id):
+    """ประมวลผลงานที่ระบุ (ใช้เมื่อไม่ได้ส่งให้ worker - ดู runs_async)"""
+    with transaction.atomic():
+        job = DispatchJob.objects.select_for_update().get(id=job_id)
+        if job.status == 'QUEUED':
+            _run(job)
+    return job
+
+
+def retry_delay(attempts):
+    """เวลารอก่อนลองครั้งถัดไป: DISPATCH_RETRY_DELAY × 2^(ครั้งที่ล้มเหลว - 1)"""
+    return timedelta(seconds=settings.DISPATCH_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _run(job):
+    """มอบหมายช่างให้ Ticket ของงานนี้ (ต้องเรียกภายใน transaction ที่ lock job ไว้แล้ว)"""
+    ticket = job.ticket
+    job.attempts += 1
+
+    try:
+        # savepoint - ถ้า dispatch พังให้ rollback เฉพาะส่วนนี้แล้วบันทึกข้อผิดพลาด
+        with transaction.atomic():
+            if ticket.status != 'PENDING' or ticket.assigned_to_id:
+                # Ticket ถูกยกเลิกหรือมอบหมายไปแล้วระหว่างรอคิว
+                assigned = ticket.assigned_to_id is not None
+            else:
+                assigned = AutoDispatcher().dispatch(ticket)
+    except Exception as e:
+        logger.exception(f"Dispatch job #{job.id} for Ticket #{ticket.id} failed")
+        job.last_error = str(e)
+        if job.attempts >= settings.DISPATCH_MAX_ATTEMPTS:
+            job.status = 'FAILED'
+            job.finished_at = timezone.now()
+        else:
+            # ข้อผิดพลาดชั่วคราว (lock timeout, ฐานข้อมูลสะดุด) - รอนานขึ้นเท่าตัวก่อนลองใหม่
+            job.available_at = timezone.now() + retry_delay(job.attempts)
+        job.save()
+        return
+
+    job.status = 'DONE'
+    job.finished_at = timezone.now()
+    job.save()
+
+    # ส่งผลกลับหลัง commit เพื่อให้หน้าเว็บ refresh แล้วเห็นข้อมูลล่าสุด
+    transaction.on_commit(lambda: _notify_result(job, assigned))
+
+
+def _notify_result(job, assigned):
+    """แจ้งผลการมอบหมายไปยังผู้ที่รอ ผ่าน group notifications_<id> เดิม"""
+    ticket = job.ticket
+    ticket.refresh_from_db()
+
+    recipients = {ticket.created_by_id}
+    if job.requested_by_id:
+        recipients.add(job.requested_by_id)
+
+    for user_id in recipients:
+        send_dispatch_result(user_id, ticket, assigned)
@@ -3,15 +3,38 @@ Auto Dispatcher System
 คัดเลือกช่างที่เหมาะสมที่สุดสำหรับ Ticket ใหม่
 """
 
-from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.geos import Point
-from .models import Ticket, TechnicianPresence, AssignmentRule, TicketStatusHistory
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Ticket, TechnicianPresence, AssignmentRule, TicketStatusHistory, TicketFeedback
+from .batch_dispatch import solve_batch
+from .scoring import base_priority, get_strategy, haversine_m, score_candidates
+from .counters import apply_changes, state_before_save
+from . import data_cache, heat_grid, list_entries, presence_index, priority_queue, rollups, skills
 from authentication.models import User
-from notify.utils import notify_ticket_assigned
+from notify import map_deltas
+from notify.utils import notify_ticket_assigned, notify_tickets_assigned
+import numpy as np
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
+# key แรกของ PostgreSQL advisory lock ต่อช่าง (key ที่สองคือ technician id)
+CAPACITY_LOCK_NAMESPACE = 7301
+
+# จำนวนรอบที่ไล่จองช่างใหม่ เมื่อช่างที่เหมาะสมกำลังถูกจองโดย dispatcher อื่น
+RESERVE_ROUNDS = 3
+RESERVE_BACKOFF_SECONDS = 0.05
+
+
+class CapacityContention(Exception):
+    """จองช่องงานของช่างไม่ได้เพราะ dispatcher อื่นถือ lock อยู่ตลอด (ให้คิวลองใหม่)"""
+
 
 class AutoDispatcher:
     """
@@ -39,150 +62,252 @@ class AutoDispatcher:
 
     def calculate_priority_score(self, ticket):
         """
-        คำนวณ priority score ของ Ticket
+        คำนวณ priority score ตั้งต้นของ Ticket (base_priority_score)
 
         Formula:
-        priority_score = urgency_weight + category_weight + heat_weight
-        """
-        score = 0.0
-
-        # Urgency level weight
-        urgency_weights = {
-            'LOW': 1.0,
-            'MEDIUM': 2.0,
-            'HIGH': 3.0,
-            'CRITICAL': 5.0,
-        }
-        score += urgency_weights.get(ticket.urgency_level, 2.0)
-
-        # Category weight (customize based on business rules)
-        category_weights = {
-            'ไฟฟ้า': 1.5,
-            'ประปา': 1.5,
-            'IT/คอมพิวเตอร์': 1.0,
-            'แอร์/ระบายอากาศ': 1.2,
-            'อาคาร/โครงสร้าง': 1.3,
-        }
-        score += category_weights.get(ticket.category.name, 1.0)
+        base_priority_score = urgency_weight + category_weight + heat_weight
+        priority_score = base_priority_score + aging (ดู priority_queue.py)
+        """
+        score = base_priority(ticket.urgency_level, ticket.category.name)
 
         # Heat count (ความถี่ปัญหาในพื้นที่นั้น)
         if ticket.location:
-            # Count tickets in 500m radius in last 30 days
-            from django.utils import timezone
-            from datetime import timedelta
-            from django.contrib.gis.measure import D
-
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            nearby_count = Ticket.objects.filter(
-                location__distance_lte=(ticket.location, D(m=500)),
-                created_at__gte=thirty_days_ago
-            ).count()
+            # Count tickets in 500m radius in last 30 days (จากตาราง heat grid)
+            nearby_count = heat_grid.nearby_count(ticket.location, radius_m=500)
 
             score += min(nearby_count * 0.1, 2.0)  # Cap at 2.0
 
         return round(score, 2)
 
-    def find_best_technician(self, ticket):
+    def candidate_queryset(self, ticket=None):
         """
-        หาช่างที่เหมาะสมที่สุดสำหรับ Ticket
-
-        Returns:
-            (technician, reason) or (None, reason)
+        Query เดียวสำหรับคัดเลือกช่าง
+
+        - ตัดช่างที่ไม่มีทักษะตรงหมวดของ Ticket ด้วย skill bitmask (ไม่ต้อง join)
+        - join TechnicianPresence (LEFT JOIN เพราะช่างที่ไม่มี presence ถือว่าพร้อมรับงาน)
+        - annotate จำนวนงานที่ยังเปิดอยู่จากตัวนับบน TechnicianPresence (ไม่มีแถว = ยังไม่มีงาน)
+        - กรองช่างที่หยุดรับงาน และช่างที่งานเต็ม max_open_tickets
+        - ดึงพิกัดช่างมาคำนวณระยะทางใน scoring engine (ไม่ใช้ Distance ต่อแถว)
+        - annotate คะแนนรีวิวเฉลี่ยเมื่อ scoring strategy ต้องใช้
         """
-        # 1. หาช่างในหมวดเดียวกัน
-        # TODO: ในระบบจริงควรมีตาราง TechnicianCategory
-        # สำหรับ MVP ใช้ทุกช่าง
-        available_technicians = User.objects.filter(
+        candidates = User.objects.filter(
             role='technician',
             is_active=True
+        ).filter(
+            Q(presence__isnull=True) | Q(presence__is_available=True)
         )
 
-        if not available_technicians.exists():
-            return None, "ไม่พบช่างในระบบ"
+        if ticket is not None:
+            candidates = candidates.exclude(id__in=skills.matrix.ineligible_ids(ticket.category_id))
 
+        candidates = candidates.annotate(
+            presence_pk=F('presence__id'),
+            open_tickets=Coalesce('presence__open_tickets', 0)
+        ).filter(
+            open_tickets__lt=self.rule.max_open_tickets
+        )
+
+        if ticket is not None and ticket.location:
+            candidates = candidates.annotate(presence_location=F('presence__location'))
+
+        if get_strategy(self.rule).uses_rating:
+            # Subquery แทน Avg ผ่าน join เพื่อไม่ให้แถวช่างซ้ำตามจำนวนรีวิว
+            candidates = candidates.annotate(
+                avg_rating=Subquery(
+                    TicketFeedback.objects.filter(
+                        technician=OuterRef('pk')
+                    ).values('technician').annotate(
+                        avg=Avg('overall_rating')
+                    ).values('avg')[:1]
+                )
+            )
+
+        return candidates.order_by('id')
+
+    def load_candidates(self, ticket):
+        """
+        โหลดช่างที่เป็น candidate พร้อม distance_km (None ถ้าไม่ทราบ)
+
+        ถ้าดัชนีตำแหน่งช่าง (presence_index) พร้อมแล้ว จะใช้ระยะทางจากดัชนี
+        และ query เฉพาะช่าง k คนที่ใกล้ที่สุดที่มีทักษะตรงและงานยังไม่เต็ม (รวมช่างที่ไม่มีพิกัด)
+        ถ้ายังไม่พร้อม หรือช่าง k คนนั้นเต็มพอดีระหว่างทาง จะดึงพิกัดช่างทุกคน
+        แล้วคำนวณ haversine ทั้งชุดด้วย NumPy
+        """
+        if ticket.location and settings.PRESENCE_INDEX_ENABLED and presence_index.index.is_warm():
+            # ช่างที่งานเต็มต้องถูกตัดก่อนเลือก k คน - ไม่งั้นช่วงงานล้น k คนที่ใกล้สุดเต็มหมด
+            # แล้วไม่มี candidate ทั้งที่ช่างว่างอยู่ถัดออกไป
+            full_ids = np.array(TechnicianPresence.objects.filter(
+                open_tickets__gte=self.rule.max_open_tickets
+            ).values_list('technician_id', flat=True), dtype=np.int64)
+
+            def eligible(ids):
+                return skills.matrix.eligible(ids, ticket.category_id) & ~np.isin(ids, full_ids)
+
+            ids, distances_km = presence_index.index.nearest(
+                ticket.location.x,
+                ticket.location.y,
+                k=settings.DISPATCH_CANDIDATE_K,
+                radius_km=settings.DISPATCH_RADIUS_KM,
+                eligible=eligible
+            )
+            distance_by_id = dict(zip(ids.tolist(), distances_km.tolist()))
+
+            candidates = list(self.candidate_queryset(ticket).filter(
+                Q(id__in=distance_by_id.keys()) |
+                Q(presence__isnull=True) |
+                Q(presence__location__isnull=True)
+            ))
+            for tech in candidates:
+                tech.distance_km = distance_by_id.get(tech.id)
+            if not distance_by_id or any(tech.distance_km is not None for tech in candidates):
+                return candidates
+            # ช่างจากดัชนีถูกตัดหมดใน query (เช่นรับงานเต็มระหว่างนั้น) - ใช้ query เต็มแทน
+
+        candidates = list(self.candidate_queryset(ticket))
+        if not ticket.location:
+            for tech in candidates:
+                tech.distance_km = None
+            return candidates
+
+        tech_xy = np.array([
+            (t.presence_location.x, t.presence_location.y) if t.presence_location else (np.nan, np.nan)
+            for t in candidates
+        ], dtype=float).reshape(-1, 2)
+        distances_km = haversine_m(
+            ticket.location.x, ticket.location.y, tech_xy[:, 0], tech_xy[:, 1]
+        ) / 1000.0
+
+        for tech, distance_km in zip(candidates, distances_km.tolist()):
+            tech.distance_km = None if math.isnan(distance_km) else distance_km
+        return candidates
+
+    def rank_technicians(self, ticket):
+        """
+        คะแนนของช่างที่เป็น candidate เรียงจากดีที่สุด (เสมอกันเรียงตาม id)
+
+        Returns:
+            (list of (technician, score), reason) - reason ใช้เมื่อไม่มี candidate
+        """
+        # 1. หาช่างที่มีทักษะในหมวดของ Ticket (TechnicianCategory - ดู skills.py)
         # 2. กรองช่างที่พร้อมรับงาน (is_available) และงานไม่เกิน max_open_tickets
-        candidates = []
-        for tech in available_technicians:
-            # Check availability
-            try:
-                presence = TechnicianPresence.objects.get(technician=tech)
-                if not presence.is_available:
-                    continue  # Skip unavailable technicians
-            except TechnicianPresence.DoesNotExist:
-                # If no presence record, assume available
-                pass
-
-            open_tickets_count = Ticket.objects.filter(
-                assigned_to=tech
-            ).exclude(status__in=['COMPLETED', 'CLOSED', 'REJECTED']).count()
-
-            if open_tickets_count < self.rule.max_open_tickets:
-                candidates.append({
-                    'technician': tech,
-                    'open_tickets': open_tickets_count
-                })
+        candidates = self.load_candidates(ticket)
 
         if not candidates:
-            return None, f"ไม่พบช่างที่พร้อมรับงาน (งานเต็มหรือหยุดรับงานชั่วคราว)"
-
-        # 3. คำนวณ score สำหรับแต่ละช่าง
-        scored_candidates = []
-
-        for candidate in candidates:
-            tech = candidate['technician']
-            score = 0.0
-            distance_km = None
-
-            # Distance score
-            if ticket.location:
-                try:
-                    presence = TechnicianPresence.objects.get(technician=tech)
-                    if presence.location:
-                        # Calculate distance (in meters)
-                        distance = ticket.location.distance(presence.location) * 111000  # approx meters
-                        distance_km = distance / 1000
-
-                        # Distance score (inverse - closer is better)
-                        # Normalize: 0-1km = 1.0, 1-5km = 0.5, >5km = 0.1
-                        if distance_km <= 1:
-                            distance_score = 1.0
-                        elif distance_km <= 5:
-                            distance_score = 0.5
-                        else:
-                            distance_score = 0.1
-
-                        score += distance_score * self.rule.weight_distance
-                except TechnicianPresence.DoesNotExist:
-                    # ถ้าไม่มีข้อมูล location ให้ score กลางๆ
-                    score += 0.5 * self.rule.weight_distance
-
-            # Workload score (ยิ่งงานน้อยยิ่งดี)
-            workload_score = 1.0 - (candidate['open_tickets'] / self.rule.max_open_tickets)
-            score += workload_score * self.rule.weight_workload
-
-            scored_candidates.append({
-                'technician': tech,
-                'score': score,
-                'open_tickets': candidate['open_tickets'],
-                'distance_km': distance_km
-            })
+            if not User.objects.filter(role='technician', is_active=True).exists():
+                return [], "ไม่พบช่างในระบบ"
+            return [], f"ไม่พบช่างที่พร้อมรับงาน (งานเต็มหรือหยุดรับงานชั่วคราว)"
+
+        # 3. คำนวณ score ของช่างทุกคนพร้อมกัน (ดู scoring.py)
+        # ช่างที่ไม่ทราบตำแหน่งได้คะแนนระยะทางกลางๆ
+        distances_km = np.array([
+            np.nan if tech.distance_km is None else tech.distance_km
+            for tech in candidates
+        ], dtype=float)
+        open_tickets = np.array([tech.open_tickets for tech in candidates], dtype=float)
+        ratings = None
+        if get_strategy(self.rule).uses_rating:
+            ratings = np.array([
+                np.nan if getattr(tech, 'avg_rating', None) is None else tech.avg_rating
+                for tech in candidates
+            ], dtype=float)
+
+        scores = score_candidates(
+            self.rule,
+            distances_km,
+            open_tickets,
+            ratings=ratings,
+            ticket_located=bool(ticket.location)
+        )
+
+        order = np.argsort(-scores, kind='stable')
+        return [(candidates[i], float(scores[i])) for i in order], None
+
+    def describe(self, ticket, tech, score):
+        """ข้อความเหตุผลการมอบหมาย (บันทึกใน TicketStatusHistory)"""
+        distance_str = f"{tech.distance_km:.1f}km" if tech.distance_km and ticket.location else "N/A"
+        return (
+            f"มอบหมายให้ {tech.get_display_name()} "
+            f"(ระยะทาง: {distance_str}, "
+            f"งานเปิด: {tech.open_tickets}, "
+            f"คะแนน: {score:.2f})"
+        )
+
+    def find_best_technician(self, ticket):
+        """
+        หาช่างที่เหมาะสมที่สุดสำหรับ Ticket (ไม่จองช่องงาน - ดู dispatch)
+
+        Returns:
+            (technician, reason) or (None, reason)
+        """
+        ranked, reason = self.rank_technicians(ticket)
+        if not ranked:
+            return None, reason
 
         # 4. เลือกช่างที่ score สูงที่สุด
-        if scored_candidates:
-            best = max(scored_candidates, key=lambda x: x['score'])
-            tech = best['technician']
-            distance_str = f"{best['distance_km']:.1f}km" if best['distance_km'] else "N/A"
-
-            reason = (
-                f"มอบหมายให้ {tech.get_display_name()} "
-                f"(ระยะทาง: {distance_str}, "
-                f"งานเปิด: {best['open_tickets']}, "
-                f"คะแนน: {best['score']:.2f})"
-            )
+        tech, score = ranked[0]
+        return tech, self.describe(ticket, tech, score)
 
-            return tech, reason
+    def reserve(self, technician):
+        """
+        จองช่องงานของช่างก่อนมอบหมาย (ต้องเรียกภายใน transaction)
 
-        return None, "ไม่สามารถหาช่างที่เหมาะสมได้"
+        PostgreSQL ใช้ pg_try_advisory_xact_lock ต่อช่าง ซึ่งไม่รอ lock
+        จึงไม่เกิด deadlock ระหว่าง dispatcher ที่ไล่ลำดับช่างต่างกัน
+        lock ถูกปล่อยตอน transaction commit หลังบันทึก Ticket แล้ว
+        จากนั้นอ่านตัวนับงานเปิดใหม่ ซึ่งรวมงานที่ dispatcher ก่อนหน้า commit ไปแล้ว
+
+        Returns:
+            True = จองได้, False = งานเต็มแล้ว, None = dispatcher อื่นกำลังจองช่างคนนี้
+        """
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT pg_try_advisory_xact_lock(%s, %s)',
+                    [CAPACITY_LOCK_NAMESPACE, technician.pk]
+                )
+                if not cursor.fetchone()[0]:
+                    return None
+        else:
+            # ฐานข้อมูลอื่น (เช่น SQLite ตอน dev) ใช้ row lock ของช่างแทน
+            list(User.objects.select_for_update().filter(pk=technician.pk).values_list('pk', flat=True))
+
+        technician.open_tickets = TechnicianPresence.objects.filter(
+            technician=technician
+        ).values_list('open_tickets', flat=True).first() or 0
+        return technician.open_tickets < self.rule.max_open_tickets
+
+    def reserve_best_technician(self, ticket):
+        """
+        ไล่จองช่างตามลำดับคะแนน ถ้าคนแรกงานเต็มหรือถูกจองอยู่ให้ลองคนถัดไป
+        ถ้าทุกคนที่เหลือถูกจองอยู่ ให้รอสั้นๆ แล้วจัดอันดับใหม่ (สูงสุด RESERVE_ROUNDS รอบ)
+
+        ต้องเรียกภายใน transaction ที่จะบันทึกการมอบหมาย
+
+        Returns:
+            (technician, reason) or (None, reason)
+
+        Raises:
+            CapacityContention: ถ้ายังจองไม่ได้เพราะ lock ถูกถือไว้ครบทุกรอบ
+        """
+        for round_no in range(RESERVE_ROUNDS):
+            ranked, reason = self.rank_technicians(ticket)
+            if not ranked:
+                return None, reason
+
+            contended = False
+            for tech, score in ranked:
+                reserved = self.reserve(tech)
+                if reserved:
+                    return tech, self.describe(ticket, tech, score)
+                if reserved is None:
+                    contended = True
+
+            if not contended:
+                return None, f"ไม่พบช่างที่พร้อมรับงาน (งานเต็มหรือหยุดรับงานชั่วคราว)"
+
+            time.sleep(RESERVE_BACKOFF_SECONDS * (round_no + 1))
+
+        raise CapacityContention(f"Could not reserve a technician for Ticket #{ticket.id}")
 
     def dispatch(self, ticket):
         """
@@ -190,7 +315,7 @@ class AutoDispatcher:
 
         Process:
         1. Calculate priority score
-        2. Find best technician
+        2. Find and reserve best technician (ดู reserve)
         3. Assign ticket
         4. Create status history
 
@@ -198,27 +323,30 @@ class AutoDispatcher:
             bool: True if assigned successfully
         """
         # Calculate priority score
-        ticket.priority_score = self.calculate_priority_score(ticket)
-
-        # Find best technician
-        technician, reason = self.find_best_technician(ticket)
+        ticket.base_priority_score = self.calculate_priority_score(ticket)
+        ticket.priority_score = priority_queue.score_for(ticket.base_priority_score, ticket.created_at)
+
+        with transaction.atomic():
+            # Find and reserve best technician (lock ถือไว้จน transaction ชั้นนอกสุด commit)
+            technician, reason = self.reserve_best_technician(ticket)
+
+            if technician:
+                # Assign ticket
+                old_status = ticket.status
+                ticket.assigned_to = technician
+                ticket.status = 'PENDING'  # Keep as PENDING until technician accepts
+                ticket.save()
+
+                # Create status history
+                TicketStatusHistory.objects.create(
+                    ticket=ticket,
+                    old_status=old_status,
+                    new_status=ticket.status,
+                    changed_by=None,  # System auto-assign
+                    comment=f"[Auto Dispatcher] {reason}"
+                )
 
         if technician:
-            # Assign ticket
-            old_status = ticket.status
-            ticket.assigned_to = technician
-            ticket.status = 'PENDING'  # Keep as PENDING until technician accepts
-            ticket.save()
-
-            # Create status history
-            TicketStatusHistory.objects.create(
-                ticket=ticket,
-                old_status=old_status,
-                new_status=ticket.status,
-                changed_by=None,  # System auto-assign
-                comment=f"[Auto Dispatcher] {reason}"
-            )
-
             logger.info(f"Ticket #{ticket.id} dispatched to {technician.username}: {reason}")
 
             # Send notification to technician
@@ -240,6 +368,143 @@ class AutoDispatcher:
             logger.warning(f"Ticket #{ticket.id} could not be assigned: {reason}")
             return False
 
+    def lock_technicians(self, technician_ids):
+        """
+        ถือ lock ของช่างหลายคนจนจบ transaction (ใช้กับ Batch Dispatcher)
+
+        รอ lock ตามลำดับ id เสมอ จึงไม่ deadlock กันเองระหว่าง batch
+        และไม่ deadlock กับ reserve ซึ่งใช้ try-lock ที่ไม่รอ
+        """
+        technician_ids = sorted(technician_ids)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT pg_advisory_xact_lock(%s, id) FROM unnest(%s::integer[]) AS id',
+                    [CAPACITY_LOCK_NAMESPACE, technician_ids]
+                )
+        else:
+            list(User.objects.select_for_update().filter(pk__in=technician_ids).values_list('pk', flat=True))
+
+    def dispatch_batch(self, tickets):
+        """
+        มอบหมาย Ticket หลายใบพร้อมกันแบบ global optimum (ดู batch_dispatch.py)
+
+        ใช้กับ Ticket ค้างจำนวนมาก เช่นหลังไฟดับหรือช่วงเช้า แทนการ dispatch ทีละใบ
+        ซึ่งทำให้ช่างที่อยู่ใกล้ที่สุดรับงานเต็มก่อนเสมอ
+
+        Args:
+            tickets: Ticket ที่ยังไม่มีช่าง
+
+        Returns:
+            list of Ticket ที่มอบหมายได้
+        """
+        tickets = list(tickets)
+        if not tickets:
+            return []
+
+        now = timezone.now()
+        for ticket in tickets:
+            if not ticket.base_priority_score:
+                ticket.base_priority_score = self.calculate_priority_score(ticket)
+            ticket.priority_score = priority_queue.score_for(ticket.base_priority_score, ticket.created_at, now)
+
+        # ถ้าช่องงานว่างไม่พอ ให้ Ticket ที่ priority สูงกว่าได้ก่อน
+        tickets.sort(key=lambda t: (-t.priority_score, t.created_at))
+
+        with transaction.atomic():
+            # lock ช่างทุกคนก่อนนับงานเปิด ไม่ให้ dispatch ทีละใบที่ทำพร้อมกันจองซ้อน
+            self.lock_technicians(
+                User.objects.filter(role='technician', is_active=True).values_list('id', flat=True)
+            )
+
+            technicians = list(
+                self.candidate_queryset().annotate(presence_location=F('presence__location'))
+            )
+
+            ticket_xy = np.array([
+                (t.location.x, t.location.y) if t.location else (np.nan, np.nan)
+                for t in tickets
+            ], dtype=float).reshape(-1, 2)
+            tech_xy = np.array([
+                (t.presence_location.x, t.presence_location.y) if t.presence_location else (np.nan, np.nan)
+                for t in technicians
+            ], dtype=float).reshape(-1, 2)
+            tech_open = np.array([t.open_tickets for t in technicians], dtype=int)
+            ratings = None
+            if get_strategy(self.rule).uses_rating:
+                ratings = np.array([
+                    np.nan if t.avg_rating is None else t.avg_rating
+                    for t in technicians
+                ], dtype=float)
+
+            # ticket × ช่าง: ช่างมีทักษะตรงหมวดของ Ticket หรือไม่ (คำนวณครั้งเดียวต่อหมวด)
+            tech_ids = np.array([t.id for t in technicians], dtype=np.int64)
+            by_category = {
+                category_id: skills.matrix.eligible(tech_ids, category_id)
+                for category_id in {t.category_id for t in tickets}
+            }
+            eligible = np.array(
+                [by_category[t.category_id] for t in tickets], dtype=bool
+            ).reshape(len(tickets), len(technicians))
+
+            assignments = solve_batch(
+                ticket_xy, tech_xy, tech_open, self.rule, ratings=ratings, eligible=eligible
+            )
+
+            assigned = []
+            history = []
+
+            changes = []
+            rollup_changes = []
+            for ticket_idx, tech_idx, score, distance_km in assignments:
+                ticket = tickets[ticket_idx]
+                tech = technicians[tech_idx]
+                old_state = state_before_save(ticket)
+                old_key = rollups.key_before_save(ticket)
+
+                tech.distance_km = None if math.isnan(distance_km) else distance_km
+                reason = self.describe(ticket, tech, score)
+
+                history.append(TicketStatusHistory(
+                    ticket=ticket,
+                    old_status=ticket.status,
+                    new_status='PENDING',
+                    changed_by=None,  # System auto-assign
+                    comment=f"[Batch Dispatcher] {reason}"
+                ))
+
+                ticket.assigned_to = tech
+                ticket.status = 'PENDING'  # Keep as PENDING until technician accepts
+                assigned.append(ticket)
+
+                ticket._counted_state = (tech.id, ticket.status)
+                changes.append((old_state, ticket._counted_state))
+                ticket._rollup_key = rollups.key_of(ticket)
+                rollup_changes.append((old_key, ticket._rollup_key))
+
+            # bulk_update ไม่อัปเดต auto_now ให้เอง
+            for ticket in tickets:
+                ticket.updated_at = now
+
+            Ticket.objects.bulk_update(
+                tickets,
+                ['assigned_to', 'status', 'base_priority_score', 'priority_score', 'updated_at'],
+                batch_size=1000
+            )
+            # bulk_update/bulk_create ไม่ผ่าน Ticket.save และ signal - ปรับตัวนับและตารางสรุปเอง
+            apply_changes(changes)
+            rollups.apply_changes(rollup_changes)
+            list_entries.refresh([ticket.id for ticket in assigned])
+            TicketStatusHistory.objects.bulk_create(history, batch_size=1000)
+            rollups.record_transitions(history)
+            data_cache.bump_on_commit()
+            map_deltas.tickets_changed(assigned)
+            notify_tickets_assigned(assigned)
+
+        logger.info(f"Batch dispatch assigned {len(assigned)}/{len(tickets)} tickets")
+
+        return assigned
+
 
 def auto_dispatch_ticket(ticket):
     """
@@ -0,0 +1,139 @@
+"""
+Heat Grid
+นับความถี่ปัญหาในพื้นที่ (heat count) จากตารางกริดที่อัปเดตทีละ Ticket
+แทนการ count() รัศมี 500 ม. ย้อนหลัง 30 วันทุกครั้งที่สร้าง Ticket
+
+- แบ่งพื้นที่เป็นช่องขนาดคงที่ HEAT_GRID_CELL_M เมตร (equirectangular
+  projection ที่ละติจูดอ้างอิง HEAT_GRID_REF_LAT) และแยกตามวันที่สร้าง
+- สร้าง/ลบ Ticket -> เพิ่ม/ลดช่องเดียวด้วย F()
+- heat count = ผลรวมของช่องที่จุดศูนย์กลางอยู่ในรัศมี (query เดียว)
+- expire_heat_grid ลบวันที่เลยช่วงเวลา, rebuild_heat_grid สร้างใหม่จาก tickets
+"""
+
+import math
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+from .models import HeatCell, Ticket
+
+METERS_PER_DEGREE = 111320.0
+
+
+def _cell_size():
+    return float(settings.HEAT_GRID_CELL_M)
+
+
+def cell_of(lon, lat):
+    """คืน (cell_x, cell_y) ของพิกัด"""
+    size = _cell_size()
+    x = lon * METERS_PER_DEGREE * math.cos(math.radians(settings.HEAT_GRID_REF_LAT))
+    y = lat * METERS_PER_DEGREE
+    return math.floor(x / size), math.floor(y / size)
+
+
+def day_of(created_at):
+    """day bucket ตามเวลาท้องถิ่น"""
+    return timezone.localdate(created_at)
+
+
+def neighbourhood_filter(lon, lat, radius_m):
+    """
+    Q สำหรับช่องกริดที่จุดศูนย์กลางอยู่ในรัศมี radius_m จากพิกัด
+
+    แต่ละแถว cell_y ได้ช่วง cell_x หนึ่งช่วง จึงเป็น OR ของ range ไม่กี่ตัว
+    """
+    size = _cell_size()
+    cx, cy = cell_of(lon, lat)
+    reach = math.ceil(radius_m / size)
+
+    condition = Q()
+    for dy in range(-reach, reach + 1):
+        # ครึ่งความกว้างของแถวนี้ภายในวงกลม (หน่วยช่อง)
+        remaining = (radius_m / size) ** 2 - dy ** 2
+        if remaining < 0:
+            continue
+        dx = math.floor(math.sqrt(remaining))
+        condition |= Q(cell_y=cy + dy, cell_x__gte=cx - dx, cell_x__lte=cx + dx)
+
+    return condition
+
+
+def nearby_count(point, radius_m=500, days=None):
+    """
+    จำนวน Ticket ในรัศมี radius_m ย้อนหลัง days วัน (ประมาณจากกริด)
+
+    Args:
+        point: GEOS Point (SRID 4326)
+    """
+    days = days or settings.HEAT_GRID_WINDOW_DAYS
+    since = timezone.localdate() - timedelta(days=days)
+
+    # days ช่องวันล่าสุด (รวมวันนี้) - day__gte จะนับ days + 1 วัน
+    total = HeatCell.objects.filter(
+        neighbourhood_filter(point.x, point.y, radius_m),
+        day__gt=since
+    ).aggregate(total=Sum('count'))['total']
+
+    return total or 0
+
+
+def _increment(cell_x, cell_y, day, delta):
+    """เพิ่ม/ลด count ของช่องเดียว (ปลอดภัยเมื่อหลาย process เขียนพร้อมกัน)"""
+    cell = HeatCell.objects.filter(cell_x=cell_x, cell_y=cell_y, day=day)
+    if cell.update(count=F('count') + delta) or delta < 0:
+        return
+
+    try:
+        with transaction.atomic():
+            HeatCell.objects.create(cell_x=cell_x, cell_y=cell_y, day=day, count=delta)
+    except IntegrityError:
+        # process อื่นสร้างช่องนี้ไปก่อนแล้ว
+        cell.update(count=F('count') + delta)
+
+
+def record_ticket(ticket, delta=1):
+    """บันทึก Ticket ลงกริด (delta=-1 เมื่อลบ Ticket)"""
+    if not ticket.location or not ticket.created_at:
+        return
+    cell_x, cell_y = cell_of(ticket.location.x, ticket.location.y)
+    _increment(cell_x, cell_y, day_of(ticket.created_at), delta)
+
+
+def expire(days=None):
+    """ลบช่องที่เก่ากว่าช่วงเวลาที่ใช้คำนวณ (sliding window)"""
+    days = days or settings.HEAT_GRID_WINDOW_DAYS
+    cutoff = timezone.localdate() - timedelta(days=days)
+    deleted, _ = HeatCell.objects.filter(day__lt=cutoff).delete()
+    return deleted
+
+
+def rebuild(days=None, chunk_size=5000):
+    """
+    สร้างกริดใหม่ทั้งหมดจาก tickets ในช่วงเวลา
+
+    Returns:
+        จำนวนช่องที่สร้าง
+    """
+    days = days or settings.HEAT_GRID_WINDOW_DAYS
+    since = timezone.now() - timedelta(days=days + 1)
+
+    counts = Counter()
+    rows = Ticket.objects.filter(
+        location__isnull=False,
+        created_at__gte=since
+    ).values_list('location', 'created_at')
+
+    for location, created_at in rows.iterator(chunk_size=chunk_size):
+        counts[(*cell_of(location.x, location.y), day_of(created_at))] += 1
+
+    with transaction.atomic():
+        HeatCell.objects.all().delete()
+        HeatCell.objects.bulk_create([
+            HeatCell(cell_x=x, cell_y=y, day=day, count=count)
+            for (x, y, day), count in counts.items()
+        ], batch_size=chunk_size)
+
+    return len(counts)
@@ -0,0 +1,163 @@
+"""
+Ticket List Entries
+ตาราง TicketListEntry: ข้อมูลที่หน้ารายการ (my_tickets, job_list, Ticket ล่าสุด) และจุดบนแผนที่ใช้
+คัดลอกไว้แถวเดียวต่อ Ticket - อ่านโดยไม่ join categories/users/รูป และไม่ต้องแปลง label ทีละแถว
+
+- ป้ายสถานะ/ความเร่งด่วน, ชื่อและสีหมวด, ชื่อผู้แจ้ง/ช่าง (get_display_name), รูปย่อ, พิกัด,
+  search_vector และ overdue_at (เวลาที่จะเกินกำหนดตามกฎของ Ticket.is_overdue)
+- Ticket.save / รูปก่อน-หลัง / ไฟล์แนบ -> refresh() แถวของ Ticket นั้นใน transaction เดียวกัน
+- ผู้ใช้เปลี่ยนชื่อ / หมวดเปลี่ยนชื่อหรือสี -> UPDATE แถวที่อ้างถึง (signals.py)
+- bulk_update ที่ไม่ผ่าน Ticket.save (Batch Dispatcher, search.backfill) เรียก refresh() เอง
+- rebuild() สร้างใหม่ทั้งตารางทีละช่วง id (manage.py rebuild_list_entries)
+"""
+
+from datetime import timedelta
+from django.db import transaction
+from .models import Attachment, BeforeAfterPhoto, Ticket, TicketListEntry
+
+# เกินกำหนดหลังแจ้ง (ตรงกับ Ticket.is_overdue)
+OVERDUE_AFTER = {
+    'PENDING': timedelta(hours=24),
+    'IN_PROGRESS': timedelta(hours=72),
+    'INSPECTING': timedelta(hours=72),
+    'WORKING': timedelta(hours=72),
+}
+
+STATUS_LABELS = dict(Ticket.STATUS_CHOICES)
+URGENCY_LABELS = dict(Ticket.URGENCY_CHOICES)
+
+# ฟิลด์ที่เขียนทับเมื่อแถวมีอยู่แล้ว
+UPDATE_FIELDS = [
+    'title', 'status', 'status_label', 'urgency_level', 'urgency_label',
+    'category', 'category_name', 'category_color',
+    'created_by', 'created_by_name', 'assigned_to', 'assigned_to_name',
+    'thumbnail', 'location', 'created_at', 'overdue_at', 'search_vector',
+]
+
+
+def display_name(user):
+    """ชื่อที่แสดงของผู้ใช้ (User.get_display_name - ตรงกับส่วนอื่นของหน้าเว็บ)"""
+    return user.get_display_name() if user is not None else ''
+
+
+def overdue_at(status, created_at):
+    after = OVERDUE_AFTER.get(status)
+    return created_at + after if after else None
+
+
+def thumbnails(ticket_ids):
+    """
+    ชื่อไฟล์รูปย่อของแต่ละ Ticket: รูปก่อนทำรูปแรก ไม่มี -> ไฟล์แนบล่าสุด (เหมือนรูปใน popup แผนที่)
+
+    Returns:
+        dict ticket_id -> ชื่อไฟล์
+    """
+    result = {}
+    photos = BeforeAfterPhoto.objects.filter(ticket_id__in=ticket_ids, photo_type='BEFORE').order_by(
+        'ticket_id', 'uploaded_at', 'id'
+    ).values_list('ticket_id', 'image')
+    for ticket_id, image in photos:
+        result.setdefault(ticket_id, image)
+
+    missing = [ticket_id for ticket_id in ticket_ids if ticket_id not in result]
+    if missing:
+        attachments = Attachment.objects.filter(ticket_id__in=missing).order_by(
+            'ticket_id', '-uploaded_at', '-id'
+        ).values_list('ticket_id', 'file')
+        for ticket_id, file in attachments:
+            result.setdefault(ticket_id, file)
+    return result
+
+
+def entry_of(ticket, thumbnail=''):
+    """TicketListEntry ของ Ticket (ต้อง select_related category, created_by, assigned_to)"""
+    return TicketListEntry(
+        ticket_id=ticket.id,
+        title=ticket.title,
+        status=ticket.status,
+        status_label=STATUS_LABELS.get(ticket.status, ticket.status),
+        urgency_level=ticket.urgency_level,
+        urgency_label=URGENCY_LABELS.get(ticket.urgency_level, ticket.urgency_level),
+        category_id=ticket.category_id,
+        category_name=ticket.category.name,
+        category_color=ticket.category.color,
+        created_by_id=ticket.created_by_id,
+        created_by_name=display_name(ticket.created_by),
+        assigned_to_id=ticket.assigned_to_id,
+        assigned_to_name=display_name(ticket.assigned_to),
+        thumbnail=thumbnail or '',
+        location=ticket.location,
+        created_at=ticket.created_at,
+        overdue_at=overdue_at(ticket.status, ticket.created_at),
+        search_vector=ticket.search_vector,
+    )
+
+
+def refresh(ticket_ids):
+    """
+    เขียนแถวของ Ticket เหล่านี้ใหม่จากตารางจริง (ลบแถวของ Ticket ที่ไม่มีแล้ว)
+
+    อ่าน Ticket ใหม่จากฐานข้อมูล - search_vector ที่ save ตั้งเป็น expression ได้ค่าจริง
+    """
+    ticket_ids = sorted({ticket_id for ticket_id in ticket_ids if ticket_id is not None})
+    if not ticket_ids:
+        return 0
+
+    tickets = list(
+        Ticket.objects.filter(id__in=ticket_ids).select_related('category', 'created_by', 'assigned_to')
+    )
+    files = thumbnails(ticket_ids)
+    entries = [entry_of(ticket, files.get(ticket.id)) for ticket in tickets]
+
+    with transaction.atomic():
+        TicketListEntry.objects.bulk_create(
+            entries, update_conflicts=True, unique_fields=['ticket'], update_fields=UPDATE_FIELDS
+        )
+        found = {ticket.id for ticket in tickets}
+        gone = [ticket_id for ticket_id in ticket_ids if ticket_id not in found]
+        if gone:
+            TicketListEntry.objects.filter(ticket_id__in=gone).delete()
+    return len(entries)
+
+
+def ticket_saved(ticket):
+    """เรียกจาก Ticket.save (ใน transaction เดียวกัน)"""
+    refresh([ticket.pk])
+
+
+def user_renamed(user):
+    """ชื่อที่แสดงของผู้ใช้เปลี่ยน -> แก้ทุกแถวที่ผู้ใช้เป็นผู้แจ้งหรือช่าง"""
+    name = display_name(user)
+    TicketListEntry.objects.filter(created_by_id=user.pk).exclude(created_by_name=name).update(created_by_name=name)
+    TicketListEntry.objects.filter(assigned_to_id=user.pk).exclude(assigned_to_name=name).update(assigned_to_name=name)
+
+
+def category_changed(category):
+    TicketListEntry.objects.filter(category_id=category.pk).exclude(
+        category_name=category.name, category_color=category.color
+    ).update(category_name=category.name, category_color=category.color)
+
+
+def rebuild(chunk_size=2000, progress=None):
+    """
+    สร้างตารางใหม่ทั้งหมดทีละ chunk_size Ticket (เรียงตาม id) แล้วลบแถวของ Ticket ที่ไม่มีแล้ว
+
+    Args:
+        progress: callable(จำนวนที่ทำแล้ว, id ล่าสุด) สำหรับแสดงความคืบหน้า
+
+    Returns:
+        จำนวนแถวที่เขียน
+    """
+    last_id = 0
+    written = 0
+    while True:
+        ids = list(Ticket.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        written += refresh(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(written, last_id)
+
+    TicketListEntry.objects.exclude(ticket_id__in=Ticket.objects.values('id')).delete()
+    return written
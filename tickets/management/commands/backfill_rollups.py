@@ -0,0 +1,26 @@
+"""
+Management command to rebuild the daily ticket rollups
+Usage: python manage.py backfill_rollups [--chunk-size 50000]
+"""
+
+from django.core.management.base import BaseCommand
+from tickets import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily ticket rollup tables from tickets and TicketStatusHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50000,
+            help='Rows per grouped query (default: 50000)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding ticket rollups...')
+        result = rollups.backfill(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Rebuilt {result['stats']} daily stat row(s) and {result['transitions']} transition row(s)"
+        ))
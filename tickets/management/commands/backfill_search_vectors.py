@@ -0,0 +1,40 @@
+"""
+Management command to (re)build Ticket.search_vector in chunks
+Usage: python manage.py backfill_search_vectors [--chunk-size 2000] [--missing-only]
+
+รันหลังติดตั้ง/ถอด pythainlp หรือเปลี่ยน SEARCH_CONFIG (วิธีตัดคำต้องตรงกับตอนค้นหา)
+"""
+
+from django.core.management.base import BaseCommand
+from tickets import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search vector of every ticket (Thai text is pre-segmented)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Tickets per UPDATE (default: 2000)'
+        )
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only tickets without a search vector'
+        )
+
+    def handle(self, *args, **options):
+        segmenter = 'pythainlp' if search.word_tokenize else 'bigrams (pythainlp not installed)'
+        self.stdout.write(f'Building search vectors, Thai segmentation: {segmenter}')
+
+        def progress(done, last_id):
+            self.stdout.write(f'  {done} ticket(s), last id {last_id}')
+
+        updated = search.backfill(
+            chunk_size=options['chunk_size'],
+            missing_only=options['missing_only'],
+            progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ Updated {updated} ticket(s)'))
@@ -0,0 +1,33 @@
+"""
+Management command to run performance benchmarks on synthetic data
+Usage: python manage.py benchmark <target> [--option KEY=VALUE ...] [--seed 42]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from tickets.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = 'Run a performance benchmark (targets: %s)' % ', '.join(sorted(BENCHMARKS))
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=sorted(BENCHMARKS))
+        parser.add_argument(
+            '--option',
+            action='append',
+            default=[],
+            metavar='KEY=VALUE',
+            help='Override a benchmark parameter, e.g. --option tickets=2000'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        params = {'seed': options['seed']}
+        for item in options['option']:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Invalid --option {item!r}, expected KEY=VALUE')
+            params[key] = int(value) if value.lstrip('-').isdigit() else value
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Benchmark: {options["target"]}'))
+        BENCHMARKS[options['target']](self.stdout, **params)
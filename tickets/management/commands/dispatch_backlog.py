@@ -0,0 +1,68 @@
+"""
+Management command to assign the PENDING backlog in one optimal batch
+Usage: python manage.py dispatch_backlog [--limit 500] [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tickets.dispatcher import AutoDispatcher
+from tickets import priority_queue
+import time
+
+
+class Command(BaseCommand):
+    help = 'Assign all unassigned PENDING tickets with the batch (min-cost) dispatcher'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Maximum number of tickets to include in the batch'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compute the assignment but roll back instead of saving'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            # lock backlog ไว้ - dispatch worker ที่รันอยู่จะข้าม Ticket เหล่านี้
+            # อ่านจากหัวคิว priority (partial index ของ PENDING)
+            backlog = priority_queue.queued().select_for_update(
+                skip_locked=True,
+                of=('self',)
+            ).filter(
+                assigned_to__isnull=True
+            ).select_related('category')
+
+            if options['limit']:
+                backlog = backlog[:options['limit']]
+
+            tickets = list(backlog)
+            if not tickets:
+                self.stdout.write('No unassigned PENDING tickets.')
+                return
+
+            self.stdout.write(f'Dispatching {len(tickets)} ticket(s)...')
+            assigned = AutoDispatcher().dispatch_batch(tickets)
+
+            per_tech = {}
+            for ticket in assigned:
+                name = ticket.assigned_to.get_display_name()
+                per_tech[name] = per_tech.get(name, 0) + 1
+
+            for name, count in sorted(per_tech.items(), key=lambda x: -x[1]):
+                self.stdout.write(f'  {name}: {count}')
+
+            if options['dry_run']:
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.WARNING('Dry run - changes rolled back'))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Assigned {len(assigned)}/{len(tickets)} ticket(s) in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,18 @@
+"""
+Management command to age old day buckets out of the heat grid
+Usage: python manage.py expire_heat_grid   (run daily, e.g. from cron)
+"""
+
+from django.core.management.base import BaseCommand
+from tickets import heat_grid
+
+
+class Command(BaseCommand):
+    help = 'Delete heat grid cells older than the sliding window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Window to keep (default: HEAT_GRID_WINDOW_DAYS)')
+
+    def handle(self, *args, **options):
+        deleted = heat_grid.expire(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Expired {deleted} heat cell(s)'))
@@ -0,0 +1,19 @@
+"""
+Management command to rebuild the heat grid from tickets
+Usage: python manage.py rebuild_heat_grid [--days 30]
+"""
+
+from django.core.management.base import BaseCommand
+from tickets import heat_grid
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the heat grid used for priority scoring from the tickets table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Window to rebuild (default: HEAT_GRID_WINDOW_DAYS)')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding heat grid...')
+        cells = heat_grid.rebuild(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {cells} heat cell(s)'))
@@ -0,0 +1,28 @@
+"""
+Management command to rebuild the ticket list read model (TicketListEntry) in chunks
+Usage: python manage.py rebuild_list_entries [--chunk-size 2000]
+
+รันเมื่อแก้ Ticket นอก Ticket.save (queryset.update(), SQL ตรง) หรือหลังเปลี่ยนวิธีคำนวณแถวใน list_entries.py
+"""
+
+from django.core.management.base import BaseCommand
+from tickets import list_entries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized ticket list rows read by my_tickets, job_list and the map'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Tickets per batch (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        def progress(done, last_id):
+            self.stdout.write(f'  {done} ticket(s), last id {last_id}')
+
+        written = list_entries.rebuild(chunk_size=options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {written} list row(s)'))
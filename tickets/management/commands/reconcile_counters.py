@@ -0,0 +1,35 @@
+"""
+Management command to repair technician ticket counters
+Usage: python manage.py reconcile_counters [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+from tickets import counters
+
+
+class Command(BaseCommand):
+    help = 'Compare TechnicianPresence ticket counters with the tickets table and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing the corrected counters'
+        )
+
+    def handle(self, *args, **options):
+        result = counters.reconcile(dry_run=options['dry_run'])
+
+        self.stdout.write(
+            f"Checked {result['checked']} technician(s), "
+            f"{result['drifted']} with drift ({result['created']} missing presence row(s))"
+        )
+        for field, amount in sorted(result['drift'].items()):
+            self.stdout.write(f'  {field}: {amount}')
+
+        if not result['drifted']:
+            self.stdout.write(self.style.SUCCESS('✓ Counters are consistent'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run - counters not changed'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✓ Fixed {result['drifted']} technician(s)"))
@@ -0,0 +1,34 @@
+"""
+Management command to repair the daily ticket rollups
+Usage: python manage.py reconcile_rollups [--dry-run]   (run nightly, e.g. from cron)
+"""
+
+from django.core.management.base import BaseCommand
+from tickets import rollups
+
+
+class Command(BaseCommand):
+    help = 'Compare the daily ticket rollups with tickets and TicketStatusHistory and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing the corrected rollups'
+        )
+        parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per grouped query (default: 50000)')
+
+    def handle(self, *args, **options):
+        result = rollups.reconcile(dry_run=options['dry_run'], chunk_size=options['chunk_size'])
+
+        drifted = 0
+        for table, r in result.items():
+            self.stdout.write(f"{table}: checked {r['checked']} row(s), {r['drifted']} with drift (total {r['drift']})")
+            drifted += r['drifted']
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('✓ Rollups are consistent'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run - rollups not changed'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ Fixed {drifted} rollup row(s)'))
@@ -0,0 +1,23 @@
+"""
+Management command to re-score the PENDING priority queue with aging
+Usage: python manage.py rescore_pending
+
+run_dispatcher รันงานนี้เองทุก PRIORITY_RESCORE_INTERVAL วินาที
+ใช้ command นี้เมื่อไม่ได้รัน worker หรือหลังปรับ PRIORITY_AGING_*
+"""
+
+from django.core.management.base import BaseCommand
+from tickets import priority_queue
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recompute priority_score (base + aging) for every PENDING ticket and save the ones that changed'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        checked, changed = priority_queue.rescore()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Re-scored {checked} queued ticket(s), {changed} changed in {elapsed:.2f}s'
+        ))
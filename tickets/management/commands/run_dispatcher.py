@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from tickets.dispatch_queue import process_next_job
+from tickets import presence_index, priority_queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run Auto Dispatcher worker (processes the dispatch queue)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker threads in this process (default: 1)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty (default: 1.0)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue once and exit'
+        )
+        parser.add_argument(
+            '--rescore-interval',
+            type=int,
+            default=settings.PRIORITY_RESCORE_INTERVAL,
+            help='Seconds between priority aging re-scores, 0 to disable (default: PRIORITY_RESCORE_INTERVAL)'
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        self.poll_interval = options['poll_interval']
+        self.once = options['once']
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self.lock = threading.Lock()
+
+        self.stdout.write(f'Starting dispatcher with {workers} worker(s)...')
+        if not presence_index.can_stay_coherent():
+            # web process มอบหมายเองใน request (dispatch_queue.runs_async) - worker แค่เก็บงานค้าง
+            self.stdout.write(self.style.WARNING(
+                'Channel layer is process-local (REDIS_URL not set): results cannot reach web clients, '
+                'new tickets are dispatched inline by the web process'
+            ))
+
+        # ดัชนีตำแหน่งช่างต้องได้รับ update จาก web process ผ่าน channel layer
+        if settings.PRESENCE_INDEX_ENABLED and presence_index.can_stay_coherent():
+            presence_index.index.warm()
+            self.stdout.write(f'Technician position index: {len(presence_index.index.ids)} technician(s)')
+        else:
+            self.stdout.write('Technician position index disabled (using database distance query)')
+
+        threads = [
+            threading.Thread(target=self.worker_loop, name=f'dispatcher-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        if options['rescore_interval'] > 0 and not self.once:
+            threads.append(threading.Thread(
+                target=self.rescore_loop,
+                args=(options['rescore_interval'],),
+                name='priority-rescore',
+                daemon=True
+            ))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping dispatcher...')
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Processed {self.processed} dispatch job(s)'))
+
+    def worker_loop(self):
+        """Claim and process jobs until stopped (each thread has its own DB connection)"""
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                job = process_next_job()
+
+                if job is None:
+                    if self.once:
+                        break
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+
+                with self.lock:
+                    self.processed += 1
+                self.stdout.write(
+                    f'[{threading.current_thread().name}] '
+                    f'Ticket #{job.ticket_id}: {job.get_status_display()}'
+                )
+        finally:
+            close_old_connections()
+
+    def rescore_loop(self, interval):
+        """Re-score the PENDING queue periodically so old tickets rise with age"""
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    checked, changed = priority_queue.rescore()
+                    self.stdout.write(f'[priority-rescore] {changed}/{checked} queued ticket(s) re-scored')
+                except Exception:
+                    logger.exception('Priority re-score failed')
+                self.stop_event.wait(interval)
+        finally:
+            close_old_connections()
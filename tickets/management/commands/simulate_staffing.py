@@ -0,0 +1,155 @@
+"""
+Management command to simulate technician staffing levels on synthetic ticket streams
+Usage:
+    python manage.py simulate_staffing --fit-since 2025-06-01 --technicians 10,15,20
+    python manage.py simulate_staffing --fit-since 2025-06-01 --scale 1.8 --shifts 07-15,15-23
+    python manage.py simulate_staffing --rate ไฟฟ้า:HIGH=4 --rate ประปา:MEDIUM=6 --service-hours ไฟฟ้า=3
+
+อ่านฐานข้อมูลเฉพาะตอนปรับอัตราจากประวัติ (--fit-since) - ไม่มีการมอบหมายงานจริง
+"""
+
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from tickets import priority_queue, simulator
+from tickets.models import AssignmentRule
+import numpy as np
+import time
+
+
+def parse_date(value):
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}" (use YYYY-MM-DD)')
+
+
+def parse_rates(items):
+    """['ไฟฟ้า:HIGH=4', ...] -> {('ไฟฟ้า', 'HIGH'): 4.0}"""
+    rates = {}
+    for item in items:
+        key, sep, value = item.rpartition('=')
+        name, _, urgency = key.rpartition(':')
+        if not sep or not name or urgency not in simulator.URGENCY_LEVELS:
+            raise CommandError(
+                f'Invalid --rate {item!r}, expected CATEGORY:URGENCY=PER_DAY '
+                f'(urgency: {", ".join(simulator.URGENCY_LEVELS)})'
+            )
+        rates[(name, urgency)] = float(value)
+    return rates
+
+
+def parse_service_hours(items):
+    """['ไฟฟ้า=3', ...] -> {'ไฟฟ้า': 3.0}"""
+    hours = {}
+    for item in items:
+        name, sep, value = item.rpartition('=')
+        if not sep or not name:
+            raise CommandError(f'Invalid --service-hours {item!r}, expected CATEGORY=HOURS')
+        hours[name] = float(value)
+    return hours
+
+
+class Command(BaseCommand):
+    help = 'Simulate queue length, SLA breaches and utilization for different technician staffing levels'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=120, help='Simulated days (default: 120, one semester)')
+        parser.add_argument(
+            '--technicians',
+            default='10,20,30',
+            help='Comma-separated technician counts to compare (default: 10,20,30)'
+        )
+        parser.add_argument('--shifts', default='08-17', help='Shifts as HH-HH, comma-separated (default: 08-17)')
+        parser.add_argument(
+            '--skills-per-tech',
+            type=int,
+            default=None,
+            help='Categories per technician (default: every technician handles every category)'
+        )
+        parser.add_argument('--fit-since', help='Fit arrival rates and service times from tickets since YYYY-MM-DD')
+        parser.add_argument('--fit-until', help='End of the fitting period, exclusive (YYYY-MM-DD)')
+        parser.add_argument(
+            '--rate',
+            action='append',
+            default=[],
+            metavar='CATEGORY:URGENCY=PER_DAY',
+            help='Hand-set arrival rate (repeatable, used when --fit-since is not given)'
+        )
+        parser.add_argument(
+            '--service-hours',
+            action='append',
+            default=[],
+            metavar='CATEGORY=HOURS',
+            help=f'Mean service time per category (default: {simulator.DEFAULT_SERVICE_HOURS})'
+        )
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiply all arrival rates (e.g. 1.5 at semester start)')
+        parser.add_argument('--max-open', type=int, default=None, help='Override AssignmentRule.max_open_tickets')
+        parser.add_argument('--travel-kmh', type=float, default=15.0, help='Travel speed on campus (default: 15)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            shifts = simulator.parse_shifts(options['shifts'])
+            staffing = [int(value) for value in options['technicians'].split(',') if value.strip()]
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['fit_since']:
+            try:
+                model = simulator.fit_arrivals(
+                    since=parse_date(options['fit_since']),
+                    until=parse_date(options['fit_until']) if options['fit_until'] else None,
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            for name, hours in parse_service_hours(options['service_hours']).items():
+                if name in model['categories']:
+                    model['service_hours'][model['categories'].index(name)] = hours
+        elif options['rate']:
+            model = simulator.manual_arrivals(
+                parse_rates(options['rate']),
+                service_hours=parse_service_hours(options['service_hours'])
+            )
+        else:
+            raise CommandError('Give --fit-since to fit arrival rates from history, or at least one --rate')
+
+        model = simulator.scale_arrivals(model, options['scale'])
+
+        rule = AssignmentRule.objects.filter(is_active=True).first() or AssignmentRule(
+            max_open_tickets=5, weight_distance=0.6, weight_workload=0.4
+        )
+        if options['max_open']:
+            rule.max_open_tickets = options['max_open']
+
+        per_day = model['per_day'].sum()
+        self.stdout.write(
+            f"Arrivals: {per_day:.1f} ticket(s)/day over {len(model['categories'])} categories, "
+            f"{options['days']} day(s), shifts {options['shifts']}"
+        )
+
+        rng = np.random.default_rng(options['seed'])
+        tickets = simulator.generate_tickets(model, options['days'], rng)
+
+        self.stdout.write(
+            f'{"techs":>6}{"tickets":>10}{"assigned":>10}{"SLA breach":>12}{"wait min":>10}'
+            f'{"p95 min":>10}{"queue":>8}{"max queue":>11}{"util":>7}'
+        )
+        for count in staffing:
+            started = time.perf_counter()
+            technicians = simulator.make_technicians(
+                count, len(model['categories']), shifts, np.random.default_rng(options['seed']),
+                skills_per_tech=options['skills_per_tech']
+            )
+            r = simulator.simulate(
+                tickets, technicians, rule, options['days'],
+                travel_kmh=options['travel_kmh'], aging=priority_queue.aging_term
+            )
+            self.stdout.write(
+                f'{count:>6}{r["tickets"]:>10}{r["assigned"]:>10}{r["sla_breach_rate"]:>12.1%}'
+                f'{r["mean_wait_min"]:>10.1f}{r["p95_wait_min"]:>10.1f}{r["mean_queue"]:>8.1f}'
+                f'{r["max_queue"]:>11}{r["utilization"]:>7.0%}'
+                f'  ({time.perf_counter() - started:.1f}s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS('✓ Simulation finished'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_dispatchjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeatCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_x', models.IntegerField()),
+                ('cell_y', models.IntegerField()),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'heat_cells',
+                'indexes': [models.Index(fields=['day'], name='heat_cells_day_ee5ce6_idx')],
+                'unique_together': {('cell_x', 'cell_y', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0004_heatcell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentrule',
+            name='scoring_strategy',
+            field=models.CharField(choices=[('bucketed', 'ระยะทางแบบขั้น (0-1 / 1-5 / >5 กม.)'), ('linear', 'ระยะทางแบบต่อเนื่อง'), ('rated', 'ระยะทางแบบขั้น + คะแนนรีวิว')], default='bucketed', max_length=20),
+        ),
+    ]
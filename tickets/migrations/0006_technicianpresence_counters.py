@@ -0,0 +1,74 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:55
+
+from collections import Counter, defaultdict
+from django.db import migrations, models
+from django.db.models import Count
+
+OPEN_STATUSES = ['PENDING', 'IN_PROGRESS', 'INSPECTING', 'WORKING']
+STATUS_COUNTERS = {
+    'PENDING': 'pending_tickets',
+    'IN_PROGRESS': 'in_progress_tickets',
+    'INSPECTING': 'in_progress_tickets',
+    'WORKING': 'in_progress_tickets',
+    'COMPLETED': 'completed_tickets',
+    'CLOSED': 'completed_tickets',
+    'REJECTED': 'rejected_tickets',
+}
+
+
+def backfill_counters(apps, schema_editor):
+    """นับงานของช่างจากตาราง tickets และสร้างแถว presence ให้ช่างที่มีงานแต่ยังไม่มีแถว"""
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TechnicianPresence = apps.get_model('tickets', 'TechnicianPresence')
+
+    counts = defaultdict(Counter)
+    rows = Ticket.objects.filter(assigned_to__isnull=False).values_list(
+        'assigned_to_id', 'status'
+    ).annotate(count=Count('id')).order_by()
+    for technician_id, status, count in rows:
+        if status in STATUS_COUNTERS:
+            counts[technician_id][STATUS_COUNTERS[status]] += count
+        if status in OPEN_STATUSES:
+            counts[technician_id]['open_tickets'] += count
+
+    for technician_id, fields in counts.items():
+        TechnicianPresence.objects.update_or_create(
+            technician_id=technician_id,
+            defaults=dict(fields)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_assignmentrule_scoring_strategy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='technicianpresence',
+            name='completed_tickets',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='technicianpresence',
+            name='in_progress_tickets',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='technicianpresence',
+            name='open_tickets',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='technicianpresence',
+            name='pending_tickets',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='technicianpresence',
+            name='rejected_tickets',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
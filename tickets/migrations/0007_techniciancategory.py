@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_technicianpresence_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TechnicianCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proficiency', models.IntegerField(choices=[(1, 'พื้นฐาน'), (2, 'ชำนาญ'), (3, 'เชี่ยวชาญ')], default=2)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='technician_skills', to='tickets.category')),
+                ('technician', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skills', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'technician_categories',
+                'unique_together': {('technician', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-18 13:10
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_priority_to_base(apps, schema_editor):
+    """คะแนนเดิมยังไม่มี aging - ใช้เป็นคะแนนตั้งต้น"""
+    Ticket = apps.get_model('tickets', 'Ticket')
+    Ticket.objects.update(base_priority_score=F('priority_score'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0007_techniciancategory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='base_priority_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(copy_priority_to_base, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['-priority_score', 'created_at'], name='tickets_pending_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.0.1 on 2026-10-18 15:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def build_rollups(apps, schema_editor):
+    """สร้างตารางสรุปจากข้อมูลเดิม (ภายหลังใช้ manage.py backfill_rollups)"""
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketStatusHistory = apps.get_model('tickets', 'TicketStatusHistory')
+    TicketDailyStat = apps.get_model('tickets', 'TicketDailyStat')
+    TicketDailyTransition = apps.get_model('tickets', 'TicketDailyTransition')
+    tz = timezone.get_current_timezone()
+
+    stats = Ticket.objects.annotate(day=TruncDate('created_at', tzinfo=tz)).values(
+        'day', 'category_id', 'status', 'urgency_level', 'assigned_to_id'
+    ).annotate(total=Count('id')).order_by()
+    TicketDailyStat.objects.bulk_create([
+        TicketDailyStat(
+            day=row['day'], category_id=row['category_id'], status=row['status'],
+            urgency_level=row['urgency_level'], technician_id=row['assigned_to_id'], count=row['total']
+        )
+        for row in stats
+    ], batch_size=1000)
+
+    transitions = TicketStatusHistory.objects.annotate(day=TruncDate('timestamp', tzinfo=tz)).values(
+        'day', 'ticket__category_id', 'new_status', 'ticket__urgency_level', 'changed_by_id'
+    ).annotate(total=Count('id')).order_by()
+    TicketDailyTransition.objects.bulk_create([
+        TicketDailyTransition(
+            day=row['day'], category_id=row['ticket__category_id'], status=row['new_status'],
+            urgency_level=row['ticket__urgency_level'], changed_by_id=row['changed_by_id'], count=row['total']
+        )
+        for row in transitions
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_ticket_base_priority_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('urgency_level', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tickets.category')),
+                ('technician', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'ticket_daily_stats',
+                'constraints': [
+                    models.UniqueConstraint(condition=models.Q(('technician__isnull', False)), fields=('day', 'category', 'status', 'urgency_level', 'technician'), name='ticket_daily_stats_key'),
+                    models.UniqueConstraint(condition=models.Q(('technician__isnull', True)), fields=('day', 'category', 'status', 'urgency_level'), name='ticket_daily_stats_unassigned_key'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='TicketDailyTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('urgency_level', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tickets.category')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'ticket_daily_transitions',
+                'constraints': [
+                    models.UniqueConstraint(condition=models.Q(('changed_by__isnull', False)), fields=('day', 'category', 'status', 'urgency_level', 'changed_by'), name='ticket_daily_transitions_key'),
+                    models.UniqueConstraint(condition=models.Q(('changed_by__isnull', True)), fields=('day', 'category', 'status', 'urgency_level'), name='ticket_daily_transitions_system_key'),
+                ],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.1 on 2026-10-18 17:05
+
+import re
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Value
+
+# ตัดคำแบบ tickets/search.py ตอนสร้าง migration นี้ (คัดลอกไว้ - migration ไม่ขึ้นกับโค้ดปัจจุบัน)
+# วิธีตัดคำ/SEARCH_CONFIG เปลี่ยนภายหลัง -> manage.py backfill_search_vectors
+THAI = re.compile(r'[\u0E00-\u0E7F]+')
+TOKEN = re.compile(r'[\u0E00-\u0E7F]+|[^\W_\u0E00-\u0E7F]+')
+
+
+def segment(text, word_tokenize):
+    result = []
+    for match in TOKEN.finditer(text or ''):
+        token = match.group()
+        if not THAI.match(token):
+            result.append(token.lower())
+        elif word_tokenize is not None:
+            result.extend(word for word in word_tokenize(token, engine='newmm', keep_whitespace=False) if word.strip())
+        elif len(token) <= 2:
+            result.append(token)
+        else:
+            result.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return ' '.join(result)
+
+
+def build_search_vectors(apps, schema_editor):
+    """สร้าง search_vector จากข้อมูลเดิม (ภายหลังใช้ manage.py backfill_search_vectors)"""
+    try:
+        from pythainlp.tokenize import word_tokenize
+    except ImportError:
+        word_tokenize = None
+
+    Ticket = apps.get_model('tickets', 'Ticket')
+    tickets = Ticket.objects.order_by('id').only('id', 'title', 'description', 'address_description')
+
+    last_id = 0
+    while True:
+        rows = list(tickets.filter(id__gt=last_id)[:2000])
+        if not rows:
+            return
+        for ticket in rows:
+            texts = (ticket.title, ticket.description, ticket.address_description)
+            parts = [
+                SearchVector(Value(segment(text, word_tokenize)), config='simple', weight=weight)
+                for text, weight in zip(texts, ('A', 'B', 'C'))
+            ]
+            ticket.search_vector = parts[0] + parts[1] + parts[2]
+        Ticket.objects.bulk_update(rows, ['search_vector'])
+        last_id = rows[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_ticket_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tickets_search_vector_gin'),
+        ),
+        migrations.RunPython(build_search_vectors, migrations.RunPython.noop),
+    ]
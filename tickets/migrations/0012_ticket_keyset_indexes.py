@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0011_ticket_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='tickets_creator_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_to', '-created_at', '-id'], name='tickets_assignee_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-created_at', '-id'], name='tickets_created_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 5.0.1 on 2026-10-18 20:35
+
+from datetime import timedelta
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# กฎเกินกำหนดของ Ticket.is_overdue ตอนสร้าง migration นี้ (ชั่วโมงหลังแจ้ง)
+OVERDUE_HOURS = {'PENDING': 24, 'IN_PROGRESS': 72, 'INSPECTING': 72, 'WORKING': 72}
+
+
+def display_name(user):
+    # historical model ไม่มี User.get_display_name
+    return (user.displayname_th or user.username) if user else ''
+
+
+def overdue_at(status, created_at):
+    hours = OVERDUE_HOURS.get(status)
+    return created_at + timedelta(hours=hours) if hours else None
+
+
+def build_list_entries(apps, schema_editor):
+    """สร้างแถวจากข้อมูลเดิม (ภายหลังใช้ manage.py rebuild_list_entries)"""
+    Ticket = apps.get_model('tickets', 'Ticket')
+    BeforeAfterPhoto = apps.get_model('tickets', 'BeforeAfterPhoto')
+    Attachment = apps.get_model('tickets', 'Attachment')
+    TicketListEntry = apps.get_model('tickets', 'TicketListEntry')
+    tickets = Ticket.objects.select_related('category', 'created_by', 'assigned_to').order_by('id')
+    status_labels = dict(Ticket._meta.get_field('status').choices)
+    urgency_labels = dict(Ticket._meta.get_field('urgency_level').choices)
+
+    last_id = 0
+    while True:
+        rows = list(tickets.filter(id__gt=last_id)[:2000])
+        if not rows:
+            return
+        ids = [ticket.id for ticket in rows]
+
+        files = {}
+        photos = BeforeAfterPhoto.objects.filter(ticket_id__in=ids, photo_type='BEFORE').order_by(
+            'ticket_id', 'uploaded_at', 'id'
+        ).values_list('ticket_id', 'image')
+        for ticket_id, image in photos:
+            files.setdefault(ticket_id, image)
+        attachments = Attachment.objects.filter(ticket_id__in=ids).exclude(ticket_id__in=list(files)).order_by(
+            'ticket_id', '-uploaded_at', '-id'
+        ).values_list('ticket_id', 'file')
+        for ticket_id, file in attachments:
+            files.setdefault(ticket_id, file)
+
+        TicketListEntry.objects.bulk_create([
+            TicketListEntry(
+                ticket_id=ticket.id,
+                title=ticket.title,
+                status=ticket.status,
+                status_label=status_labels.get(ticket.status, ticket.status),
+                urgency_level=ticket.urgency_level,
+                urgency_label=urgency_labels.get(ticket.urgency_level, ticket.urgency_level),
+                category_id=ticket.category_id,
+                category_name=ticket.category.name,
+                category_color=ticket.category.color,
+                created_by_id=ticket.created_by_id,
+                created_by_name=display_name(ticket.created_by),
+                assigned_to_id=ticket.assigned_to_id,
+                assigned_to_name=display_name(ticket.assigned_to),
+                thumbnail=files.get(ticket.id) or '',
+                location=ticket.location,
+                created_at=ticket.created_at,
+                overdue_at=overdue_at(ticket.status, ticket.created_at),
+                search_vector=ticket.search_vector,
+            )
+            for ticket in rows
+        ])
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0012_ticket_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketListEntry',
+            fields=[
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='list_entry', serialize=False, to='tickets.ticket')),
+                ('title', models.CharField(max_length=200)),
+                ('status', models.CharField(max_length=20)),
+                ('status_label', models.CharField(max_length=50)),
+                ('urgency_level', models.CharField(max_length=20)),
+                ('urgency_label', models.CharField(max_length=50)),
+                ('category_name', models.CharField(max_length=100)),
+                ('category_color', models.CharField(max_length=20)),
+                ('created_by_name', models.CharField(max_length=255)),
+                ('assigned_to_name', models.CharField(blank=True, max_length=255)),
+                ('thumbnail', models.CharField(blank=True, max_length=255)),
+                ('location', django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326)),
+                ('created_at', models.DateTimeField()),
+                ('overdue_at', models.DateTimeField(blank=True, null=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tickets.category')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'ticket_list_entries',
+                'indexes': [
+                    models.Index(fields=['created_by', '-created_at', '-ticket'], name='list_entries_creator_idx'),
+                    models.Index(fields=['assigned_to', '-created_at', '-ticket'], name='list_entries_assignee_idx'),
+                    models.Index(fields=['status', '-created_at'], name='list_entries_status_idx'),
+                    models.Index(fields=['-created_at', '-ticket'], name='list_entries_created_idx'),
+                    django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='list_entries_search_gin'),
+                ],
+            },
+        ),
+        migrations.RunPython(build_list_entries, migrations.RunPython.noop),
+    ]
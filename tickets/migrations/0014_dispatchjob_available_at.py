@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 21:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0013_ticketlistentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dispatchjob',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RemoveIndex(
+            model_name='dispatchjob',
+            name='dispatch_jo_status_9897a3_idx',
+        ),
+        migrations.AddIndex(
+            model_name='dispatchjob',
+            index=models.Index(fields=['status', 'available_at'], name='dispatch_jobs_ready_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.gis.db import models as gis_models
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
@@ -43,6 +45,13 @@ class Department(models.Model):
         return f"{self.dep_name} ({self.org_name_th})"
 
 
+# ฟิลด์ที่เป็น key ของ TicketDailyStat (ดู rollups.py)
+ROLLUP_KEY_FIELDS = ('created_at', 'category_id', 'status', 'urgency_level', 'assigned_to_id')
+
+# ข้อความที่ใช้สร้าง search_vector (ดู search.py)
+SEARCH_TEXT_FIELDS = ('title', 'description', 'address_description')
+
+
 class Ticket(models.Model):
     """Ticket สำหรับแจ้งปัญหา"""
     STATUS_CHOICES = [
@@ -95,7 +104,8 @@ class Ticket(models.Model):
         choices=URGENCY_CHOICES,
         default='MEDIUM'
     )
-    priority_score = models.FloatField(default=0.0)  # คำนวณโดย Auto Dispatcher
+    base_priority_score = models.FloatField(default=0.0)  # urgency + category + heat (คำนวณตอน dispatch)
+    priority_score = models.FloatField(default=0.0)  # base + aging (ดู priority_queue.py)
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -110,6 +120,9 @@ class Ticket(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
+    # Full-text search (title/description/address ที่ตัดคำแล้ว - ดู search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         db_table = 'tickets'
         ordering = ['-created_at']
@@ -118,11 +131,60 @@ class Ticket(models.Model):
             models.Index(fields=['category', 'status']),
             models.Index(fields=['assigned_to', 'status']),
             models.Index(fields=['-priority_score']),
+            # คิว PENDING เรียงตาม priority (priority_queue.py)
+            models.Index(
+                fields=['-priority_score', 'created_at'],
+                condition=models.Q(status='PENDING'),
+                name='tickets_pending_priority_idx'
+            ),
+            # keyset pagination ของรายการ (ดู pagination.py)
+            models.Index(fields=['created_by', '-created_at', '-id'], name='tickets_creator_keyset_idx'),
+            models.Index(fields=['assigned_to', '-created_at', '-id'], name='tickets_assignee_keyset_idx'),
+            models.Index(fields=['-created_at', '-id'], name='tickets_created_keyset_idx'),
+            GinIndex(fields=['search_vector'], name='tickets_search_vector_gin'),
+            # ค้นหาแบบทนคำสะกดต่าง (ดู search.similar)
+            GinIndex(fields=['title'], name='tickets_title_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['address_description'], name='tickets_address_trgm', opclasses=['gin_trgm_ops']),
         ]
 
     def __str__(self):
         return f"#{self.id} - {self.title} ({self.get_status_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # จำช่าง/สถานะตอนโหลด เพื่อปรับตัวนับงานของช่างตอน save (ดู counters.py)
+        if 'assigned_to_id' in instance.__dict__ and 'status' in instance.__dict__:
+            instance._counted_state = (instance.assigned_to_id, instance.status)
+        # key ของตารางสรุปรายวัน (ดู rollups.py)
+        if all(field in instance.__dict__ for field in ROLLUP_KEY_FIELDS):
+            instance._rollup_key = (
+                timezone.localdate(instance.created_at), instance.category_id,
+                instance.status, instance.urgency_level, instance.assigned_to_id
+            )
+        # ข้อความตอนโหลด - สร้าง search_vector ใหม่เฉพาะเมื่อข้อความเปลี่ยน (ดู search.py)
+        if all(field in instance.__dict__ for field in SEARCH_TEXT_FIELDS):
+            instance._search_text = tuple(instance.__dict__[field] or '' for field in SEARCH_TEXT_FIELDS)
+        # ตำแหน่งตอนโหลด - ย้ายจุดแล้ว vector tile ที่เดิมต้องหมดอายุด้วย (ดู tile_versions.py)
+        if 'location' in instance.__dict__ and instance.location:
+            instance._tile_point = (instance.location.x, instance.location.y)
+        return instance
+
+    def save(self, *args, **kwargs):
+        from . import counters, list_entries, rollups, search
+
+        kwargs['update_fields'] = search.prepare(self, kwargs.get('update_fields'))
+
+        # ตัวนับงานของช่าง ตารางสรุป และแถวของหน้ารายการต้องเปลี่ยนใน transaction เดียวกับ Ticket
+        with transaction.atomic():
+            # สถานะก่อนบันทึกต้องอ่านก่อน super().save() (หลังจากนั้น Ticket ใหม่ไม่ใช่ adding แล้ว)
+            counted = counters.state_before_save(self)
+            rollup_key = rollups.key_before_save(self)
+            super().save(*args, **kwargs)
+            counters.ticket_saved(self, counted)
+            rollups.ticket_saved(self, rollup_key)
+            list_entries.ticket_saved(self)
+
     def is_overdue(self):
         """Check if ticket is overdue"""
         if self.status == 'CLOSED':
@@ -200,6 +262,13 @@ class TechnicianPresence(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_available = models.BooleanField(default=True)
 
+    # ตัวนับงานที่มอบหมายให้ช่าง (ดูแลโดย counters.py - ห้ามแก้ตรงๆ)
+    open_tickets = models.IntegerField(default=0)  # PENDING, IN_PROGRESS, INSPECTING, WORKING
+    pending_tickets = models.IntegerField(default=0)
+    in_progress_tickets = models.IntegerField(default=0)  # IN_PROGRESS, INSPECTING, WORKING
+    completed_tickets = models.IntegerField(default=0)  # COMPLETED, CLOSED
+    rejected_tickets = models.IntegerField(default=0)
+
     class Meta:
         db_table = 'technician_presence'
 
@@ -207,17 +276,60 @@ class TechnicianPresence(models.Model):
         return f"{self.technician.username} - Available: {self.is_available}"
 
     def active_tickets_count(self):
-        """นับจำนวนงานที่ยังไม่เสร็จ"""
-        return self.technician.assigned_tickets.exclude(
-            status__in=['COMPLETED', 'CLOSED', 'REJECTED']
-        ).count()
+        """จำนวนงานที่ยังไม่เสร็จ"""
+        return self.open_tickets
+
+    @property
+    def total_tickets(self):
+        """จำนวนงานทั้งหมดที่มอบหมายให้ช่าง"""
+        return self.open_tickets + self.completed_tickets + self.rejected_tickets
+
+
+class TechnicianCategory(models.Model):
+    """ทักษะของช่างตามหมวดหมู่ (ใช้คัดช่างใน Auto Dispatcher - ดู skills.py)"""
+    PROFICIENCY_CHOICES = [
+        (1, 'พื้นฐาน'),
+        (2, 'ชำนาญ'),
+        (3, 'เชี่ยวชาญ'),
+    ]
+
+    technician = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='skills'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='technician_skills'
+    )
+    proficiency = models.IntegerField(choices=PROFICIENCY_CHOICES, default=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'technician_categories'
+        unique_together = ('technician', 'category')
+
+    def __str__(self):
+        return f"{self.technician.username} - {self.category.name} ({self.get_proficiency_display()})"
 
 
 class AssignmentRule(models.Model):
     """กฎการมอบหมายงานอัตโนมัติ"""
+    SCORING_STRATEGY_CHOICES = [
+        ('bucketed', 'ระยะทางแบบขั้น (0-1 / 1-5 / >5 กม.)'),
+        ('linear', 'ระยะทางแบบต่อเนื่อง'),
+        ('rated', 'ระยะทางแบบขั้น + คะแนนรีวิว'),
+    ]
+
     max_open_tickets = models.IntegerField(default=5)
     weight_distance = models.FloatField(default=0.6)  # น้ำหนักระยะทาง
     weight_workload = models.FloatField(default=0.4)  # น้ำหนักจำนวนงาน
+    scoring_strategy = models.CharField(
+        max_length=20,
+        choices=SCORING_STRATEGY_CHOICES,
+        default='bucketed'
+    )  # ดู tickets/scoring.py
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -319,3 +431,206 @@ class BeforeAfterPhoto(models.Model):
 
     def __str__(self):
         return f"{self.get_photo_type_display()} - Ticket #{self.ticket.id}"
+
+
+class HeatCell(models.Model):
+    """
+    จำนวน Ticket ต่อช่องกริด (ขนาดคงที่ HEAT_GRID_CELL_M เมตร) ต่อวัน
+    ใช้แทนการนับรัศมี 500 ม. ตอนคำนวณ priority (ดู heat_grid.py)
+    """
+    cell_x = models.IntegerField()
+    cell_y = models.IntegerField()
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'heat_cells'
+        unique_together = [('cell_x', 'cell_y', 'day')]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"Cell ({self.cell_x}, {self.cell_y}) {self.day}: {self.count}"
+
+
+class DispatchJob(models.Model):
+    """
+    คิวงานของ Auto Dispatcher (ประมวลผลโดย manage.py run_dispatcher)
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'รอมอบหมาย'),
+        ('DONE', 'มอบหมายเสร็จ'),
+        ('FAILED', 'ล้มเหลว'),
+    ]
+
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.CASCADE,
+        related_name='dispatch_jobs'
+    )
+    # ผู้ที่รอผลการมอบหมาย (ส่งผลกลับผ่าน WebSocket)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='dispatch_requests'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='QUEUED'
+    )
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # worker หยิบงานได้ตั้งแต่เวลานี้ (ล้มเหลวแล้วรอนานขึ้นแบบ exponential ก่อนลองใหม่)
+    available_at = models.DateTimeField(default=timezone.now)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'dispatch_jobs'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='dispatch_jobs_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"Dispatch Ticket #{self.ticket_id} ({self.get_status_display()})"
+
+
+class TicketDailyStat(models.Model):
+    """
+    จำนวน Ticket ตามวันที่แจ้ง × หมวด × สถานะ × ความเร่งด่วน × ช่าง (สถานะปัจจุบัน)
+    ใช้แทนการ count() ตาราง tickets ในหน้า dashboard/รายงาน (ดู rollups.py)
+    """
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=20)
+    urgency_level = models.CharField(max_length=20)
+    technician = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'ticket_daily_stats'
+        constraints = [
+            # NULL ไม่ซ้ำกันใน unique constraint - แยก constraint ของ Ticket ที่ยังไม่มีช่าง
+            models.UniqueConstraint(
+                fields=['day', 'category', 'status', 'urgency_level', 'technician'],
+                condition=models.Q(technician__isnull=False),
+                name='ticket_daily_stats_key'
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'category', 'status', 'urgency_level'],
+                condition=models.Q(technician__isnull=True),
+                name='ticket_daily_stats_unassigned_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}/{self.urgency_level}: {self.count}"
+
+
+class TicketDailyTransition(models.Model):
+    """
+    จำนวนการเปลี่ยนสถานะต่อวัน × หมวด × สถานะใหม่ × ความเร่งด่วน × ผู้เปลี่ยน
+    (สรุปจาก TicketStatusHistory ดู rollups.py)
+    """
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=20)
+    urgency_level = models.CharField(max_length=20)
+    # ผู้เปลี่ยนสถานะ (ช่างที่อัปเดตงาน) - NULL = ระบบ เช่น Auto Dispatcher
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'ticket_daily_transitions'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'category', 'status', 'urgency_level', 'changed_by'],
+                condition=models.Q(changed_by__isnull=False),
+                name='ticket_daily_transitions_key'
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'category', 'status', 'urgency_level'],
+                condition=models.Q(changed_by__isnull=True),
+                name='ticket_daily_transitions_system_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} → {self.status}: {self.count}"
+
+
+class TicketListEntry(models.Model):
+    """
+    แถวของ Ticket พร้อมแสดงในหน้ารายการ/แผนที่ (read model - ดู list_entries.py)
+    ชื่อหมวด/ผู้แจ้ง/ช่าง/ป้ายสถานะ/รูปย่อคัดลอกมาแล้ว อ่านได้โดยไม่ join ตารางอื่น
+    """
+    ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, primary_key=True, related_name='list_entry')
+    title = models.CharField(max_length=200)
+    status = models.CharField(max_length=20)
+    status_label = models.CharField(max_length=50)
+    urgency_level = models.CharField(max_length=20)
+    urgency_label = models.CharField(max_length=50)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    category_name = models.CharField(max_length=100)
+    category_color = models.CharField(max_length=20)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    created_by_name = models.CharField(max_length=255)
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    assigned_to_name = models.CharField(max_length=255, blank=True)
+    thumbnail = models.CharField(max_length=255, blank=True)  # ชื่อไฟล์ใน storage (รูปก่อนทำ/ไฟล์แนบ)
+    location = gis_models.PointField(null=True, blank=True, srid=4326)
+    created_at = models.DateTimeField()
+    # เวลาที่จะเกินกำหนด (NULL = ไม่มีกำหนด) - is_overdue เทียบกับเวลาตอนอ่าน
+    overdue_at = models.DateTimeField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        db_table = 'ticket_list_entries'
+        indexes = [
+            models.Index(fields=['created_by', '-created_at', '-ticket'], name='list_entries_creator_idx'),
+            models.Index(fields=['assigned_to', '-created_at', '-ticket'], name='list_entries_assignee_idx'),
+            models.Index(fields=['status', '-created_at'], name='list_entries_status_idx'),
+            models.Index(fields=['-created_at', '-ticket'], name='list_entries_created_idx'),
+            GinIndex(fields=['search_vector'], name='list_entries_search_gin'),
+        ]
+
+    def __str__(self):
+        return f"#{self.ticket_id} - {self.title} ({self.status_label})"
+
+    @property
+    def id(self):
+        return self.ticket_id
+
+    @property
+    def is_overdue(self):
+        return self.overdue_at is not None and self.overdue_at <= timezone.now()
+
+    @property
+    def thumbnail_url(self):
+        from django.core.files.storage import default_storage
+        return default_storage.url(self.thumbnail) if self.thumbnail else None
@@ -0,0 +1,156 @@
+"""
+Keyset Pagination
+แบ่งหน้ารายการ Ticket ด้วย cursor ของ (sort key, id) แทน OFFSET
+
+- ลำดับคงที่เสมอ: sort key ตามด้วย id เป็นตัวตัดสินเมื่อค่าเท่ากัน
+- หน้าถัดไป = WHERE key <= ค่าสุดท้าย AND (key < ค่าสุดท้าย OR (key = ค่าสุดท้าย AND id < id สุดท้าย))
+  seek ต่อจากแถวสุดท้ายด้วย index (created_by/assigned_to, created_at, id) ไม่ต้องอ่านแถวที่ข้ามไป
+- cursor เป็นข้อความ signed (ผู้ใช้แก้ค่าภายในไม่ได้ และไม่ผูกกับรูปแบบภายใน)
+- จำนวนทั้งหมดนับจริงเมื่อขอ (?count=exact) หรือเมื่อรายการจบในหน้าแรก
+  นอกนั้นใช้ค่าประมาณจาก query planner (EXPLAIN) ของ PostgreSQL
+"""
+
+import json
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from django.shortcuts import render
+
+CURSOR_SALT = 'tickets.pagination'
+
+# ค่า sort ของหน้า -> ลำดับของ keyset (ทุก key ทิศทางเดียวกัน และจบด้วย pk)
+# (pk = id ของ Ticket ทั้งใน Ticket และ TicketListEntry)
+SORT_KEYS = {
+    '-created_at': ('-created_at', '-pk'),
+    'created_at': ('created_at', 'pk'),
+    '-urgency_level': ('-urgency_level', '-pk'),
+    'urgency_level': ('urgency_level', 'pk'),
+    '-search_rank': ('-search_rank', '-pk'),  # ผลค้นหา (search.search annotate ไว้)
+}
+
+
+class Page:
+    """หน้าหนึ่งของรายการ: items, cursor ของหน้าถัดไป (None = หน้าสุดท้าย) และจำนวนรวม"""
+
+    def __init__(self, items, next_cursor, first=True):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.first = first
+        self.count = None
+        self.count_estimated = False
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _fields(ordering):
+    return [key.lstrip('-') for key in ordering]
+
+
+def _encode(sort, ordering, item):
+    values = [getattr(item, name) for name in _fields(ordering)]
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    return signing.dumps([sort, values], salt=CURSOR_SALT, compress=True)
+
+
+def _decode(queryset, sort, ordering, cursor):
+    """cursor -> ค่าของ key (แปลงเป็นชนิดของ field) - ValueError ถ้า cursor ไม่ถูกต้อง"""
+    try:
+        cursor_sort, values = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise ValueError('invalid cursor')
+    if cursor_sort != sort or len(values) != len(ordering):
+        raise ValueError('cursor does not match the sort order')
+
+    decoded = []
+    for name, value in zip(_fields(ordering), values):
+        try:
+            field = queryset.model._meta.pk if name == 'pk' else queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            decoded.append(float(value))  # annotation (search_rank)
+            continue
+        try:
+            decoded.append(field.to_python(value))
+        except Exception:
+            raise ValueError('invalid cursor')
+    return decoded
+
+
+def _after(ordering, values):
+    """Q ของแถวที่อยู่หลัง values ตามลำดับ ordering"""
+    op = 'lt' if ordering[0].startswith('-') else 'gt'
+    fields = _fields(ordering)
+
+    after = Q()
+    for i, name in enumerate(fields):
+        equal = {fields[j]: values[j] for j in range(i)}
+        after |= Q(**equal, **{f'{name}__{op}': values[i]})
+    # เงื่อนไขช่วงของ key แรกให้ planner seek ใน index ได้
+    return Q(**{f'{fields[0]}__{op}e': values[0]}) & after
+
+
+def paginate(queryset, sort, cursor=None, page_size=None):
+    """
+    หน้าหนึ่งของ queryset เรียงตาม SORT_KEYS[sort]
+
+    Args:
+        cursor: next_cursor ของหน้าก่อน (None = หน้าแรก)
+        page_size: ค่าเริ่มต้น settings.LIST_PAGE_SIZE
+
+    Raises:
+        ValueError: cursor ไม่ถูกต้องหรือไม่ตรงกับ sort
+    """
+    ordering = SORT_KEYS[sort]
+    page_size = page_size or settings.LIST_PAGE_SIZE
+
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(_after(ordering, _decode(queryset, sort, ordering, cursor)))
+
+    rows = list(queryset[:page_size + 1])
+    items = rows[:page_size]
+    next_cursor = _encode(sort, ordering, items[-1]) if len(rows) > page_size else None
+    return Page(items, next_cursor, first=not cursor)
+
+
+def estimate_count(queryset):
+    """จำนวนแถวโดยประมาณจาก query planner (ไม่ใช่ PostgreSQL -> นับจริง)"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count(page, queryset, exact=False):
+    """
+    ใส่ page.count: นับจริงเมื่อ exact หรือรายการจบในหน้าแรก (ไม่ต้อง query เพิ่ม)
+    นอกนั้นใช้ค่าประมาณ (page.count_estimated = True)
+    """
+    if page.first and not page.has_next:
+        page.count = len(page.items)
+    elif exact:
+        page.count = queryset.count()
+    else:
+        page.count = max(estimate_count(queryset), len(page.items))
+        page.count_estimated = True
+    return page
+
+
+def fragment(request, template_name, context, page):
+    """response ของปุ่ม "โหลดเพิ่ม": แถวของหน้านี้ + cursor ถัดไปใน header X-Next-Cursor (ว่าง = หมดแล้ว)"""
+    response = render(request, template_name, context)
+    response['X-Next-Cursor'] = page.next_cursor or ''
+    return response
@@ -0,0 +1,262 @@
+"""
+Technician Position Index
+ดัชนีตำแหน่งช่างในหน่วยความจำ (KD-tree) สำหรับ Auto Dispatcher
+ตอบ "ช่างที่พร้อมรับงาน k คนที่ใกล้ที่สุดในรัศมี R กม." ได้ในระดับไมโครวินาที
+แทนการอ่าน TechnicianPresence ทุกแถวแล้วคำนวณระยะทีละคน
+
+- พิกัดเก็บเป็น NumPy array (เมตร, equirectangular ที่ HEAT_GRID_REF_LAT)
+  พร้อม flag is_available แบบ bool array
+- อัปเดตจาก post_save/post_delete ของ TechnicianPresence ทันทีใน process เดียวกัน
+  และ broadcast ผ่าน channel layer ให้ process อื่นอัปเดตตาม
+- ถ้าดัชนียังไม่พร้อม (cold) dispatcher จะใช้ query ฐานข้อมูลแทน
+  ดัชนีถูกโหลดโดย run_dispatcher เมื่อ channel layer ข้าม process ได้ (เช่น Redis)
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import numpy as np
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer, InMemoryChannelLayer
+from django.conf import settings
+from scipy.spatial import cKDTree
+from .scoring import haversine_m
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_GROUP = 'technician_presence'
+METERS_PER_DEGREE = 111320.0
+
+
+def _project(lon, lat):
+    """(lon, lat) -> (x, y) เมตร สำหรับ KD-tree"""
+    scale = METERS_PER_DEGREE * math.cos(math.radians(settings.HEAT_GRID_REF_LAT))
+    return np.column_stack([np.asarray(lon) * scale, np.asarray(lat) * METERS_PER_DEGREE])
+
+
+class TechnicianPositionIndex:
+    """ดัชนีตำแหน่งช่างของ process นี้ (ใช้ผ่าน instance กลาง ``index``)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._warm = False
+        self._listener = None
+        self._reset()
+
+    def _reset(self):
+        # array จองที่ไว้ล่วงหน้า (ขยายทีละเท่าตัว) - ใช้จริงแค่ _size แถวแรก
+        self._ids = np.empty(16, dtype=np.int64)
+        self._lonlat = np.empty((16, 2), dtype=float)
+        self._available = np.empty(16, dtype=bool)
+        self._size = 0
+        self._row = {}  # technician_id -> แถว
+        self._tree = None
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    @property
+    def lonlat(self):
+        return self._lonlat[:self._size]
+
+    @property
+    def available(self):
+        return self._available[:self._size]
+
+    def is_warm(self):
+        return self._warm
+
+    def warm(self):
+        """โหลดตำแหน่งช่างทั้งหมดจากฐานข้อมูล (query เดียว)"""
+        from .models import TechnicianPresence
+
+        rows = list(TechnicianPresence.objects.filter(
+            location__isnull=False,
+            technician__role='technician',
+            technician__is_active=True
+        ).values_list('technician_id', 'location', 'is_available'))
+
+        with self._lock:
+            self._reset()
+            for technician_id, location, is_available in rows:
+                self._set(technician_id, location.x, location.y, is_available)
+            self._warm = True
+
+        self._start_listener()
+        logger.info(f"Technician position index warmed with {len(rows)} technician(s)")
+
+    def _grow(self):
+        capacity = len(self._ids) * 2
+        for name in ('_ids', '_lonlat', '_available'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _set(self, technician_id, lon, lat, is_available):
+        """O(1) ต่อ update (ขยาย array แบบ amortized) - KD-tree สร้างใหม่ตอน query ถัดไป"""
+        row = self._row.get(technician_id)
+        if row is None:
+            if self._size == len(self._ids):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._row[technician_id] = row
+            self._ids[row] = technician_id
+        elif tuple(self._lonlat[row]) == (lon, lat) and self._available[row] == bool(is_available):
+            return  # ไม่เปลี่ยน - KD-tree เดิมยังใช้ได้
+        self._lonlat[row] = (lon, lat)
+        self._available[row] = bool(is_available)
+        self._tree = None
+
+    def apply(self, technician_id, lon=None, lat=None, is_available=True):
+        """อัปเดตตำแหน่งช่างหนึ่งคน (lon/lat = None หมายถึงไม่มีพิกัดแล้ว)"""
+        if not self._warm:
+            return
+        with self._lock:
+            if lon is None or lat is None:
+                self.remove(technician_id)
+            else:
+                self._set(technician_id, lon, lat, is_available)
+
+    def remove(self, technician_id):
+        """ย้ายแถวสุดท้ายมาแทนแถวที่ลบ (O(1))"""
+        with self._lock:
+            row = self._row.pop(technician_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                moved = int(self._ids[last])
+                self._ids[row] = moved
+                self._lonlat[row] = self._lonlat[last]
+                self._available[row] = self._available[last]
+                self._row[moved] = row
+            self._size = last
+            self._tree = None
+
+    def nearest(self, lon, lat, k, radius_km=None, eligible=None):
+        """
+        ช่างที่พร้อมรับงาน k คนที่ใกล้ที่สุด
+
+        Args:
+            eligible: function(technician_ids) -> bool array สำหรับกรองช่างก่อนตัด k
+                (เช่นทักษะตรงหมวดและงานยังไม่เต็ม - ดู AutoDispatcher.load_candidates)
+
+        Returns:
+            (technician_ids, distances_km) เรียงจากใกล้ไปไกล
+        """
+        with self._lock:
+            n = len(self.ids)
+            if n == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0)
+
+            if self._tree is None:
+                self._tree = cKDTree(_project(self.lonlat[:, 0], self.lonlat[:, 1]))
+
+            bound = radius_km * 1000 if radius_km else np.inf
+            dist, rows = self._tree.query(
+                _project([lon], [lat])[0],
+                k=n,
+                distance_upper_bound=bound
+            )
+            rows = np.atleast_1d(rows)
+            rows = rows[rows < n]  # query เติม index = n ให้ช่องที่เกินรัศมี
+            rows = rows[self.available[rows]]
+            if eligible is not None:
+                rows = rows[eligible(self.ids[rows])]
+            rows = rows[:k]
+
+            ids = self.ids[rows].copy()
+            lonlat = self.lonlat[rows]
+
+        distances_km = haversine_m(lon, lat, lonlat[:, 0], lonlat[:, 1]) / 1000.0
+        return ids, distances_km
+
+    def _start_listener(self):
+        """
+        รับ update จาก process อื่นผ่าน channel layer
+
+        InMemoryChannelLayer ใช้ได้แค่ใน process เดียว (และ apply ตรงไปแล้ว)
+        จึงไม่ต้องมี listener
+        """
+        if not can_stay_coherent():
+            return
+        if self._listener and self._listener.is_alive():
+            return
+
+        channel_layer = get_channel_layer()
+        self._listener = threading.Thread(
+            target=lambda: asyncio.run(self._listen(channel_layer)),
+            name='presence-index-listener',
+            daemon=True
+        )
+        self._listener.start()
+
+    async def _listen(self, channel_layer):
+        channel_name = await channel_layer.new_channel()
+        await channel_layer.group_add(PRESENCE_GROUP, channel_name)
+        loop = asyncio.get_running_loop()
+        joined_at = loop.time()
+
+        while True:
+            # group membership หมดอายุตาม group_expiry ของ channel layer - join ใหม่เป็นระยะ
+            if loop.time() - joined_at > 3600:
+                await channel_layer.group_add(PRESENCE_GROUP, channel_name)
+                joined_at = loop.time()
+
+            try:
+                message = await asyncio.wait_for(channel_layer.receive(channel_name), timeout=60)
+            except asyncio.TimeoutError:
+                continue
+            except Exception:
+                logger.exception("Presence index listener error")
+                await asyncio.sleep(5)
+                continue
+
+            self.apply(
+                message['technician_id'],
+                message.get('lon'),
+                message.get('lat'),
+                message.get('is_available', True)
+            )
+
+
+index = TechnicianPositionIndex()
+
+
+def can_stay_coherent():
+    """
+    ดัชนีจะตรงกับฐานข้อมูลได้เมื่อ update จาก process อื่นส่งถึงกันได้
+
+    InMemoryChannelLayer ส่งได้แค่ภายใน process จึงไม่ควรใช้ดัชนีใน worker แยก
+    """
+    channel_layer = get_channel_layer()
+    return channel_layer is not None and not isinstance(channel_layer, InMemoryChannelLayer)
+
+
+def broadcast_presence(technician_id, location=None, is_available=True):
+    """อัปเดตดัชนีใน process นี้ แล้วแจ้ง process อื่นผ่าน channel layer"""
+    lon = location.x if location else None
+    lat = location.y if location else None
+    index.apply(technician_id, lon, lat, is_available)
+
+    if not can_stay_coherent():
+        return
+
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            PRESENCE_GROUP,
+            {
+                'type': 'presence.update',
+                'technician_id': technician_id,
+                'lon': lon,
+                'lat': lat,
+                'is_available': is_available,
+            }
+        )
+    except Exception:
+        # process อื่นจะตามทันเมื่อโหลดดัชนีใหม่ - ไม่ให้การบันทึกตำแหน่งล้มเหลว
+        logger.exception("Failed to broadcast technician presence update")
@@ -0,0 +1,89 @@
+"""
+Priority Queue
+คิว Ticket ที่ยังรอ (status = PENDING ทั้งที่ยังไม่มีช่างและช่างยังไม่รับงาน)
+เรียงตาม priority_score จาก partial index (-priority_score, created_at) WHERE status = 'PENDING'
+
+- priority_score = base_priority_score + aging term
+  base คำนวณครั้งเดียวตอน dispatch (urgency + category + heat)
+  aging เพิ่มขึ้นตามอายุ Ticket แบบอิ่มตัว: PRIORITY_AGING_MAX * (1 - exp(-age / PRIORITY_AGING_HOURS))
+  Ticket เก่าที่ค้างจึงค่อยๆ แซง Ticket ใหม่ที่ urgency เท่ากันได้
+- rescore() คำนวณคิวทั้งหมดใหม่แบบ vectorized แล้วเขียนเฉพาะแถวที่คะแนนเปลี่ยน
+  อย่างน้อย PRIORITY_RESCORE_MIN_DELTA (aging เปลี่ยนทุกใบทุกรอบ - ไม่งั้นเขียนทั้งคิวทุกครั้ง)
+  (manage.py rescore_pending หรือ run_dispatcher ทุก PRIORITY_RESCORE_INTERVAL วินาที)
+- rescore เพิ่ม QUEUE_VERSION_KEY แทน ticket data version - cache ของ dashboard/tile
+  ไม่หมดอายุตามรอบเวลา มีแค่รายการหัวคิว (cached_top) ที่สร้างใหม่
+"""
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .models import Ticket
+from . import data_cache
+
+QUEUE_VERSION_KEY = 'priority-queue:version'
+
+
+def queued():
+    """Ticket ในคิว เรียงจาก priority สูงสุด (ใช้ partial index)"""
+    return Ticket.objects.filter(status='PENDING').order_by('-priority_score', 'created_at')
+
+
+def top(limit=10, unassigned_only=False):
+    """หัวคิว limit ใบ พร้อม select_related สำหรับแสดงผล"""
+    tickets = queued()
+    if unassigned_only:
+        tickets = tickets.filter(assigned_to__isnull=True)
+    return tickets.select_related('category', 'created_by', 'assigned_to')[:limit]
+
+
+def cached_top(limit=10, request=None):
+    """top() ใน cache ตาม ticket data version และ version ของลำดับคิว"""
+    return data_cache.cached(
+        'priority_queue', lambda: list(top(limit)),
+        vary=(data_cache.version(QUEUE_VERSION_KEY), limit), request=request
+    )
+
+
+def aging_term(age_hours):
+    """คะแนนเพิ่มตามอายุ (ชั่วโมง) - รับได้ทั้งตัวเลขและ array"""
+    age_hours = np.maximum(np.asarray(age_hours, dtype=float), 0.0)
+    return settings.PRIORITY_AGING_MAX * (1.0 - np.exp(-age_hours / settings.PRIORITY_AGING_HOURS))
+
+
+def score_for(base_score, created_at, now=None):
+    """priority_score ของ Ticket หนึ่งใบ ณ เวลา now"""
+    now = now or timezone.now()
+    age_hours = (now - created_at).total_seconds() / 3600 if created_at else 0.0
+    return round(base_score + float(aging_term(age_hours)), 2)
+
+
+def rescore(now=None, chunk_size=5000):
+    """
+    คำนวณ priority_score ของทุก Ticket ในคิวใหม่
+
+    Returns:
+        (จำนวนที่ตรวจ, จำนวนที่เปลี่ยน)
+    """
+    now = now or timezone.now()
+    rows = list(queued().values_list('id', 'base_priority_score', 'priority_score', 'created_at'))
+    if not rows:
+        return 0, 0
+
+    ids = np.array([r[0] for r in rows], dtype=np.int64)
+    base = np.array([r[1] for r in rows], dtype=float)
+    current = np.array([r[2] for r in rows], dtype=float)
+    age_hours = np.array([(now - r[3]).total_seconds() for r in rows], dtype=float) / 3600
+
+    scores = np.round(base + aging_term(age_hours), 2)
+    changed = np.flatnonzero(np.abs(scores - current) >= settings.PRIORITY_RESCORE_MIN_DELTA - 1e-9)
+
+    # bulk_update ไม่ผ่าน Ticket.save จึงไม่แตะ updated_at และตัวนับงานของช่าง
+    Ticket.objects.bulk_update(
+        [Ticket(id=int(ids[i]), priority_score=float(scores[i])) for i in changed],
+        ['priority_score'],
+        batch_size=chunk_size
+    )
+    if len(changed):
+        data_cache.bump_on_commit(QUEUE_VERSION_KEY)  # ลำดับคิวบน dashboard เปลี่ยน
+
+    return len(rows), len(changed)
@@ -0,0 +1,144 @@
+"""
+Ticket Query
+ตัวกรอง/ค้นหา/เรียงรายการ Ticket ที่ใช้ร่วมกันทุกหน้า (my_tickets, job_list และ API ในอนาคต)
+
+- TicketQuery อ่านพารามิเตอร์ครั้งเดียว (search, status, category, urgency, date_from, date_to, sort)
+  ค่าที่ไม่ถูกต้องถูกละไว้เหมือนไม่ได้กรอง
+- apply() สร้างเงื่อนไขที่ใช้ index ได้: ค่าเท่ากันของ status/category/urgency, ช่วง created_at
+  ตามวันของเขตเวลาท้องถิ่น และ full-text search (search.py)
+- page() แบ่งหน้าตาม sort ที่เลือกด้วย keyset (pagination.py)
+- status_counts() นับทุกกลุ่มสถานะใน aggregate query เดียว (COUNT ... FILTER)
+  และเก็บใน cache ต่อผู้ใช้ตาม ticket data version (data_cache.py)
+"""
+
+from datetime import datetime, time, timedelta
+from django.db.models import Count, Q
+from django.utils import timezone
+from . import data_cache, pagination, search
+from .models import Ticket
+
+# กลุ่มสถานะของตัวนับ/ตัวกรองหน้ารายการ
+STATUS_GROUPS = {
+    'pending': ['PENDING'],
+    'in_progress': ['IN_PROGRESS', 'INSPECTING', 'WORKING'],
+    'completed': ['COMPLETED', 'CLOSED'],
+}
+
+SORTS = ['-created_at', 'created_at', '-urgency_level', 'urgency_level']
+
+STATUSES = {value for value, _ in Ticket.STATUS_CHOICES}
+URGENCIES = {value for value, _ in Ticket.URGENCY_CHOICES}
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def _day_start(day):
+    """เริ่มวัน (เที่ยงคืนตามเขตเวลาท้องถิ่น) เป็น datetime ที่มี timezone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class TicketQuery:
+    """
+    ตัวกรองรายการ Ticket จากพารามิเตอร์ของ request
+
+    ใช้:
+        query = TicketQuery(request.GET)
+        page = query.page(Ticket.objects.filter(created_by=user), request.GET.get('cursor'))
+        context.update(query.context())
+    """
+
+    def __init__(self, params):
+        self.search = params.get('search', '').strip()
+        self.status = params.get('status', '')
+        self.category = params.get('category', '')
+        self.urgency = params.get('urgency', '')
+        self.date_from = params.get('date_from', '')
+        self.date_to = params.get('date_to', '')
+        self.sort = params.get('sort', '-created_at')
+        self.sort_selected = 'sort' in params
+
+    @property
+    def is_filtered(self):
+        """มีตัวกรองใดถูกเลือก (หน้าแสดงจำนวนผลลัพธ์)"""
+        return any([self.search, self.status, self.category, self.urgency, self.date_from, self.date_to])
+
+    @property
+    def sort_key(self):
+        """ชื่อลำดับใน pagination.SORT_KEYS (ค้นหาโดยไม่เลือกการเรียง -> เรียงตามความเกี่ยวข้อง)"""
+        if self.search and not self.sort_selected:
+            return '-search_rank'
+        return self.sort if self.sort in SORTS else '-created_at'
+
+    def filters(self):
+        """Q ของตัวกรองทั้งหมด (ไม่รวมข้อความค้นหา)"""
+        conditions = Q()
+        if self.status in STATUSES:
+            conditions &= Q(status=self.status)
+        if self.category.isdigit():
+            conditions &= Q(category_id=int(self.category))
+        if self.urgency in URGENCIES:
+            conditions &= Q(urgency_level=self.urgency)
+
+        date_from = _date(self.date_from)
+        if date_from:
+            conditions &= Q(created_at__gte=_day_start(date_from))
+        date_to = _date(self.date_to)
+        if date_to:
+            # รวมทั้งวันสุดท้าย
+            conditions &= Q(created_at__lt=_day_start(date_to + timedelta(days=1)))
+        return conditions
+
+    def apply(self, queryset):
+        """queryset ที่กรองและค้นหาแล้ว (ยังไม่เรียง - page() เรียงตาม sort_key)"""
+        queryset = queryset.filter(self.filters())
+        if self.search:
+            queryset = search.search(queryset, self.search)
+        return queryset
+
+    def page(self, queryset, cursor=None, page_size=None):
+        """
+        หน้าหนึ่งของผลลัพธ์
+
+        Raises:
+            ValueError: cursor ไม่ถูกต้อง
+        """
+        return pagination.paginate(self.apply(queryset), self.sort_key, cursor, page_size)
+
+    def context(self):
+        """ค่าตัวกรองสำหรับ template (ชื่อเดิมของหน้า my_tickets/job_list)"""
+        return {
+            'search_query': self.search,
+            'status_filter': self.status,
+            'category_filter': self.category,
+            'urgency_filter': self.urgency,
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'sort_by': self.sort,
+        }
+
+
+def status_counts(queryset):
+    """
+    จำนวน Ticket ของ queryset ตาม STATUS_GROUPS (1 query)
+
+    Returns:
+        dict: total, pending, in_progress, completed
+    """
+    return queryset.order_by().aggregate(
+        total=Count('pk'),
+        **{name: Count('pk', filter=Q(status__in=statuses)) for name, statuses in STATUS_GROUPS.items()}
+    )
+
+
+def user_status_counts(user, request=None):
+    """status_counts ของ Ticket ที่ผู้ใช้แจ้ง - cache ต่อผู้ใช้จนกว่า ticket data version จะเปลี่ยน"""
+    return data_cache.cached(
+        'user_status_counts',
+        lambda: status_counts(Ticket.objects.filter(created_by=user)),
+        vary=(user.pk,), request=request
+    )
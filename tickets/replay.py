@@ -0,0 +1,287 @@
+"""
+Dispatch Replay
+เล่น Ticket ในอดีตซ้ำกับ AssignmentRule หลายชุด เพื่อปรับน้ำหนักแบบ offline
+(manage.py replay_dispatch)
+
+Snapshot (dict ของ NumPy array - บันทึก/โหลดเป็น .npz ได้):
+- Ticket: เวลาแจ้ง, พิกัด, หมวด, base priority, ช่างที่ได้จริง
+  accept_delay = เวลาจากแจ้งถึงช่างรับงาน (IN_PROGRESS ครั้งแรกใน TicketStatusHistory)
+  service = เวลาจากรับงานถึง completed_at (ช่างไม่ว่างระหว่างนี้)
+- ช่าง: ตำแหน่งจาก TechnicianPresence, ทักษะ (TechnicianCategory), คะแนนรีวิวเฉลี่ย
+  และช่วงเวลาที่ทำงาน (ตั้งแต่งานแรกถึงงานสุดท้ายที่ได้รับในช่วงที่ replay)
+
+Replay ไม่แตะฐานข้อมูลเลย (ไม่มี notification/history) - ให้คะแนนช่างด้วย
+score_candidates ตัวเดียวกับ AutoDispatcher, ช่างย้ายไปอยู่ที่ Ticket ล่าสุดที่ได้รับ
+และ Ticket ที่ไม่มีช่องงานว่างจะรอในคิว priority จนมีช่างว่าง
+time-to-accept = เวลารอช่องงาน + accept_delay เดิมของ Ticket
+"""
+
+import heapq
+import numpy as np
+from types import SimpleNamespace
+from .scoring import haversine_m, score_candidates
+
+SNAPSHOT_VERSION = 1
+
+
+def load_snapshot(since=None, until=None):
+    """
+    อ่าน snapshot จากฐานข้อมูล (read-only)
+
+    Args:
+        since, until: datetime ช่วงเวลาแจ้งของ Ticket (None = ทั้งหมด)
+    """
+    from django.db.models import Avg, Min, Q
+    from authentication.models import User
+    from .models import AssignmentRule, TechnicianCategory, TechnicianPresence, Ticket, TicketFeedback
+
+    tickets = Ticket.objects.all()
+    if since:
+        tickets = tickets.filter(created_at__gte=since)
+    if until:
+        tickets = tickets.filter(created_at__lt=until)
+
+    tickets = tickets.annotate(
+        accepted_at=Min('status_history__timestamp', filter=Q(status_history__new_status='IN_PROGRESS'))
+    ).order_by('created_at').values_list(
+        'id', 'created_at', 'location', 'category_id', 'base_priority_score',
+        'assigned_to_id', 'accepted_at', 'completed_at'
+    )
+    rows = list(tickets)
+
+    technicians = list(User.objects.filter(role='technician', is_active=True).order_by('id').values_list('id', flat=True))
+    tech_row = {tid: i for i, tid in enumerate(technicians)}
+    locations = dict(TechnicianPresence.objects.filter(
+        technician_id__in=technicians, location__isnull=False
+    ).values_list('technician_id', 'location'))
+    ratings = dict(TicketFeedback.objects.filter(
+        technician_id__in=technicians
+    ).values('technician_id').annotate(avg=Avg('overall_rating')).values_list('technician_id', 'avg'))
+
+    categories = sorted({r[3] for r in rows})
+    category_col = {cid: i for i, cid in enumerate(categories)}
+    skills = np.ones((len(technicians), len(categories)), dtype=bool)
+    skill_rows = TechnicianCategory.objects.filter(technician_id__in=technicians).values_list('technician_id', 'category_id')
+    has_rows = set()
+    for tid, cid in skill_rows:
+        row = tech_row[tid]
+        if row not in has_rows:
+            skills[row] = False  # มีแถวทักษะ = ไม่ใช่ช่างทั่วไป
+            has_rows.add(row)
+        if cid in category_col:
+            skills[row, category_col[cid]] = True
+
+    def ts(value):
+        return value.timestamp() if value else np.nan
+
+    created = np.array([ts(r[1]) for r in rows], dtype=float)
+    accepted = np.array([ts(r[6]) for r in rows], dtype=float)
+    completed = np.array([ts(r[7]) for r in rows], dtype=float)
+    assigned = np.array([tech_row.get(r[5], -1) for r in rows], dtype=np.int64)
+
+    # ช่วงเวลาทำงานของช่าง: จากงานแรกถึงงานสุดท้ายที่ได้รับในช่วงนี้
+    active_from = np.full(len(technicians), np.inf)
+    active_until = np.full(len(technicians), -np.inf)
+    for i, row in enumerate(assigned):
+        if row < 0:
+            continue
+        active_from[row] = min(active_from[row], created[i])
+        active_until[row] = max(active_until[row], np.nanmax([created[i], accepted[i], completed[i]]))
+
+    rule = AssignmentRule.objects.filter(is_active=True).first()
+
+    return {
+        'version': np.array(SNAPSHOT_VERSION),
+        'ticket_id': np.array([r[0] for r in rows], dtype=np.int64),
+        'created': created,
+        'lonlat': np.array([(r[2].x, r[2].y) if r[2] else (np.nan, np.nan) for r in rows], dtype=float).reshape(-1, 2),
+        'category': np.array([category_col[r[3]] for r in rows], dtype=np.int64),
+        'priority': np.array([r[4] for r in rows], dtype=float),
+        'assigned': assigned,
+        'accept_delay': accepted - created,
+        'service': np.where(np.isnan(accepted), completed - created, completed - accepted),
+        'tech_id': np.array(technicians, dtype=np.int64),
+        'tech_lonlat': np.array([
+            (locations[tid].x, locations[tid].y) if tid in locations else (np.nan, np.nan)
+            for tid in technicians
+        ], dtype=float).reshape(-1, 2),
+        'tech_rating': np.array([ratings.get(tid, np.nan) for tid in technicians], dtype=float),
+        'tech_skills': skills,
+        'tech_active_from': active_from,
+        'tech_active_until': active_until,
+        'rule': np.array([
+            rule.max_open_tickets if rule else 5,
+            rule.weight_distance if rule else 0.6,
+            rule.weight_workload if rule else 0.4,
+        ], dtype=float),
+        'rule_strategy': np.array(rule.scoring_strategy if rule else 'bucketed'),
+    }
+
+
+def save_snapshot(snapshot, path):
+    np.savez_compressed(path, **snapshot)
+
+
+def read_snapshot(path):
+    with np.load(path, allow_pickle=False) as data:
+        snapshot = {key: data[key] for key in data.files}
+    if int(snapshot['version']) != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {int(snapshot['version'])}")
+    return snapshot
+
+
+def make_rule(name, max_open_tickets, weight_distance, weight_workload, scoring_strategy='bucketed'):
+    """AssignmentRule แบบไม่ผูกฐานข้อมูล (ใช้กับ score_candidates)"""
+    return SimpleNamespace(
+        name=name,
+        max_open_tickets=int(max_open_tickets),
+        weight_distance=float(weight_distance),
+        weight_workload=float(weight_workload),
+        scoring_strategy=scoring_strategy,
+    )
+
+
+def replay(snapshot, rule, use_history=False, unknown_service_s=4 * 3600):
+    """
+    เล่น Ticket ทั้งหมดใน snapshot ตามลำดับเวลา
+
+    Args:
+        rule: object ที่มี max_open_tickets, weight_distance, weight_workload, scoring_strategy
+        use_history: True = ใช้ช่างที่ได้จริงในอดีต (baseline สำหรับเทียบ)
+        unknown_service_s: เวลาทำงานสมมติของ Ticket ที่ยังไม่เสร็จ
+
+    Returns:
+        dict ของ metrics
+    """
+    created = snapshot['created']
+    lonlat = snapshot['lonlat']
+    category = snapshot['category']
+    priority = snapshot['priority']
+    accept_delay = np.nan_to_num(np.clip(snapshot['accept_delay'], 0, None))
+    service = snapshot['service']
+    service = np.where(np.isnan(service) | (service < 0), unknown_service_s, service)
+    historical = snapshot['assigned']
+
+    tech_pos = snapshot['tech_lonlat'].copy()
+    skills = snapshot['tech_skills']
+    ratings = snapshot['tech_rating']
+    active_from = snapshot['tech_active_from']
+    active_until = snapshot['tech_active_until']
+    n_techs = len(tech_pos)
+
+    open_tickets = np.zeros(n_techs, dtype=float)
+    loads = np.zeros(n_techs, dtype=np.int64)
+    completions = []  # heap (end_time, tech)
+    waiting = []  # heap (-priority, created, ticket)
+    distance_km = np.full(len(created), np.nan)
+    wait_s = np.full(len(created), np.nan)
+
+    def assign(i, now):
+        if use_history:
+            tech = historical[i]  # ใช้ช่างเดิมเสมอ ไม่สนช่องงาน
+        else:
+            free = (open_tickets < rule.max_open_tickets) & (active_from <= now) & (now <= active_until)
+            if skills.size:
+                free &= skills[:, category[i]]
+            candidates = np.flatnonzero(free)
+            if not len(candidates):
+                return False
+
+            distances = haversine_m(
+                lonlat[i, 0], lonlat[i, 1], tech_pos[candidates, 0], tech_pos[candidates, 1]
+            ) / 1000.0
+            scores = score_candidates(
+                rule, distances, open_tickets[candidates],
+                ratings=ratings[candidates], ticket_located=not np.isnan(lonlat[i, 0])
+            )
+            tech = candidates[int(np.argmax(scores))]
+
+        distance_km[i] = haversine_m(lonlat[i, 0], lonlat[i, 1], tech_pos[tech, 0], tech_pos[tech, 1]) / 1000.0
+        wait_s[i] = now - created[i]
+        open_tickets[tech] += 1
+        loads[tech] += 1
+        if not np.isnan(lonlat[i, 0]):
+            tech_pos[tech] = lonlat[i]  # ช่างเดินทางไปที่ Ticket
+        heapq.heappush(completions, (now + accept_delay[i] + service[i], int(tech)))
+        return True
+
+    def drain(now):
+        """มอบหมาย Ticket ที่รออยู่ตามลำดับ priority เท่าที่ทำได้"""
+        blocked = []
+        while waiting and (open_tickets < rule.max_open_tickets).any():
+            item = heapq.heappop(waiting)
+            if not assign(item[2], now):
+                blocked.append(item)
+        for item in blocked:
+            heapq.heappush(waiting, item)
+
+    def release(until):
+        while completions and completions[0][0] <= until:
+            end, tech = heapq.heappop(completions)
+            open_tickets[tech] -= 1
+            if waiting:
+                drain(end)
+
+    never = 0
+    for i in np.argsort(created, kind='stable'):
+        release(created[i])
+        if use_history:
+            if historical[i] < 0:
+                never += 1
+            else:
+                assign(i, created[i])
+            continue
+        heapq.heappush(waiting, (-priority[i], created[i], int(i)))
+        drain(created[i])
+
+    while completions and waiting:
+        release(completions[0][0])
+
+    return summarize(rule, distance_km, wait_s + accept_delay, loads, len(waiting) + never)
+
+
+def summarize(rule, distance_km, accept_s, loads, unassigned):
+    assigned = ~np.isnan(accept_s)
+    distances = distance_km[assigned & ~np.isnan(distance_km)]
+    accept_min = accept_s[assigned] / 60
+    working = loads[loads > 0]
+
+    def pct(values, q):
+        return float(np.percentile(values, q)) if len(values) else 0.0
+
+    return {
+        'rule': getattr(rule, 'name', ''),
+        'assigned': int(assigned.sum()),
+        'unassigned': int(unassigned),
+        'mean_km': float(distances.mean()) if len(distances) else 0.0,
+        'p95_km': pct(distances, 95),
+        # ความไม่สมดุลของงาน = coefficient of variation ของจำนวนงานต่อช่างที่ทำงาน
+        'load_cv': float(working.std() / working.mean()) if len(working) else 0.0,
+        'mean_accept_min': float(accept_min.mean()) if len(accept_min) else 0.0,
+        'p95_accept_min': pct(accept_min, 95),
+    }
+
+
+def _replay_job(args):
+    snapshot, rule, use_history = args
+    return replay(snapshot, rule, use_history=use_history)
+
+
+def replay_many(snapshot, rules, processes=None, include_history=True):
+    """
+    replay หลาย rule พร้อมกันด้วย process pool
+
+    Returns:
+        list ของ metrics (history baseline อยู่แถวแรกถ้า include_history)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = [(snapshot, rule, False) for rule in rules]
+    if include_history:
+        jobs.insert(0, (snapshot, make_rule('history', snapshot['rule'][0], 0, 0), True))
+
+    if processes == 1 or len(jobs) == 1:
+        return [_replay_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_replay_job, jobs))
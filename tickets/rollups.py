@@ -0,0 +1,254 @@
+"""
+Ticket Rollups
+ตารางสรุปรายวันของ Ticket สำหรับ dashboard/รายงาน แทนการ count() ตาราง tickets ทุกครั้ง
+
+- TicketDailyStat: จำนวน Ticket ตามวันที่แจ้ง × หมวด × สถานะ × ความเร่งด่วน × ช่าง (สถานะปัจจุบัน)
+  สร้าง/แก้ Ticket -> Ticket.save ย้าย 1 จาก key เดิมไป key ใหม่ด้วย F() ใน transaction เดียวกัน
+- TicketDailyTransition: จำนวนการเปลี่ยนสถานะต่อวัน (เพิ่มทีละแถวเมื่อสร้าง TicketStatusHistory)
+- ลบผู้ใช้ -> user_deleted() ย้ายจำนวนของผู้ใช้นั้นไป key NULL (เหมือน SET_NULL ของ Ticket/ประวัติ)
+- backfill() สร้างใหม่ทั้งหมดจาก tickets/TicketStatusHistory ทีละช่วง id (manage.py backfill_rollups)
+- reconcile() ตรวจและซ่อมค่าที่คลาดเคลื่อน เช่นจาก queryset.update() หรือการลบประวัติ
+  (manage.py reconcile_rollups ทุกคืน)
+"""
+
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Ticket, TicketDailyStat, TicketDailyTransition, TicketStatusHistory
+
+# key ของทั้งสองตาราง: (day, category_id, status, urgency_level, technician/changed_by)
+STAT_FIELDS = ('day', 'category_id', 'status', 'urgency_level', 'technician_id')
+TRANSITION_FIELDS = ('day', 'category_id', 'status', 'urgency_level', 'changed_by_id')
+
+# ฟิลด์ต้นทางที่ตรงกับ key ของแต่ละตาราง (ไม่รวม day)
+STAT_FIELDS_SOURCE = ('category_id', 'status', 'urgency_level', 'assigned_to_id')
+TRANSITION_FIELDS_SOURCE = ('ticket__category_id', 'new_status', 'ticket__urgency_level', 'changed_by_id')
+
+
+def day_of(value):
+    """day bucket ตามเวลาท้องถิ่น"""
+    return timezone.localdate(value)
+
+
+def key_of(ticket):
+    """key ของ Ticket ใน TicketDailyStat (None = ยังไม่ถูกนับ)"""
+    if not ticket.created_at:
+        return None
+    return (day_of(ticket.created_at), ticket.category_id, ticket.status, ticket.urgency_level, ticket.assigned_to_id)
+
+
+def key_before_save(ticket):
+    """key ที่ตารางสรุปรู้จักก่อน save ครั้งนี้ (เรียกก่อน super().save() เหมือน counters.state_before_save)"""
+    if hasattr(ticket, '_rollup_key'):
+        return ticket._rollup_key
+    if ticket._state.adding:
+        return None
+    # โหลดแบบ defer ฟิลด์ที่ใช้นับ - อ่านค่าในฐานข้อมูลแทน
+    row = Ticket.objects.filter(pk=ticket.pk).values_list(
+        'created_at', 'category_id', 'status', 'urgency_level', 'assigned_to_id'
+    ).first()
+    return (day_of(row[0]), *row[1:]) if row else None
+
+
+def _increment(model, fields, key, delta):
+    """เพิ่ม/ลด count ของแถวเดียว (ปลอดภัยเมื่อหลาย process เขียนพร้อมกัน)"""
+    lookup = dict(zip(fields, key))
+    row = model.objects.filter(**lookup)
+    if row.update(count=F('count') + delta) or delta < 0:
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # process อื่นสร้างแถวนี้ไปก่อนแล้ว
+        row.update(count=F('count') + delta)
+
+
+def apply_changes(changes):
+    """
+    ปรับ TicketDailyStat ตามการเปลี่ยนแปลงของ Ticket (ต้องเรียกภายใน transaction เดียวกัน)
+
+    Args:
+        changes: iterable of (old_key, new_key) - None = ไม่มี
+    """
+    deltas = Counter()
+    for old, new in changes:
+        if old == new:
+            continue
+        if old:
+            deltas[old] -= 1
+        if new:
+            deltas[new] += 1
+
+    for key, delta in deltas.items():
+        if delta:
+            _increment(TicketDailyStat, STAT_FIELDS, key, delta)
+
+
+def ticket_saved(ticket, old):
+    """เรียกจาก Ticket.save หลังบันทึกแล้ว (old = key_before_save ก่อนบันทึก)"""
+    new = key_of(ticket)
+    apply_changes([(old, new)])
+    ticket._rollup_key = new
+
+
+def ticket_deleted(ticket):
+    apply_changes([(key_of(ticket), None)])
+
+
+def user_deleted(user):
+    """
+    ลบผู้ใช้ -> ย้ายจำนวนของช่าง/ผู้เปลี่ยนสถานะคนนี้ไป key NULL (เรียกจาก pre_delete)
+
+    Ticket.assigned_to และ TicketStatusHistory.changed_by เป็น SET_NULL - Ticket ยังอยู่
+    แต่แถวสรุปของผู้ใช้ถูกลบตาม (CASCADE) จึงต้องรวมไปไว้ที่ key NULL ก่อน
+    """
+    for model, fields, field in (
+        (TicketDailyStat, STAT_FIELDS, 'technician'),
+        (TicketDailyTransition, TRANSITION_FIELDS, 'changed_by'),
+    ):
+        for row in model.objects.filter(**{field: user}, count__gt=0):
+            key = tuple(getattr(row, f) for f in fields[:-1]) + (None,)
+            _increment(model, fields, key, row.count)
+
+
+def transition_key(history):
+    ticket = history.ticket
+    return (day_of(history.timestamp), ticket.category_id, history.new_status, ticket.urgency_level, history.changed_by_id)
+
+
+def record_transitions(entries):
+    """นับ TicketStatusHistory ที่เพิ่งสร้าง (รวมกรณี bulk_create ที่ไม่มี signal)"""
+    for key, delta in Counter(transition_key(history) for history in entries).items():
+        _increment(TicketDailyTransition, TRANSITION_FIELDS, key, delta)
+
+
+def _grouped(queryset, day_field, fields, chunk_size):
+    """
+    GROUP BY วันท้องถิ่น + fields ทีละช่วง id (chunk_size แถว) แล้วรวมผล
+
+    Returns:
+        Counter key -> count
+    """
+    counts = Counter()
+    last_id = queryset.aggregate(last=Max('id'))['last'] or 0
+    day = TruncDate(day_field, tzinfo=timezone.get_current_timezone())
+
+    for start in range(0, last_id + 1, chunk_size):
+        rows = queryset.filter(id__gte=start, id__lt=start + chunk_size).annotate(
+            day=day
+        ).values_list('day', *fields).annotate(total=Count('id')).order_by()
+        for *key, total in rows:
+            counts[tuple(key)] += total
+
+    return counts
+
+
+def count_stats(chunk_size=50000):
+    return _grouped(Ticket.objects.all(), 'created_at', STAT_FIELDS_SOURCE, chunk_size)
+
+
+def count_transitions(chunk_size=50000):
+    return _grouped(TicketStatusHistory.objects.all(), 'timestamp', TRANSITION_FIELDS_SOURCE, chunk_size)
+
+
+def backfill(chunk_size=50000):
+    """
+    สร้างตารางสรุปใหม่ทั้งหมดจาก tickets และ TicketStatusHistory
+
+    Returns:
+        dict: stats, transitions (จำนวนแถวที่สร้าง)
+    """
+    stats = count_stats(chunk_size)
+    transitions = count_transitions(chunk_size)
+
+    with transaction.atomic():
+        TicketDailyStat.objects.all().delete()
+        TicketDailyStat.objects.bulk_create([
+            TicketDailyStat(count=count, **dict(zip(STAT_FIELDS, key)))
+            for key, count in stats.items()
+        ], batch_size=5000)
+        TicketDailyTransition.objects.all().delete()
+        TicketDailyTransition.objects.bulk_create([
+            TicketDailyTransition(count=count, **dict(zip(TRANSITION_FIELDS, key)))
+            for key, count in transitions.items()
+        ], batch_size=5000)
+
+    return {'stats': len(stats), 'transitions': len(transitions)}
+
+
+def _reconcile_table(model, fields, count, dry_run):
+    # lock แถวเดิมก่อนนับ - การเพิ่ม/ลดที่เกิดระหว่างนับจะรอจน reconcile เสร็จ
+    rows = {
+        tuple(getattr(row, field) for field in fields): row
+        for row in model.objects.select_for_update()
+    }
+    actual = count()
+
+    drift = 0
+    changed = []
+    stale = []
+    for key, row in rows.items():
+        expected = actual.get(key, 0)
+        if row.count != expected:
+            drift += abs(expected - row.count)
+            if expected:
+                row.count = expected
+                changed.append(row)
+            else:
+                stale.append(row.pk)
+
+    missing = [
+        model(count=count, **dict(zip(fields, key)))
+        for key, count in actual.items()
+        if key not in rows
+    ]
+    drift += sum(row.count for row in missing)
+
+    if not dry_run:
+        model.objects.bulk_update(changed, ['count'], batch_size=1000)
+        model.objects.filter(pk__in=stale).delete()
+        model.objects.bulk_create(missing, batch_size=1000)
+
+    return {
+        'checked': len(rows) + len(missing),
+        'drifted': len(changed) + len(stale) + len(missing),
+        'drift': drift,
+    }
+
+
+def reconcile(dry_run=False, chunk_size=50000):
+    """
+    เทียบตารางสรุปกับ tickets/TicketStatusHistory แล้วแก้ให้ตรง
+
+    Returns:
+        dict: table -> {checked (จำนวนแถว), drifted (แถวที่ค่าไม่ตรง), drift (ผลรวม |ส่วนต่าง|)}
+    """
+    with transaction.atomic():
+        return {
+            'ticket_daily_stats': _reconcile_table(
+                TicketDailyStat, STAT_FIELDS, lambda: count_stats(chunk_size), dry_run
+            ),
+            'ticket_daily_transitions': _reconcile_table(
+                TicketDailyTransition, TRANSITION_FIELDS, lambda: count_transitions(chunk_size), dry_run
+            ),
+        }
+
+
+def totals(*fields, **filters):
+    """
+    จำนวน Ticket จาก TicketDailyStat แยกตาม fields (1 query)
+
+    Example:
+        totals('category__name') -> [{'category__name': 'ไฟฟ้า', 'count': 12}, ...]
+    """
+    rows = TicketDailyStat.objects.filter(**filters).values(*fields).annotate(
+        total=Sum('count')
+    ).filter(total__gt=0).order_by()
+    return [
+        {**{field: row[field] for field in fields}, 'count': row['total']}
+        for row in rows
+    ]
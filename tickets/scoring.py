@@ -0,0 +1,135 @@
+"""
+Scoring Engine
+คำนวณคะแนนช่างทุกคนพร้อมกันด้วย NumPy (ใช้ทั้ง AutoDispatcher และ Batch Dispatcher)
+
+- ระยะทางเป็น haversine (เมตร) แทน degree * 111000 ซึ่งคลาดเคลื่อนที่ละติจูดของไทย
+- กลยุทธ์การให้คะแนน (strategy) เลือกได้จาก AssignmentRule.scoring_strategy
+  เพิ่มกลยุทธ์ใหม่ด้วย @register_strategy แล้วเพิ่ม choice ใน AssignmentRule
+
+ข้อตกลงของ array:
+- distance_km เป็น NaN เมื่อไม่ทราบตำแหน่งช่าง -> ได้คะแนนระยะทางกลางๆ 0.5
+- Ticket ที่ไม่มีพิกัดไม่คิดคะแนนระยะทาง (ticket_located = False)
+- ทุกฟังก์ชันเป็น element-wise จึงใช้ได้ทั้ง vector (ช่าง) และ matrix (ticket × ช่าง)
+"""
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+UNKNOWN_DISTANCE_SCORE = 0.5
+
+SCORING_STRATEGIES = {}
+
+# น้ำหนัก priority ตั้งต้นของ Ticket (ใช้ทั้ง AutoDispatcher และ simulator)
+URGENCY_WEIGHTS = {
+    'LOW': 1.0,
+    'MEDIUM': 2.0,
+    'HIGH': 3.0,
+    'CRITICAL': 5.0,
+}
+
+# Category weight (customize based on business rules)
+CATEGORY_WEIGHTS = {
+    'ไฟฟ้า': 1.5,
+    'ประปา': 1.5,
+    'IT/คอมพิวเตอร์': 1.0,
+    'แอร์/ระบายอากาศ': 1.2,
+    'อาคาร/โครงสร้าง': 1.3,
+}
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    """ระยะทาง great-circle (เมตร) รองรับ NumPy broadcasting"""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = (
+        np.sin((lat2 - lat1) / 2.0) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    )
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def base_priority(urgency_level, category_name):
+    """urgency_weight + category_weight (ยังไม่รวม heat และ aging)"""
+    return URGENCY_WEIGHTS.get(urgency_level, 2.0) + CATEGORY_WEIGHTS.get(category_name, 1.0)
+
+
+def register_strategy(name):
+    """Decorator ลงทะเบียน scoring strategy"""
+    def decorator(cls):
+        SCORING_STRATEGIES[name] = cls()
+        return cls
+    return decorator
+
+
+def get_strategy(rule):
+    name = getattr(rule, 'scoring_strategy', None) or 'bucketed'
+    return SCORING_STRATEGIES.get(name, SCORING_STRATEGIES['bucketed'])
+
+
+@register_strategy('bucketed')
+class BucketedStrategy:
+    """
+    กลยุทธ์เดิมของ AutoDispatcher
+
+    ระยะทาง: 0-1km = 1.0, 1-5km = 0.5, >5km = 0.1
+    งาน: 1 - open / max_open_tickets
+    """
+    uses_rating = False
+
+    def distance_score(self, distance_km, rule):
+        # np.where ซ้อนกันเร็วกว่า np.select หลายเท่ากับ array ขนาดเล็ก (NaN ตกไปที่ isnan)
+        return np.where(
+            distance_km <= 1, 1.0,
+            np.where(distance_km <= 5, 0.5, np.where(np.isnan(distance_km), UNKNOWN_DISTANCE_SCORE, 0.1))
+        )
+
+    def workload_score(self, open_tickets, rule):
+        return 1.0 - (open_tickets / rule.max_open_tickets)
+
+    def bonus(self, ratings, rule):
+        return 0.0
+
+
+@register_strategy('linear')
+class LinearStrategy(BucketedStrategy):
+    """ระยะทางลดลงแบบต่อเนื่อง 1.0 ที่ 0km ถึง 0.1 ที่ 5km (ไม่มีขั้นบันได)"""
+
+    def distance_score(self, distance_km, rule):
+        scores = np.clip(1.0 - 0.9 * (distance_km / 5.0), 0.1, 1.0)
+        return np.where(np.isnan(distance_km), UNKNOWN_DISTANCE_SCORE, scores)
+
+
+@register_strategy('rated')
+class RatedStrategy(BucketedStrategy):
+    """แบบ bucketed + โบนัสคะแนนรีวิวเฉลี่ย (±0.1 รอบ 3 ดาว, ไม่มีรีวิว = 0)"""
+    uses_rating = True
+
+    def bonus(self, ratings, rule):
+        if ratings is None:
+            return 0.0
+        return np.nan_to_num((ratings - 3.0) / 20.0)
+
+
+def score_candidates(rule, distance_km, open_tickets, ratings=None, ticket_located=True):
+    """
+    คะแนนรวมของช่างทุกคนในครั้งเดียว
+
+    Args:
+        rule: AssignmentRule
+        distance_km: array ระยะทาง (NaN = ไม่ทราบ)
+        open_tickets: array จำนวนงานเปิด
+        ratings: array คะแนนรีวิวเฉลี่ย (NaN = ไม่มี) หรือ None
+        ticket_located: bool หรือ bool array (broadcast ได้) - Ticket มีพิกัดหรือไม่
+
+    Returns:
+        array ของคะแนน
+    """
+    strategy = get_strategy(rule)
+
+    distance_score = np.where(ticket_located, strategy.distance_score(distance_km, rule), 0.0)
+    workload_score = strategy.workload_score(np.asarray(open_tickets, dtype=float), rule)
+
+    return (
+        distance_score * rule.weight_distance
+        + workload_score * rule.weight_workload
+        + strategy.bonus(ratings, rule)
+    )
@@ -0,0 +1,204 @@
+"""
+Ticket Search
+ค้นหา Ticket ด้วย PostgreSQL full-text search (tickets.search_vector + GIN index) แทน ILIKE '%..%'
+
+- ภาษาไทยไม่มีช่องว่างระหว่างคำ จึงตัดคำก่อนสร้าง tsvector (config 'simple')
+  ใช้ pythainlp ถ้าติดตั้งไว้ ไม่เช่นนั้นแบ่งเป็นคู่ตัวอักษร (bigram) - ข้อความค้นหาตัดแบบเดียวกันเสมอ
+  (ติดตั้ง/ถอด pythainlp แล้วต้องรัน manage.py backfill_search_vectors ใหม่)
+- น้ำหนัก: title = A, description = B, address_description = C
+- Ticket.save ตั้ง search_vector ใหม่เมื่อข้อความเปลี่ยน (ใน query เดียวกับการบันทึก)
+- backfill() สร้างทีละช่วง id (manage.py backfill_search_vectors) และคัดลอกไปยัง TicketListEntry
+- ทุกคำของข้อความค้นหาต้องพบ (&) และคำสุดท้ายเป็น prefix (ค้นได้ระหว่างพิมพ์)
+- similar(): ค้นหาแบบทนคำสะกดต่าง (pg_trgm word similarity) บน title และ address_description
+  (GIN gin_trgm_ops) - หา Ticket ซ้ำตอนแจ้งปัญหาและช่องค้นหาใน admin
+"""
+
+import re
+from functools import reduce
+from operator import add
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import transaction
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Greatest
+from . import list_entries
+from .models import SEARCH_TEXT_FIELDS, Ticket
+
+try:
+    from pythainlp.tokenize import word_tokenize
+except ImportError:  # ไม่มี pythainlp - ใช้ bigram
+    word_tokenize = None
+
+WEIGHTS = ('A', 'B', 'C')
+
+# ฟิลด์ที่มี trigram index (ดู Ticket.Meta.indexes)
+SIMILAR_FIELDS = ('title', 'address_description')
+SIMILAR_MAX_WORDS = 8
+
+THAI = re.compile(r'[\u0E00-\u0E7F]+')
+# ช่วงอักษรไทย (รวมสระ/วรรณยุกต์) หรือคำที่เป็นตัวอักษร/ตัวเลขภาษาอื่น
+TOKEN = re.compile(r'[\u0E00-\u0E7F]+|[^\W_\u0E00-\u0E7F]+')
+
+
+def _split_thai(run):
+    if word_tokenize is not None:
+        return [word for word in word_tokenize(run, engine='newmm', keep_whitespace=False) if word.strip()]
+    if len(run) <= 2:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def words(text):
+    """คำในข้อความตามลำดับ (ภาษาไทยตัดคำ, ภาษาอื่นตัวพิมพ์เล็ก)"""
+    result = []
+    for match in TOKEN.finditer(text or ''):
+        token = match.group()
+        result.extend(_split_thai(token) if THAI.match(token) else [token.lower()])
+    return result
+
+
+def segment(text):
+    """ข้อความ -> คำคั่นด้วยช่องว่างสำหรับ to_tsvector"""
+    return ' '.join(words(text))
+
+
+def vector(title, description, address_description):
+    """expression ของ search_vector จากข้อความของ Ticket"""
+    config = settings.SEARCH_CONFIG
+    parts = [
+        SearchVector(Value(segment(text)), config=config, weight=weight)
+        for text, weight in zip((title, description, address_description), WEIGHTS)
+    ]
+    return parts[0] + parts[1] + parts[2]
+
+
+def _lexeme(word):
+    return "'" + word.replace('\\', '\\\\').replace("'", "''") + "'"
+
+
+def to_query(text):
+    """ข้อความค้นหา -> SearchQuery (None ถ้าไม่มีคำ)"""
+    terms = [_lexeme(word) for word in words(text)]
+    if not terms:
+        return None
+    terms[-1] += ':*'
+    return SearchQuery(' & '.join(terms), search_type='raw', config=settings.SEARCH_CONFIG)
+
+
+def search(queryset, text):
+    """
+    กรอง queryset ของ Ticket ด้วยข้อความค้นหา พร้อม annotate search_rank
+
+    ข้อความที่ไม่มีคำ (เช่นมีแต่เครื่องหมาย) ไม่กรอง และ search_rank = 0
+    """
+    query = to_query(text)
+    if query is None:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+    # ts_rank คืน real (float4) - แปลงเป็น double precision ให้ตรงกับค่าใน cursor ของ pagination
+    # ไม่เช่นนั้น search_rank = ค่าใน cursor ไม่เป็นจริง และหน้าถัดไปเริ่มซ้ำที่แถวสุดท้ายของหน้าก่อน
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+    )
+
+
+def similar(queryset, text, threshold=None):
+    """
+    ค้นหาแบบทนคำสะกดต่าง พร้อม annotate similarity (0-1) เรียงจากคล้ายที่สุด
+
+    แต่ละคำ (คั่นด้วยช่องว่าง) เทียบกับ title และ address_description แยกกัน
+    similarity = ค่าเฉลี่ยของคะแนนที่ดีที่สุดของแต่ละคำ - "แอร์ ตึก SC" ยังพบ Ticket
+    "แอร์ไม่เย็น" ที่ "อาคาร SC" แม้ "ตึก" ไม่ตรง
+
+    แถวที่ได้ต้องมีอย่างน้อยหนึ่งคำที่ผ่าน pg_trgm.word_similarity_threshold (ใช้ GIN index,
+    ตั้งเป็น SEARCH_SIMILARITY_THRESHOLD ทุก connection) threshold ที่ต่ำกว่าค่านี้จึงไม่มีผล
+
+    Args:
+        threshold: similarity ขั้นต่ำ (ค่าเริ่มต้น settings.SEARCH_SIMILARITY_THRESHOLD)
+    """
+    terms = (text or '').split()[:SIMILAR_MAX_WORDS]
+    if not terms:
+        return queryset.none()
+    if threshold is None:
+        threshold = settings.SEARCH_SIMILARITY_THRESHOLD
+
+    matches = Q()
+    scores = []
+    for term in terms:
+        for field in SIMILAR_FIELDS:
+            matches |= Q(**{f'{field}__trigram_word_similar': term})
+        scores.append(Greatest(*(TrigramWordSimilarity(term, field) for field in SIMILAR_FIELDS)))
+
+    similarity = reduce(add, scores) / Value(float(len(scores)))
+    return queryset.filter(matches).annotate(similarity=similarity).filter(
+        similarity__gte=threshold
+    ).order_by('-similarity', '-created_at')
+
+
+def configure_connection(connection):
+    """ตั้ง threshold ของ operator %> (ที่ GIN index ใช้) ให้ตรงกับ SEARCH_SIMILARITY_THRESHOLD"""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+            [str(settings.SEARCH_SIMILARITY_THRESHOLD)]
+        )
+
+
+def text_of(ticket):
+    return tuple(getattr(ticket, field) or '' for field in SEARCH_TEXT_FIELDS)
+
+
+def prepare(ticket, update_fields=None):
+    """
+    เรียกจาก Ticket.save ก่อนบันทึก: ตั้ง search_vector เมื่อข้อความเปลี่ยน
+
+    Returns:
+        update_fields ที่ต้องส่งต่อให้ save (เพิ่ม search_vector ถ้าจำเป็น)
+    """
+    if update_fields is not None and not set(update_fields) & set(SEARCH_TEXT_FIELDS):
+        return update_fields
+
+    text = text_of(ticket)
+    if not ticket._state.adding and getattr(ticket, '_search_text', None) == text:
+        return update_fields
+
+    ticket.search_vector = vector(*text)
+    ticket._search_text = text
+    if update_fields is None:
+        return None
+    return [*update_fields, 'search_vector']
+
+
+def backfill(chunk_size=2000, missing_only=False, progress=None):
+    """
+    สร้าง search_vector ของ Ticket ทีละ chunk_size แถว (เรียงตาม id)
+
+    Args:
+        missing_only: เฉพาะแถวที่ยังไม่มี search_vector
+        progress: callable(จำนวนที่ทำแล้ว, id ล่าสุด) สำหรับแสดงความคืบหน้า
+
+    Returns:
+        จำนวนแถวที่อัปเดต
+    """
+    tickets = Ticket.objects.order_by('id').only('id', *SEARCH_TEXT_FIELDS)
+    if missing_only:
+        tickets = tickets.filter(search_vector__isnull=True)
+
+    last_id = 0
+    updated = 0
+    while True:
+        rows = list(tickets.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return updated
+
+        for ticket in rows:
+            ticket.search_vector = vector(*text_of(ticket))
+        with transaction.atomic():
+            Ticket.objects.bulk_update(rows, ['search_vector'])
+            list_entries.refresh([ticket.id for ticket in rows])
+
+        last_id = rows[-1].id
+        updated += len(rows)
+        if progress:
+            progress(updated, last_id)
@@ -0,0 +1,131 @@
+"""
+Signal handlers ที่ดูแลข้อมูลสรุปของ Ticket ให้ตรงกับตารางหลัก
+(เชื่อมต่อใน TicketsConfig.ready)
+"""
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.conf import settings
+from notify import map_deltas
+from .models import (
+    Attachment, BeforeAfterPhoto, Category, Ticket, TicketFeedback, TicketStatusHistory, TechnicianCategory,
+    TechnicianPresence
+)
+from . import counters, data_cache, heat_grid, list_entries, presence_index, rollups, search, skills, tile_versions
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, raw=False, **kwargs):
+    """Ticket ใหม่ -> เพิ่ม heat count ของช่องกริด, Ticket เปลี่ยน -> cache/tile หมดอายุ และส่ง delta ให้แผนที่สด"""
+    if raw:
+        return  # loaddata
+    if created:
+        heat_grid.record_ticket(instance)
+    data_cache.bump_on_commit()
+    tile_versions.ticket_changed(instance)
+    map_deltas.tickets_changed([instance])
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    """ลบ Ticket -> ลด heat count, ตัวนับงานของช่าง, ตารางสรุปรายวัน และ tile ที่จุดนี้อยู่"""
+    heat_grid.record_ticket(instance, delta=-1)
+    counters.ticket_deleted(instance)
+    rollups.ticket_deleted(instance)
+    data_cache.bump_on_commit()
+    tile_versions.ticket_changed(instance)
+    map_deltas.ticket_deleted(instance.id)
+
+
+@receiver(post_save, sender=TicketStatusHistory)
+def status_history_saved(sender, instance, created, raw=False, **kwargs):
+    """ประวัติสถานะใหม่ -> นับการเปลี่ยนสถานะรายวัน"""
+    if raw or not created:
+        return
+    rollups.record_transitions([instance])
+    data_cache.bump_on_commit()
+
+
+@receiver(post_save, sender=TicketFeedback)
+@receiver(post_delete, sender=TicketFeedback)
+def feedback_changed(sender, raw=False, **kwargs):
+    """รีวิวเปลี่ยน -> cache ของ dashboard หมดอายุ (คะแนนเฉลี่ยของช่าง)"""
+    if raw:
+        return
+    data_cache.bump_on_commit()
+
+
+@receiver(post_save, sender=TechnicianPresence)
+def presence_saved(sender, instance, raw=False, **kwargs):
+    """ตำแหน่ง/สถานะช่างเปลี่ยน -> อัปเดตดัชนีตำแหน่งช่างทุก process"""
+    if raw:
+        return
+    transaction.on_commit(lambda: presence_index.broadcast_presence(
+        instance.technician_id, instance.location, instance.is_available
+    ))
+
+
+@receiver(post_delete, sender=TechnicianPresence)
+def presence_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: presence_index.broadcast_presence(instance.technician_id))
+
+
+@receiver(post_save, sender=TechnicianCategory)
+@receiver(post_delete, sender=TechnicianCategory)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def skills_changed(sender, raw=False, **kwargs):
+    """ทักษะช่างหรือหมวดหมู่เปลี่ยน -> โหลด skill matrix ใหม่ (ทั้งตอนนี้และหลัง commit)"""
+    if raw:
+        return
+    skills.matrix.invalidate()
+    transaction.on_commit(skills.matrix.invalidate)
+
+
+@receiver(post_save, sender=BeforeAfterPhoto)
+@receiver(post_delete, sender=BeforeAfterPhoto)
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def photo_changed(sender, instance, raw=False, origin=None, **kwargs):
+    """รูปของ Ticket เปลี่ยน -> รูปย่อในแถวของหน้ารายการ (ลบทั้ง Ticket - แถวถูกลบตามอยู่แล้ว)"""
+    if raw or isinstance(origin, Ticket):
+        return
+    list_entries.refresh([instance.ticket_id])
+    data_cache.bump_on_commit()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """ชื่อผู้ใช้เปลี่ยน -> ชื่อผู้แจ้ง/ช่างในแถวของหน้ารายการ (login ที่บันทึกแค่ last_login ไม่ต้องทำ)"""
+    if raw or created:
+        return
+    if update_fields is not None and not {'displayname_th', 'username'} & set(update_fields):
+        return
+    list_entries.user_renamed(instance)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    """ลบผู้ใช้ -> Ticket ของช่างยังอยู่ (SET_NULL) ย้ายจำนวนในตารางสรุปไป key NULL ก่อนแถวถูกลบตาม"""
+    rollups.user_deleted(instance)
+    data_cache.bump_on_commit()
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, raw=False, **kwargs):
+    """หมวดใหม่ -> ช่างที่มีครบทุกหมวดได้หมวดนี้ด้วย, ชื่อ/สีหมวดเปลี่ยน -> แถวของหน้ารายการ"""
+    if raw:
+        return
+    if created:
+        skills.category_added(instance)
+        return
+    list_entries.category_changed(instance)
+    data_cache.bump_on_commit()
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    """connection ใหม่ -> ตั้ง threshold ของ trigram search (ดู search.similar)"""
+    search.configure_connection(connection)
@@ -0,0 +1,450 @@
+"""
+Capacity Simulator
+จำลองคิวงานซ่อมแบบ discrete-event เพื่อวางแผนจำนวนช่างและกะทำงาน
+(manage.py simulate_staffing)
+
+- Ticket สังเคราะห์: Poisson ต่อ (Category, urgency_level) ตามอัตราต่อวัน
+  กระจายตามชั่วโมงของวัน (hourly profile) - อัตราปรับจากประวัติ (fit_arrivals) หรือกำหนดเอง
+- ช่าง: จำนวน, กะ (ชั่วโมงเริ่ม-เลิก), ทักษะ, ทำงานทีละใบตามลำดับที่ได้รับ
+  เวลาทำงาน = เดินทางจากจุดประจำ (ระยะทาง / travel_kmh) + service time (lognormal ต่อหมวด)
+  งานที่ได้รับนอกกะจะเริ่มเมื่อกะถัดไปเริ่ม
+- Ticket ใหม่ถูก dispatch ทันทีแบบ AutoDispatcher.dispatch: ให้คะแนนด้วย score_candidates
+  ตัวเดียวกัน และใช้ max_open_tickets เป็นเพดานงานเปิดต่อช่าง
+  ถ้าไม่มีช่างรับได้จะรอในคิว priority (base + aging) จนงานเสร็จหรือเปลี่ยนกะ
+- สถานะทั้งหมดเป็น NumPy array + heap (ไม่มี ORM) - 1M Ticket ใช้เวลาไม่ถึงนาที
+
+SLA breach ตาม Ticket.is_overdue: รอช่างเริ่มงาน (PENDING) เกิน 24 ชม.
+หรือยังไม่เสร็จเมื่อผ่านไป 72 ชม.
+"""
+
+import heapq
+import numpy as np
+from collections import deque
+from datetime import timedelta
+from itertools import count
+from .scoring import EARTH_RADIUS_M, base_priority, get_strategy, score_candidates
+
+URGENCY_LEVELS = ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
+
+# เกณฑ์เดียวกับ Ticket.is_overdue
+PENDING_SLA = timedelta(hours=24).total_seconds()
+OPEN_SLA = timedelta(hours=72).total_seconds()
+
+DEFAULT_SERVICE_HOURS = 2.0
+
+# จำนวน Ticket ที่คำนวณคะแนนล่วงหน้าต่อ NumPy call
+CHUNK = 2048
+
+# จุดกึ่งกลางมหาวิทยาลัยธรรมศาสตร์ ศูนย์รังสิต (ตำแหน่งสังเคราะห์ - ใช้ใน benchmarks ด้วย)
+CAMPUS_LON = 100.605
+CAMPUS_LAT = 14.070
+
+
+def random_points(rng, n, spread_deg=0.02):
+    """สุ่มพิกัด (lon, lat) รอบวิทยาเขต"""
+    return np.column_stack([
+        CAMPUS_LON + rng.normal(0, spread_deg, n),
+        CAMPUS_LAT + rng.normal(0, spread_deg, n),
+    ])
+
+
+def fit_arrivals(since=None, until=None, max_locations=5000):
+    """
+    ปรับอัตราการแจ้งจากประวัติ Ticket
+
+    Returns:
+        arrival model (dict): categories, per_day (C × U), hourly (24),
+        service_hours (C), lonlat (พิกัดตัวอย่างสำหรับสุ่ม)
+    """
+    from django.db.models import Min, Q
+    from django.utils import timezone
+    from .models import Ticket
+
+    tickets = Ticket.objects.all()
+    if since:
+        tickets = tickets.filter(created_at__gte=since)
+    if until:
+        tickets = tickets.filter(created_at__lt=until)
+
+    rows = list(tickets.annotate(
+        accepted_at=Min('status_history__timestamp', filter=Q(status_history__new_status='IN_PROGRESS'))
+    ).values_list('category__name', 'urgency_level', 'created_at', 'location', 'accepted_at', 'completed_at'))
+    if not rows:
+        raise ValueError('No tickets in the selected period')
+
+    categories = sorted({r[0] for r in rows})
+    category_col = {name: i for i, name in enumerate(categories)}
+    created = [timezone.localtime(r[2]) for r in rows]
+    days = max((max(created) - min(created)).total_seconds() / 86400, 1.0)
+
+    counts = np.zeros((len(categories), len(URGENCY_LEVELS)))
+    hourly = np.zeros(24)
+    service = [[] for _ in categories]
+    for row, local in zip(rows, created):
+        c = category_col[row[0]]
+        counts[c, URGENCY_LEVELS.index(row[1]) if row[1] in URGENCY_LEVELS else 1] += 1
+        hourly[local.hour] += 1
+        if row[4] and row[5] and row[5] > row[4]:
+            service[c].append((row[5] - row[4]).total_seconds() / 3600)
+
+    lonlat = np.array([(r[3].x, r[3].y) for r in rows if r[3]], dtype=float).reshape(-1, 2)
+    if len(lonlat) > max_locations:
+        lonlat = lonlat[np.random.default_rng(0).choice(len(lonlat), max_locations, replace=False)]
+
+    return {
+        'categories': categories,
+        'per_day': counts / days,
+        'hourly': hourly / hourly.sum(),
+        'service_hours': np.array([np.median(s) if s else DEFAULT_SERVICE_HOURS for s in service]),
+        'lonlat': lonlat,
+    }
+
+
+def manual_arrivals(rates, service_hours=None, hourly=None):
+    """
+    arrival model จากอัตราที่กำหนดเอง
+
+    Args:
+        rates: dict (category_name, urgency_level) -> Ticket ต่อวัน
+        service_hours: dict category_name -> ชั่วโมงทำงานเฉลี่ย
+        hourly: array 24 ช่อง (None = เท่ากันทุกชั่วโมง)
+    """
+    service_hours = service_hours or {}
+    categories = sorted({name for name, _ in rates} | set(service_hours))
+    per_day = np.zeros((len(categories), len(URGENCY_LEVELS)))
+    for (name, urgency), rate in rates.items():
+        per_day[categories.index(name), URGENCY_LEVELS.index(urgency)] += rate
+
+    hourly = np.ones(24) if hourly is None else np.asarray(hourly, dtype=float)
+    return {
+        'categories': categories,
+        'per_day': per_day,
+        'hourly': hourly / hourly.sum(),
+        'service_hours': np.array([service_hours.get(name, DEFAULT_SERVICE_HOURS) for name in categories]),
+        'lonlat': np.empty((0, 2)),
+    }
+
+
+def scale_arrivals(model, factor):
+    """คูณอัตราการแจ้งทั้งหมด (เช่น ช่วงเปิดภาคเรียน)"""
+    return dict(model, per_day=model['per_day'] * factor)
+
+
+def generate_tickets(model, days, rng, service_sigma=0.5):
+    """
+    สุ่ม Ticket ตาม arrival model เป็นเวลา days วัน
+
+    Returns:
+        dict ของ array เรียงตามเวลาแจ้ง: created (วินาทีจากเริ่มจำลอง), category,
+        urgency, priority, lonlat, service (วินาที)
+    """
+    per_day = model['per_day']
+    cells = per_day.size
+
+    # จำนวน Ticket ต่อ (วัน, ชั่วโมง, หมวด, urgency)
+    rates = model['hourly'][:, None] * per_day.reshape(1, cells)
+    counts = rng.poisson(np.broadcast_to(rates, (int(days), 24, cells)))
+
+    hour_index, cell = np.nonzero(counts.reshape(-1, cells))
+    repeats = counts.reshape(-1, cells)[hour_index, cell]
+    hour_index = np.repeat(hour_index, repeats)
+    cell = np.repeat(cell, repeats)
+
+    created = (hour_index + rng.random(len(hour_index))) * 3600.0
+    order = np.argsort(created, kind='stable')
+    created, cell = created[order], cell[order]
+    category, urgency = np.divmod(cell, len(URGENCY_LEVELS))
+
+    weights = np.array([
+        [base_priority(level, name) for level in URGENCY_LEVELS]
+        for name in model['categories']
+    ])
+
+    if len(model['lonlat']):
+        lonlat = model['lonlat'][rng.integers(0, len(model['lonlat']), len(created))]
+    else:
+        lonlat = random_points(rng, len(created))
+
+    # lognormal ที่ค่าเฉลี่ยเท่ากับ service_hours ของหมวด
+    mean_s = model['service_hours'][category] * 3600.0
+    service = rng.lognormal(np.log(mean_s) - service_sigma ** 2 / 2, service_sigma)
+
+    return {
+        'created': created,
+        'category': category,
+        'urgency': urgency,
+        'priority': weights[category, urgency],
+        'lonlat': lonlat,
+        'service': service,
+    }
+
+
+def parse_shifts(text):
+    """'08-16,16-24' -> [(8, 16), (16, 24)]"""
+    shifts = []
+    for part in filter(None, text.split(',')):
+        start, _, end = part.partition('-')
+        start, end = int(start), int(end)
+        if not (0 <= start < 24 and 0 < end <= 24) or start == end:
+            raise ValueError(f'Invalid shift "{part}" (use HH-HH)')
+        shifts.append((start, end))
+    return shifts
+
+
+def make_technicians(count, n_categories, shifts, rng, skills_per_tech=None):
+    """
+    ช่างสังเคราะห์
+
+    Args:
+        shifts: list ของ (ชั่วโมงเริ่ม, ชั่วโมงเลิก) - ช่างถูกแบ่งเข้ากะแบบวนรอบ
+        skills_per_tech: จำนวนหมวดต่อช่าง (None = ทุกหมวด) - แบ่งแบบวนรอบให้ครบทุกหมวด
+    """
+    shift = np.arange(count) % len(shifts)
+    skills = np.ones((count, n_categories), dtype=bool)
+    if skills_per_tech:
+        skills[:] = False
+        for j in range(min(skills_per_tech, n_categories)):
+            skills[np.arange(count), (np.arange(count) + j) % n_categories] = True
+
+    return {
+        'lonlat': random_points(rng, count),
+        'skills': skills,
+        'shift_start': np.array([shifts[s][0] for s in shift], dtype=float) * 3600,
+        'shift_end': np.array([shifts[s][1] for s in shift], dtype=float) * 3600,
+    }
+
+
+def _on_shift(seconds_of_day, start, end):
+    """ช่างอยู่ในกะหรือไม่ (กะข้ามเที่ยงคืน เช่น 22-06 ได้)"""
+    return np.where(
+        start < end,
+        (start <= seconds_of_day) & (seconds_of_day < end),
+        (seconds_of_day >= start) | (seconds_of_day < end)
+    )
+
+
+def _next_on_shift(t, start, end):
+    """เวลาแรกที่ >= t ที่ช่างอยู่ในกะ"""
+    day, second = divmod(t, 86400.0)
+    if start < end:
+        if start <= second < end:
+            return t
+        return day * 86400.0 + start + (86400.0 if second >= end else 0.0)
+    if second >= start or second < end:
+        return t
+    return day * 86400.0 + start
+
+
+def _unit_vectors(lonlat):
+    """(lon, lat) -> เวกเตอร์หน่วยบนทรงกลม (NaN คงเป็น NaN)"""
+    lon, lat = np.radians(lonlat[:, 0]), np.radians(lonlat[:, 1])
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def _distance_km(units, tech_units):
+    """
+    ระยะทาง great-circle ticket × ช่าง (กม.) - สูตรเดียวกับ haversine_m
+    (sin²(θ/2) = (1 - u·v) / 2) แต่ใช้ matrix product แทน trig ต่อคู่
+    """
+    half_chord = np.clip((1.0 - units @ tech_units.T) / 2.0, 0.0, 1.0)
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(half_chord)) / 1000.0
+
+
+def simulate(tickets, technicians, rule, days, travel_kmh=15.0, aging=None):
+    """
+    จำลองการ dispatch ทั้งช่วงเวลาแบบ discrete-event
+
+    เหตุการณ์: Ticket เข้า (dispatch ทันทีแบบ AutoDispatcher.dispatch ถ้ามีช่างรับได้),
+    งานเสร็จ และเปลี่ยนกะ (มอบหมาย Ticket ที่รอตามลำดับ priority เมื่อมีช่างว่าง)
+
+    Args:
+        tickets: ผลจาก generate_tickets
+        technicians: ผลจาก make_technicians
+        rule: object ที่มี max_open_tickets, weight_distance, weight_workload, scoring_strategy
+        aging: function(age_hours array) -> คะแนนเพิ่ม (priority_queue.aging_term) หรือ None
+
+    Returns:
+        dict ของ metrics
+    """
+    created = tickets['created']
+    lonlat = tickets['lonlat']
+    n = len(created)
+    horizon = days * 86400.0
+
+    # ค่าที่ใช้ทีละตัวใน loop เก็บเป็น list (เร็วกว่าอ่าน scalar จาก NumPy)
+    created_s = created.tolist()
+    category_s = tickets['category'].tolist()
+    service_s = tickets['service'].tolist()
+    cell_s = (tickets['category'] * len(URGENCY_LEVELS) + tickets['urgency']).tolist()
+
+    # คิวแยกตาม (หมวด, urgency): base priority เท่ากันทั้งคิว และ aging เพิ่มตามอายุ
+    # Ticket ที่เก่าสุดจึงอยู่หัวคิวเสมอ - เทียบแค่หัวคิวก็ได้ลำดับ priority_score ที่ถูกต้อง
+    n_cells = max(cell_s, default=-1) + 1
+    cell_priority = np.zeros(n_cells)
+    cell_priority[cell_s] = tickets['priority']
+    queues = [deque() for _ in range(n_cells)]
+
+    tech_units = _unit_vectors(technicians['lonlat'])
+    shift_start = technicians['shift_start']
+    shift_end = technicians['shift_end']
+    shifts = list(zip(shift_start.tolist(), shift_end.tolist()))
+    n_techs = len(tech_units)
+    max_open = rule.max_open_tickets
+
+    # คะแนน workload เทียบกับช่างที่ไม่มีงาน ต่อจำนวนงานเปิด 0..max_open
+    strategy = get_strategy(rule)
+    workload = rule.weight_workload * (
+        strategy.workload_score(np.arange(max_open + 1, dtype=float), rule)
+        - strategy.workload_score(0.0, rule)
+    )
+    skill_penalty = np.where(technicians['skills'].T, 0.0, -np.inf)
+
+    # available[หมวด, ช่าง] = คะแนน workload ปัจจุบัน หรือ -inf ถ้าไม่มีทักษะ/อยู่นอกกะ/งานเต็ม
+    # ปรับเฉพาะคอลัมน์ของช่างที่เปลี่ยน - dispatch จึงเหลือบวก array เดียวกับ argmax
+    open_tickets = np.zeros(n_techs, dtype=np.int64)
+    on_shift = _on_shift(0.0, shift_start, shift_end)
+    penalty = np.where(on_shift, 0.0, -np.inf)
+    available = skill_penalty + penalty
+    free_at = [0.0] * n_techs  # เวลาที่ช่างทำงานในมือเสร็จ
+    busy_s = 0.0
+
+    started = np.full(n, np.nan)
+    finished = np.full(n, np.nan)
+    distance_km = np.full(n, np.nan)
+
+    # คะแนนส่วนระยะทาง (open_tickets = 0) ของ Ticket ครั้งละ CHUNK ใบใน NumPy call เดียว
+    # ช่างออกจากจุดประจำ (base) ทุกงาน ระยะทาง Ticket × ช่างจึงคำนวณล่วงหน้าได้
+    chunk = {'start': 0, 'stop': 0}
+
+    def candidate_scores(i):
+        if chunk['start'] <= i < chunk['stop']:
+            return chunk['scores'][i - chunk['start']], chunk['distances'][i - chunk['start']]
+        xy = lonlat[i:i + CHUNK] if i >= chunk['stop'] else lonlat[i:i + 1]
+        distances = _distance_km(_unit_vectors(xy), tech_units)
+        scores = score_candidates(rule, distances, 0.0, ticket_located=~np.isnan(xy[:, :1]))
+        if i >= chunk['stop']:
+            chunk.update(start=i, stop=i + len(xy), scores=scores, distances=distances)
+        return scores[0], distances[0]
+
+    def set_open(tech, value):
+        open_tickets[tech] = value
+        penalty[tech] = 0.0 if on_shift[tech] and value < max_open else -np.inf
+        available[:, tech] = skill_penalty[:, tech] + (workload[value] + penalty[tech])
+
+    def dispatch(i, now):
+        """ช่างที่ score สูงสุดที่รับได้ตอนนี้ -> มอบหมาย (False ถ้าไม่มี)"""
+        scores, distances = candidate_scores(i)
+        total = scores + available[category_s[i]]
+        tech = int(total.argmax())
+        if total[tech] == -np.inf:
+            return False
+
+        nonlocal busy_s
+        start = _next_on_shift(max(now, free_at[tech]), *shifts[tech])
+        end = start + distances[tech] / travel_kmh * 3600.0 + service_s[i]
+        busy_s += end - start
+        free_at[tech] = end
+        set_open(tech, open_tickets[tech] + 1)
+        heapq.heappush(completions, (end, tech))
+        started[i], finished[i], distance_km[i] = start, end, distances[tech]
+        return True
+
+    completions = []  # heap (เวลาเสร็จ, ช่าง)
+    waiting = 0
+    queue_area = queue_max = 0
+    last_time = 0.0
+
+    def record(now):
+        nonlocal queue_area, last_time
+        queue_area += waiting * (now - last_time)
+        last_time = now
+
+    def drain(now):
+        """มอบหมาย Ticket ที่รอตามลำดับ priority จนกว่าจะไม่มีช่างรับได้"""
+        nonlocal waiting
+        record(now)
+        blocked = set()
+        while waiting and (penalty == 0.0).any():
+            cells = [c for c, q in enumerate(queues) if q and c not in blocked]
+            if not cells:
+                break
+            heads = [queues[c][0] for c in cells]
+            scores = cell_priority[cells]
+            if aging is not None:
+                scores = scores + aging((now - created[heads]) / 3600.0)
+            best = int(np.argmax(scores))
+            if dispatch(heads[best], now):
+                queues[cells[best]].popleft()
+                waiting -= 1
+            else:
+                blocked.add(cells[best])  # ไม่มีช่างหมวดนี้ว่าง
+
+    boundaries = sorted({t % 86400.0 for t in shift_start.tolist() + shift_end.tolist()})
+    shift_changes = (day * 86400.0 + t for day in count() for t in boundaries)
+    next_shift_change = next(shift_changes)
+
+    def advance(until):
+        """ประมวลผลงานเสร็จและการเปลี่ยนกะจนถึงเวลา until"""
+        nonlocal next_shift_change, on_shift, penalty, available
+        while True:
+            done_at = completions[0][0] if completions else np.inf
+            now = min(done_at, next_shift_change)
+            if now > until:
+                return
+            if done_at <= next_shift_change:
+                tech = heapq.heappop(completions)[1]
+                set_open(tech, open_tickets[tech] - 1)
+            else:
+                on_shift = _on_shift(now % 86400.0, shift_start, shift_end)
+                penalty = np.where(on_shift & (open_tickets < max_open), 0.0, -np.inf)
+                available = skill_penalty + (workload[open_tickets] + penalty)
+                next_shift_change = next(shift_changes)
+            if waiting:
+                drain(now)
+
+    arrived = 0
+    for i in range(n):
+        now = created_s[i]
+        if now > horizon:
+            break
+        advance(now)
+        arrived += 1
+        if not dispatch(i, now):
+            record(now)
+            queues[cell_s[i]].append(i)
+            waiting += 1
+            queue_max = max(queue_max, waiting)
+
+    advance(horizon)
+    record(horizon)
+
+    shift_hours = np.where(shift_start < shift_end, shift_end - shift_start, 86400 - shift_start + shift_end)
+    return summarize(
+        created[:arrived], started[:arrived], finished[:arrived], distance_km[:arrived],
+        horizon, busy_s / (shift_hours.sum() * days),
+        queue_area / horizon, queue_max
+    )
+
+
+def summarize(created, started, finished, distance_km, horizon, utilization, mean_queue, max_queue):
+    # เทียบเกณฑ์ที่ horizon สำหรับงานที่ยังไม่เริ่ม/ไม่เสร็จ
+    start = np.where(np.isnan(started), horizon, started)
+    end = np.where(np.isnan(finished) | (finished > horizon), horizon, finished)
+    breached = (start - created > PENDING_SLA) | (end - created > OPEN_SLA)
+    waited = (started - created)[~np.isnan(started)] / 60
+
+    def pct(values, q):
+        return float(np.percentile(values, q)) if len(values) else 0.0
+
+    return {
+        'tickets': len(created),
+        'assigned': int((~np.isnan(started)).sum()),
+        'completed': int((finished <= horizon).sum()),
+        'sla_breach_rate': float(breached.mean()) if len(created) else 0.0,
+        'mean_wait_min': float(waited.mean()) if len(waited) else 0.0,
+        'p95_wait_min': pct(waited, 95),
+        'mean_km': float(np.nanmean(distance_km)) if (~np.isnan(distance_km)).any() else 0.0,
+        'mean_queue': float(mean_queue),
+        'max_queue': int(max_queue),
+        'utilization': float(min(utilization, 1.0)),
+    }
@@ -0,0 +1,122 @@
+"""
+Technician Skill Matrix
+ทักษะของช่าง (TechnicianCategory) เก็บเป็น bitmask ในหน่วยความจำ
+ให้ dispatcher คัดช่างที่ไม่มีทักษะตรงหมวดออกก่อนคำนวณระยะทางหรือ workload
+
+- 1 bit ต่อ Category ที่ active (เรียงตาม id) เก็บเป็น uint64 หลาย word ต่อช่าง
+- ช่างที่ไม่มีแถวทักษะเลยถือเป็นช่างทั่วไป (รับได้ทุกหมวด)
+- เพิ่มหมวดใหม่ -> ช่างที่มีทักษะครบทุกหมวดที่ active อยู่เดิมได้หมวดใหม่ด้วย (category_added)
+- Ticket ในหมวดที่ไม่ active หรือไม่อยู่ใน matrix ไม่กรองช่าง
+- โหลดใหม่เมื่อทักษะ/หมวดเปลี่ยน (signals) หรือเมื่ออายุเกิน SKILL_CACHE_SECONDS
+  (process อื่นจะเห็นการเปลี่ยนแปลงภายในช่วงเวลานี้)
+"""
+
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from django.db.models import Count
+
+WORD_BITS = 64
+
+
+class SkillMatrix:
+    """bitmask ทักษะของช่างทุกคน (ใช้ผ่าน instance กลาง ``matrix``)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self.bits = {}
+        self.ids = np.empty(0, dtype=np.int64)
+        self.masks = np.zeros((0, 1), dtype=np.uint64)
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < settings.SKILL_CACHE_SECONDS:
+            return
+        with self._lock:
+            if self._loaded_at is loaded_at:
+                self._load()
+
+    def _load(self):
+        from .models import Category, TechnicianCategory
+
+        category_ids = Category.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)
+        bits = {category_id: bit for bit, category_id in enumerate(category_ids)}
+        words = max(1, -(-len(bits) // WORD_BITS))
+
+        rows = list(TechnicianCategory.objects.values_list('technician_id', 'category_id'))
+        ids = np.unique(np.array([technician_id for technician_id, _ in rows], dtype=np.int64))
+        masks = np.zeros((len(ids), words), dtype=np.uint64)
+
+        for technician_id, category_id in rows:
+            bit = bits.get(category_id)
+            if bit is None:
+                continue
+            row = np.searchsorted(ids, technician_id)
+            masks[row, bit // WORD_BITS] |= np.uint64(1) << np.uint64(bit % WORD_BITS)
+
+        self.bits, self.ids, self.masks = bits, ids, masks
+        self._loaded_at = time.monotonic()
+
+    def _has_bit(self, bit):
+        """bool array ขนานกับ self.ids - ช่างคนไหนมีทักษะ bit นี้"""
+        word = self.masks[:, bit // WORD_BITS]
+        return ((word >> np.uint64(bit % WORD_BITS)) & np.uint64(1)).astype(bool)
+
+    def eligible(self, technician_ids, category_id):
+        """
+        ช่างคนไหนรับงานหมวดนี้ได้
+
+        Args:
+            technician_ids: array ของ technician id
+
+        Returns:
+            bool array ขนานกับ technician_ids
+        """
+        self._ensure_loaded()
+        technician_ids = np.asarray(technician_ids, dtype=np.int64)
+        bit = self.bits.get(category_id)
+        if bit is None or len(self.ids) == 0:
+            return np.ones(len(technician_ids), dtype=bool)
+
+        rows = np.searchsorted(self.ids, technician_ids)
+        rows = np.minimum(rows, len(self.ids) - 1)
+        known = self.ids[rows] == technician_ids
+        return ~known | self._has_bit(bit)[rows]
+
+    def ineligible_ids(self, category_id):
+        """technician id ที่มีแถวทักษะแต่ไม่มีหมวดนี้ (ใช้ exclude ใน query)"""
+        self._ensure_loaded()
+        bit = self.bits.get(category_id)
+        if bit is None:
+            return []
+        return self.ids[~self._has_bit(bit)].tolist()
+
+
+matrix = SkillMatrix()
+
+
+def category_added(category):
+    """
+    หมวดใหม่ -> เพิ่มแถวทักษะหมวดนี้ให้ช่างที่มีครบทุกหมวดที่ active อยู่เดิม (เรียกจาก post_save ของ Category)
+
+    ไม่เช่นนั้นช่างที่ admin ให้ครบทุกหมวดจะกลายเป็นรับหมวดใหม่ไม่ได้ และหมวดใหม่อาจไม่มีช่างรับเลย
+    """
+    from .models import Category, TechnicianCategory
+
+    others = Category.objects.filter(is_active=True).exclude(pk=category.pk)
+    total = others.count()
+    if not total:
+        return
+    full = TechnicianCategory.objects.filter(category__in=others).values('technician_id').annotate(
+        categories=Count('category_id')
+    ).filter(categories=total).values_list('technician_id', flat=True)
+    TechnicianCategory.objects.bulk_create([
+        TechnicianCategory(technician_id=technician_id, category=category)
+        for technician_id in full
+    ], ignore_conflicts=True)
+    matrix.invalidate()
@@ -3,11 +3,38 @@ Test Suite for TU Report
 Coverage target: ≥80%
 """
 
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock, skipUnless
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import json
+import tempfile
+from pathlib import Path
+import numpy as np
+from django.db import connection, connections, transaction
+from django.core.cache import cache
 from django.contrib.gis.geos import Point
 from django.contrib.auth import get_user_model
-from .models import Ticket, Category, TechnicianPresence, AssignmentRule
-from .dispatcher import AutoDispatcher
+from django.utils import timezone
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from notify import map_deltas
+from notify.consumers import MapConsumer
+from notify.models import Notification
+from .models import (
+    Ticket, Category, TechnicianPresence, AssignmentRule, DispatchJob, TicketStatusHistory,
+    TechnicianCategory, TicketFeedback, TicketDailyStat, TicketDailyTransition, TicketListEntry, BeforeAfterPhoto
+)
+from .batch_dispatch import solve_batch
+from .dispatcher import AutoDispatcher, CapacityContention
+from .dispatch_queue import enqueue_dispatch, process_next_job
+from .query import TicketQuery, status_counts, user_status_counts
+from . import (
+    counters, data_cache, heat_grid, list_entries, pagination, presence_index, priority_queue, replay, rollups, search,
+    simulator, skills, tile_versions
+)
 
 User = get_user_model()
 
@@ -166,6 +193,1686 @@ class AutoDispatcherTestCase(TestCase):
         # Should assign to tech2 despite being farther (better workload)
         self.assertIsNotNone(ticket.assigned_to)
 
+    def test_candidate_selection_query_count_is_constant(self):
+        """Test candidate selection does not issue queries per technician"""
+        ticket = Ticket.objects.create(
+            title='New Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.605, 14.070, srid=4326)
+        )
+
+        with CaptureQueriesContext(connection) as few:
+            technician, _ = self.dispatcher.find_best_technician(ticket)
+        self.assertEqual(technician, self.tech1)
+
+        for i in range(20):
+            tech = User.objects.create_user(
+                username=f'extra_tech{i}',
+                password='pass123',
+                role='technician'
+            )
+            TechnicianPresence.objects.create(
+                technician=tech,
+                location=Point(100.650 + i * 0.001, 14.100, srid=4326),
+                is_available=True
+            )
+
+        with CaptureQueriesContext(connection) as many:
+            technician, _ = self.dispatcher.find_best_technician(ticket)
+        self.assertEqual(technician, self.tech1)
+
+        self.assertEqual(len(few), len(many))
+
+    def test_unavailable_technician_is_skipped(self):
+        """Test technicians who paused new jobs are not candidates"""
+        TechnicianPresence.objects.filter(technician=self.tech1).update(is_available=False)
+
+        ticket = Ticket.objects.create(
+            title='New Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.605, 14.070, srid=4326)
+        )
+
+        technician, _ = self.dispatcher.find_best_technician(ticket)
+        self.assertEqual(technician, self.tech2)
+
+    def test_lost_reservation_falls_back_to_next_technician(self):
+        """Test a technician filled between scoring and assignment is not overbooked"""
+        for i in range(4):
+            Ticket.objects.create(
+                title=f'Ticket {i}',
+                description='Test',
+                category=self.category,
+                created_by=self.user,
+                assigned_to=self.tech1,
+                status='IN_PROGRESS'
+            )
+
+        ticket = Ticket.objects.create(
+            title='New Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.605, 14.070, srid=4326)  # Same as tech1
+        )
+
+        # ช่างถูกคัดเลือกตอนที่ tech1 ยังว่าง 1 ช่อง
+        stale_candidates = self.dispatcher.load_candidates(ticket)
+
+        # dispatcher อื่นมอบหมายงานที่ 5 ให้ tech1 ไปก่อน
+        Ticket.objects.create(
+            title='Concurrent Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            assigned_to=self.tech1,
+            status='PENDING'
+        )
+
+        with mock.patch.object(self.dispatcher, 'load_candidates', return_value=stale_candidates):
+            success = self.dispatcher.dispatch(ticket)
+
+        self.assertTrue(success)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.assigned_to, self.tech2)
+        self.assertEqual(
+            Ticket.objects.filter(assigned_to=self.tech1, status__in=['PENDING', 'IN_PROGRESS']).count(),
+            5
+        )
+
+    def test_skill_matrix_filters_candidates(self):
+        """Test technicians without the ticket's category are not considered"""
+        plumbing = Category.objects.create(name='ประปา')
+        TechnicianCategory.objects.create(technician=self.tech1, category=plumbing)  # tech1 = ช่างประปาเท่านั้น
+
+        electrical = Ticket.objects.create(
+            title='Electrical',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.605, 14.070, srid=4326)  # Same as tech1
+        )
+        technician, _ = self.dispatcher.find_best_technician(electrical)
+        self.assertEqual(technician, self.tech2)  # tech2 ไม่มีแถวทักษะ = ช่างทั่วไป
+
+        water = Ticket.objects.create(
+            title='Water',
+            description='Test',
+            category=plumbing,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.605, 14.070, srid=4326)
+        )
+        technician, _ = self.dispatcher.find_best_technician(water)
+        self.assertEqual(technician, self.tech1)
+
+        TechnicianCategory.objects.create(technician=self.tech2, category=plumbing)
+        assigned = self.dispatcher.dispatch_batch([electrical])
+        self.assertEqual(assigned, [])  # ไม่มีช่างไฟฟ้าเหลือ
+
+    def test_category_added_after_technician_holds_every_category(self):
+        """Test technicians holding every category also get a category added later"""
+        plumbing = Category.objects.create(name='ประปา')
+        for category in (self.category, plumbing):
+            TechnicianCategory.objects.create(technician=self.tech1, category=category, proficiency=3)
+        TechnicianCategory.objects.create(technician=self.tech2, category=plumbing)  # ช่างประปาเท่านั้น
+
+        network = Category.objects.create(name='เครือข่าย')
+        ticket = Ticket.objects.create(
+            title='Network',
+            description='Test',
+            category=network,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.605, 14.070, srid=4326)
+        )
+        self.assertEqual(skills.matrix.ineligible_ids(network.id), [self.tech2.id])
+        technician, _ = self.dispatcher.find_best_technician(ticket)
+        self.assertEqual(technician, self.tech1)
+        self.assertEqual(TechnicianCategory.objects.get(technician=self.tech1, category=plumbing).proficiency, 3)
+
+    def test_technician_without_location_scores_neutral(self):
+        """Test technicians with unknown position get the neutral distance score"""
+        tech3 = User.objects.create_user(
+            username='tech003',
+            password='pass123',
+            role='technician'
+        )
+        TechnicianPresence.objects.create(technician=tech3, location=None, is_available=True)
+
+        ticket = Ticket.objects.create(
+            title='Far Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.700, 14.150, srid=4326)  # >5km from tech1 and tech2
+        )
+
+        technician, _ = self.dispatcher.find_best_technician(ticket)
+        self.assertEqual(technician, tech3)
+
+    def test_linear_scoring_strategy(self):
+        """Test the linear strategy separates technicians inside the same distance bucket"""
+        ticket = Ticket.objects.create(
+            title='New Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.625, 14.090, srid=4326)  # 1-5km from both technicians
+        )
+
+        technician, _ = self.dispatcher.find_best_technician(ticket)
+        self.assertEqual(technician, self.tech1)  # bucketed: tie -> first candidate
+
+        self.rule.scoring_strategy = 'linear'
+        self.rule.save()
+        technician, _ = AutoDispatcher().find_best_technician(ticket)
+        self.assertEqual(technician, self.tech2)  # nearer
+
+    def test_dispatch_batch_respects_capacity(self):
+        """Test batch dispatch fills free slots without exceeding max_open_tickets"""
+        tickets = [
+            Ticket.objects.create(
+                title=f'Backlog {i}',
+                description='Test',
+                category=self.category,
+                created_by=self.user,
+                urgency_level='MEDIUM',
+                location=Point(100.605, 14.070, srid=4326)
+            )
+            for i in range(12)
+        ]
+
+        assigned = self.dispatcher.dispatch_batch(tickets)
+
+        self.assertEqual(len(assigned), 10)  # 2 technicians x 5 slots
+        for tech in (self.tech1, self.tech2):
+            self.assertEqual(Ticket.objects.filter(assigned_to=tech).count(), 5)
+        self.assertEqual(
+            TicketStatusHistory.objects.filter(comment__startswith='[Batch Dispatcher]').count(),
+            10
+        )
+
+    def test_solve_batch_caps_eligible_tickets_only(self):
+        """Test tickets nobody can take do not use up free slots"""
+        ticket_xy = np.array([(100.605, 14.070), (100.615, 14.080)])
+        tech_xy = np.array([(100.605, 14.070)])
+        tech_open = np.array([self.rule.max_open_tickets - 1])  # เหลือช่องเดียว
+        eligible = np.array([[False], [True]])
+
+        assignments = solve_batch(ticket_xy, tech_xy, tech_open, self.rule, eligible=eligible)
+
+        self.assertEqual([(ticket_idx, tech_idx) for ticket_idx, tech_idx, _, _ in assignments], [(1, 0)])
+
+    def test_dispatch_with_warm_position_index(self):
+        """Test dispatcher uses the in-memory index when it is warm"""
+        index = presence_index.TechnicianPositionIndex()
+        index.warm()
+
+        ticket = Ticket.objects.create(
+            title='New Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.615, 14.080, srid=4326)  # <1km from tech2, >1km from tech1
+        )
+
+        with mock.patch.object(presence_index, 'index', index):
+            technician, _ = self.dispatcher.find_best_technician(ticket)
+
+        self.assertEqual(technician, self.tech2)
+
+    @override_settings(DISPATCH_CANDIDATE_K=1)
+    def test_warm_index_skips_full_technicians_before_cutting_k(self):
+        """Test the k nearest are taken among technicians with free capacity"""
+        index = presence_index.TechnicianPositionIndex()
+        index.warm()
+        TechnicianPresence.objects.filter(technician=self.tech1).update(open_tickets=self.rule.max_open_tickets)
+
+        ticket = Ticket.objects.create(
+            title='New Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            urgency_level='MEDIUM',
+            location=Point(100.605, 14.070, srid=4326)  # Same as tech1
+        )
+
+        with mock.patch.object(presence_index, 'index', index):
+            technician, _ = self.dispatcher.find_best_technician(ticket)
+
+        self.assertEqual(technician, self.tech2)
+
+    def test_position_index_nearest_and_updates(self):
+        """Test index ordering, availability flags and in-place updates"""
+        index = presence_index.TechnicianPositionIndex()
+        index.warm()
+
+        ids, distances = index.nearest(100.605, 14.070, k=5)
+        self.assertEqual(list(ids), [self.tech1.id, self.tech2.id])
+        self.assertAlmostEqual(distances[0], 0.0)
+
+        ids, _ = index.nearest(100.605, 14.070, k=5, radius_km=0.5)
+        self.assertEqual(list(ids), [self.tech1.id])
+
+        index.apply(self.tech1.id, 100.605, 14.070, is_available=False)
+        ids, _ = index.nearest(100.605, 14.070, k=5)
+        self.assertEqual(list(ids), [self.tech2.id])
+
+        index.apply(self.tech2.id, None, None)
+        ids, _ = index.nearest(100.605, 14.070, k=5)
+        self.assertEqual(len(ids), 0)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'ต้องใช้ PostgreSQL (advisory lock และ transaction พร้อมกันจริง)')
+class ConcurrentDispatchTestCase(TransactionTestCase):
+    """Stress test: dispatch พร้อมกันหลาย thread ต้องไม่เกิน max_open_tickets"""
+
+    TECHNICIANS = 10
+    TICKETS = 200
+    WORKERS = 16
+
+    def setUp(self):
+        self.rule = AssignmentRule.objects.create(
+            max_open_tickets=5,
+            weight_distance=0.6,
+            weight_workload=0.4,
+            is_active=True
+        )
+        category = Category.objects.create(name='ไฟฟ้า')
+        user = User.objects.create_user(username='user001', password='pass123', role='user')
+
+        self.technicians = []
+        for i in range(self.TECHNICIANS):
+            tech = User.objects.create_user(
+                username=f'tech{i:03d}',
+                password='pass123',
+                role='technician'
+            )
+            TechnicianPresence.objects.create(
+                technician=tech,
+                location=Point(100.605 + i * 0.001, 14.070, srid=4326),
+                is_available=True
+            )
+            self.technicians.append(tech)
+
+        # ทุก Ticket อยู่จุดเดียวกัน -> ทุก dispatcher อยากได้ช่างคนเดียวกัน
+        self.ticket_ids = [
+            Ticket.objects.create(
+                title=f'Power failure {i}',
+                description='Test',
+                category=category,
+                created_by=user,
+                urgency_level='HIGH',
+                location=Point(100.605, 14.070, srid=4326)
+            ).id
+            for i in range(self.TICKETS)
+        ]
+
+    def _dispatch(self, ticket_id):
+        try:
+            while True:
+                try:
+                    with transaction.atomic():
+                        ticket = Ticket.objects.select_related('category').get(id=ticket_id)
+                        return AutoDispatcher().dispatch(ticket)
+                except CapacityContention:
+                    continue  # เหมือน DispatchJob ที่ถูกหยิบขึ้นมาทำใหม่
+        finally:
+            connections.close_all()
+
+    def test_capacity_is_never_exceeded(self):
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(self._dispatch, self.ticket_ids))
+
+        capacity = self.TECHNICIANS * self.rule.max_open_tickets
+        self.assertEqual(sum(results), capacity)
+        for tech in self.technicians:
+            self.assertEqual(Ticket.objects.filter(assigned_to=tech).count(), self.rule.max_open_tickets)
+
+
+class DispatchQueueTestCase(TestCase):
+    """Test background dispatch queue"""
+
+    def setUp(self):
+        # ทดสอบคิวเหมือนมี channel layer ข้าม process (Redis)
+        patcher = mock.patch('tickets.dispatch_queue.can_stay_coherent', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า')
+
+        self.user = User.objects.create_user(
+            username='user001',
+            password='pass123',
+            role='user'
+        )
+
+        self.tech = User.objects.create_user(
+            username='tech001',
+            password='pass123',
+            role='technician'
+        )
+        TechnicianPresence.objects.create(
+            technician=self.tech,
+            location=Point(100.605, 14.070, srid=4326),
+            is_available=True
+        )
+
+    def test_create_ticket_only_enqueues(self):
+        """Test create_ticket returns without assigning a technician"""
+        self.client.login(username='user001', password='pass123')
+
+        response = self.client.post('/tickets/create/', {
+            'title': 'Test Ticket',
+            'description': 'Test Description',
+            'category': self.category.id,
+            'urgency_level': 'MEDIUM',
+            'address_description': 'Test Address',
+        })
+
+        self.assertEqual(response.status_code, 302)
+        ticket = Ticket.objects.get()
+        self.assertIsNone(ticket.assigned_to)
+        self.assertTrue(DispatchJob.objects.filter(ticket=ticket, status='QUEUED').exists())
+
+    def test_worker_assigns_queued_ticket(self):
+        """Test worker drains the queue and assigns the ticket"""
+        ticket = Ticket.objects.create(
+            title='Test Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            location=Point(100.605, 14.070, srid=4326)
+        )
+        job = enqueue_dispatch(ticket, requested_by=self.user)
+
+        processed = process_next_job()
+
+        self.assertEqual(processed.id, job.id)
+        self.assertIsNone(process_next_job())  # Queue is empty
+
+        job.refresh_from_db()
+        ticket.refresh_from_db()
+        self.assertEqual(job.status, 'DONE')
+        self.assertEqual(ticket.assigned_to, self.tech)
+
+    def test_worker_skips_cancelled_ticket(self):
+        """Test ticket cancelled while queued is not assigned"""
+        ticket = Ticket.objects.create(
+            title='Test Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user
+        )
+        job = enqueue_dispatch(ticket)
+        Ticket.objects.filter(id=ticket.id).update(status='REJECTED')
+
+        process_next_job()
+
+        job.refresh_from_db()
+        ticket.refresh_from_db()
+        self.assertEqual(job.status, 'DONE')
+        self.assertIsNone(ticket.assigned_to)
+
+    @override_settings(DISPATCH_RETRY_DELAY=5)
+    def test_failed_job_waits_before_retry(self):
+        """Test a failed job backs off exponentially instead of being retried immediately"""
+        ticket = Ticket.objects.create(
+            title='Test Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user
+        )
+        job = enqueue_dispatch(ticket)
+
+        with mock.patch('tickets.dispatch_queue.AutoDispatcher.dispatch', side_effect=RuntimeError('lock timeout')):
+            self.assertEqual(process_next_job().id, job.id)
+            self.assertIsNone(process_next_job())  # ยังไม่ถึงเวลาลองใหม่
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('QUEUED', 1))
+        self.assertGreater(job.available_at, timezone.now() + timedelta(seconds=4))
+
+        DispatchJob.objects.filter(id=job.id).update(available_at=timezone.now())
+        self.assertEqual(process_next_job().id, job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'DONE')
+
+    def test_inline_dispatch_without_cross_process_channel_layer(self):
+        """Test a process-local channel layer dispatches inline instead of leaving the reporter waiting"""
+        ticket = Ticket.objects.create(
+            title='Test Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user
+        )
+
+        with mock.patch('tickets.dispatch_queue.can_stay_coherent', return_value=False):
+            job = enqueue_dispatch(ticket)
+
+        self.assertEqual(job.status, 'DONE')
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.assigned_to, self.tech)
+
+    @override_settings(DISPATCH_ASYNC=False)
+    def test_inline_dispatch_when_async_disabled(self):
+        """Test DISPATCH_ASYNC=False assigns within the request"""
+        ticket = Ticket.objects.create(
+            title='Test Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user
+        )
+
+        job = enqueue_dispatch(ticket)
+
+        self.assertEqual(job.status, 'DONE')
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.assigned_to, self.tech)
+
+
+class TechnicianCounterTestCase(TestCase):
+    """Test denormalized ticket counters on TechnicianPresence"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(
+            username='user001',
+            password='pass123',
+            role='user'
+        )
+        self.tech1 = User.objects.create_user(username='tech001', password='pass123', role='technician')
+        self.tech2 = User.objects.create_user(username='tech002', password='pass123', role='technician')
+
+    def counts(self, tech):
+        presence = TechnicianPresence.objects.get(technician=tech)
+        return {field: getattr(presence, field) for field in counters.COUNTER_FIELDS}
+
+    def assertConsistent(self):
+        for tech in (self.tech1, self.tech2):
+            expected = counters.recount([tech.id]).get(tech.id, dict.fromkeys(counters.COUNTER_FIELDS, 0))
+            self.assertEqual(self.counts(tech), expected)
+
+    def test_lifecycle_keeps_counters_in_sync(self):
+        """Test assignment, transitions, reassignment and deletion"""
+        ticket = Ticket.objects.create(
+            title='Test Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            assigned_to=self.tech1
+        )
+        self.assertEqual(self.counts(self.tech1)['open_tickets'], 1)
+        self.assertEqual(self.counts(self.tech1)['pending_tickets'], 1)
+
+        ticket.status = 'WORKING'
+        ticket.save()
+        self.assertEqual(self.counts(self.tech1)['pending_tickets'], 0)
+        self.assertEqual(self.counts(self.tech1)['in_progress_tickets'], 1)
+
+        # reassign (โหลดใหม่จากฐานข้อมูล)
+        ticket = Ticket.objects.get(id=ticket.id)
+        ticket.assigned_to = self.tech2
+        ticket.save()
+        self.assertEqual(self.counts(self.tech1)['open_tickets'], 0)
+        self.assertEqual(self.counts(self.tech2)['in_progress_tickets'], 1)
+
+        ticket.status = 'CLOSED'
+        ticket.save()
+        self.assertEqual(self.counts(self.tech2)['open_tickets'], 0)
+        self.assertEqual(self.counts(self.tech2)['completed_tickets'], 1)
+        self.assertConsistent()
+
+        ticket.delete()
+        self.assertEqual(self.counts(self.tech2)['completed_tickets'], 0)
+        self.assertConsistent()
+
+    def test_deleting_technician_keeps_their_tickets_counted(self):
+        """Test deleting a user moves their rollup rows to the NULL key like the tickets themselves"""
+        ticket = Ticket.objects.create(
+            title='Assigned', description='Test', category=self.category, created_by=self.user,
+            assigned_to=self.tech
+        )
+        TicketStatusHistory.objects.create(
+            ticket=ticket, old_status='PENDING', new_status='IN_PROGRESS', changed_by=self.tech
+        )
+
+        self.tech.delete()
+
+        self.assertEqual(
+            {r['technician_id']: r['count'] for r in rollups.totals('technician_id')},
+            {None: 1}
+        )
+        result = rollups.reconcile(dry_run=True)
+        self.assertEqual(result['ticket_daily_stats']['drifted'], 0)
+        self.assertEqual(result['ticket_daily_transitions']['drifted'], 0)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        """Test reconcile_counters repairs drift and reports its size"""
+        for i in range(3):
+            Ticket.objects.create(
+                title=f'Ticket {i}',
+                description='Test',
+                category=self.category,
+                created_by=self.user,
+                assigned_to=self.tech1
+            )
+        TechnicianPresence.objects.filter(technician=self.tech1).update(open_tickets=7)
+
+        result = counters.reconcile(dry_run=True)
+        self.assertEqual(result['drifted'], 1)
+        self.assertEqual(result['drift'], {'open_tickets': 4})
+        self.assertEqual(self.counts(self.tech1)['open_tickets'], 7)
+
+        counters.reconcile()
+        self.assertConsistent()
+        self.assertEqual(counters.reconcile()['drifted'], 0)
+
+
+class TicketRollupTestCase(TestCase):
+    """Test daily rollups stay equal to a rebuild from tickets and status history"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.tech = User.objects.create_user(username='tech001', password='pass123', role='technician')
+
+    def snapshot(self):
+        stats = {
+            tuple(getattr(row, f) for f in rollups.STAT_FIELDS): row.count
+            for row in TicketDailyStat.objects.filter(count__gt=0)
+        }
+        transitions = {
+            tuple(getattr(row, f) for f in rollups.TRANSITION_FIELDS): row.count
+            for row in TicketDailyTransition.objects.filter(count__gt=0)
+        }
+        return stats, transitions
+
+    def assertMatchesBackfill(self):
+        incremental = self.snapshot()
+        rollups.backfill(chunk_size=2)  # หลายช่วง id
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_incremental_updates_match_backfill(self):
+        """Test create, status transitions, reassignment and delete keep rollups exact"""
+        tickets = [
+            Ticket.objects.create(
+                title=f'Ticket {i}',
+                description='Test',
+                category=self.category,
+                created_by=self.user,
+                urgency_level='HIGH' if i % 2 else 'LOW'
+            )
+            for i in range(5)
+        ]
+
+        for ticket in tickets[:3]:
+            ticket.assigned_to = self.tech
+            ticket.status = 'IN_PROGRESS'
+            ticket.save()
+            TicketStatusHistory.objects.create(
+                ticket=ticket, old_status='PENDING', new_status='IN_PROGRESS', changed_by=self.tech
+            )
+
+        # โหลดใหม่จากฐานข้อมูล (key เดิมมาจาก from_db)
+        ticket = Ticket.objects.get(id=tickets[0].id)
+        ticket.status = 'COMPLETED'
+        ticket.save()
+        Ticket.objects.get(id=tickets[1].id).delete()
+
+        self.assertEqual(
+            {r['status']: r['count'] for r in rollups.totals('status')},
+            {'PENDING': 2, 'IN_PROGRESS': 1, 'COMPLETED': 1}
+        )
+        self.assertEqual(
+            {r['urgency_level']: r['count'] for r in rollups.totals('urgency_level', status='PENDING')},
+            {'HIGH': 1, 'LOW': 1}
+        )
+        self.assertEqual(
+            sum(r.count for r in TicketDailyTransition.objects.filter(changed_by=self.tech)), 3
+        )
+
+        # ลบ Ticket ลบประวัติด้วย - การนับการเปลี่ยนสถานะซ่อมโดย reconcile
+        rollups.reconcile()
+        self.assertMatchesBackfill()
+
+    def test_new_ticket_is_counted_without_reconcile(self):
+        """Test creating a ticket (also already assigned) increments its bucket immediately"""
+        Ticket.objects.create(title='New', description='Test', category=self.category, created_by=self.user)
+        Ticket.objects.create(
+            title='Assigned', description='Test', category=self.category, created_by=self.user,
+            assigned_to=self.tech
+        )
+        self.assertEqual(rollups.totals('status'), [{'status': 'PENDING', 'count': 2}])
+        self.assertEqual(
+            {r['technician_id']: r['count'] for r in rollups.totals('technician_id')},
+            {None: 1, self.tech.id: 1}
+        )
+
+    def test_deleting_technician_keeps_their_tickets_counted(self):
+        """Test deleting a user moves their rollup rows to the NULL key like the tickets themselves"""
+        ticket = Ticket.objects.create(
+            title='Assigned', description='Test', category=self.category, created_by=self.user,
+            assigned_to=self.tech
+        )
+        TicketStatusHistory.objects.create(
+            ticket=ticket, old_status='PENDING', new_status='IN_PROGRESS', changed_by=self.tech
+        )
+
+        self.tech.delete()
+
+        self.assertEqual(
+            {r['technician_id']: r['count'] for r in rollups.totals('technician_id')},
+            {None: 1}
+        )
+        result = rollups.reconcile(dry_run=True)
+        self.assertEqual(result['ticket_daily_stats']['drifted'], 0)
+        self.assertEqual(result['ticket_daily_transitions']['drifted'], 0)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        """Test reconcile_rollups repairs changes made with queryset.update()"""
+        for i in range(3):
+            Ticket.objects.create(
+                title=f'Ticket {i}',
+                description='Test',
+                category=self.category,
+                created_by=self.user
+            )
+        Ticket.objects.filter(title='Ticket 0').update(status='REJECTED')
+
+        result = rollups.reconcile(dry_run=True)
+        self.assertEqual(result['ticket_daily_stats']['drift'], 2)
+        self.assertEqual(rollups.totals('status'), [{'status': 'PENDING', 'count': 3}])
+
+        rollups.reconcile()
+        self.assertEqual(
+            {r['status']: r['count'] for r in rollups.totals('status')},
+            {'PENDING': 2, 'REJECTED': 1}
+        )
+        self.assertEqual(rollups.reconcile()['ticket_daily_stats']['drifted'], 0)
+
+
+@override_settings(PRIORITY_AGING_MAX=2.0, PRIORITY_AGING_HOURS=24.0)
+class PriorityQueueTestCase(TestCase):
+    """Test aging re-score of the PENDING priority queue"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(
+            username='user001',
+            password='pass123',
+            role='user'
+        )
+
+    def create_ticket(self, base, hours_old, status='PENDING'):
+        ticket = Ticket.objects.create(
+            title='Queued Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            status=status,
+            base_priority_score=base,
+            priority_score=base
+        )
+        Ticket.objects.filter(id=ticket.id).update(
+            created_at=timezone.now() - timedelta(hours=hours_old)
+        )
+        return ticket
+
+    def test_old_tickets_rise_with_age(self):
+        """Test an old low-urgency ticket overtakes a new higher-urgency one"""
+        old = self.create_ticket(base=3.0, hours_old=48)
+        new = self.create_ticket(base=4.0, hours_old=0)
+        done = self.create_ticket(base=1.0, hours_old=48, status='COMPLETED')
+
+        self.assertEqual(list(priority_queue.top(10)), [new, old])
+
+        checked, changed = priority_queue.rescore()
+        self.assertEqual(checked, 2)
+        self.assertEqual(changed, 1)  # new ticket: aging ~0 -> คะแนนไม่เปลี่ยน
+
+        self.assertEqual(list(priority_queue.top(10)), [old, new])
+        done.refresh_from_db()
+        self.assertEqual(done.priority_score, 1.0)  # ไม่อยู่ในคิว
+
+        # รอบถัดไปไม่มีอะไรเปลี่ยน
+        self.assertEqual(priority_queue.rescore()[1], 0)
+
+    @override_settings(PRIORITY_RESCORE_MIN_DELTA=0.1)
+    def test_rescore_skips_small_changes_and_keeps_data_version(self):
+        """Test aging below the threshold is not written and re-scoring only bumps the queue version"""
+        ticket = self.create_ticket(base=3.0, hours_old=0.5)  # aging ~0.04
+        self.assertEqual(priority_queue.rescore(), (1, 0))
+
+        Ticket.objects.filter(id=ticket.id).update(created_at=timezone.now() - timedelta(hours=12))
+        data_version = data_cache.version()
+        queue_version = data_cache.version(priority_queue.QUEUE_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(priority_queue.rescore(), (1, 1))
+        self.assertEqual(data_cache.version(), data_version)
+        self.assertGreater(data_cache.version(priority_queue.QUEUE_VERSION_KEY), queue_version)
+
+
+class DispatchReplayTestCase(TestCase):
+    """Test offline replay of historical tickets against candidate rules"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.near = User.objects.create_user(username='tech_near', password='pass123', role='technician')
+        self.far = User.objects.create_user(username='tech_far', password='pass123', role='technician')
+        TechnicianPresence.objects.create(technician=self.near, location=Point(100.606, 14.071, srid=4326))
+        TechnicianPresence.objects.create(technician=self.far, location=Point(100.700, 14.200, srid=4326))
+
+        for i in range(4):
+            ticket = Ticket.objects.create(
+                title=f'Ticket {i}',
+                description='Test',
+                category=self.category,
+                created_by=self.user,
+                location=Point(100.607, 14.072, srid=4326),
+                assigned_to=self.far,
+                status='COMPLETED'
+            )
+            created = timezone.now() - timedelta(hours=10 - i)
+            Ticket.objects.filter(id=ticket.id).update(
+                created_at=created, completed_at=created + timedelta(minutes=30)
+            )
+
+    def test_replay_has_no_side_effects(self):
+        """Test replay picks the nearer technician and leaves the database untouched"""
+        snapshot = replay.load_snapshot()
+        self.assertEqual(len(snapshot['created']), 4)
+
+        # ช่างใกล้ไม่เคยได้งานในอดีต - เปิดช่วงทำงานให้ตลอดช่วง replay
+        snapshot['tech_active_from'][:] = -np.inf
+        snapshot['tech_active_until'][:] = np.inf
+
+        with self.assertNumQueries(0):
+            history, current = replay.replay_many(
+                snapshot, [replay.make_rule('current', 5, 0.6, 0.4)], processes=1
+            )
+
+        self.assertEqual(history['rule'], 'history')
+        self.assertEqual(current['assigned'], 4)
+        self.assertEqual(current['unassigned'], 0)
+        self.assertLess(current['mean_km'], history['mean_km'])
+        self.assertEqual(Ticket.objects.filter(assigned_to=self.far).count(), 4)
+
+
+class CapacitySimulatorTestCase(TestCase):
+    """Test the discrete-event staffing simulator"""
+
+    def setUp(self):
+        self.model = simulator.manual_arrivals(
+            {('ไฟฟ้า', 'HIGH'): 20, ('ประปา', 'LOW'): 20},
+            service_hours={'ไฟฟ้า': 1.0, 'ประปา': 1.0}
+        )
+        self.rule = replay.make_rule('default', 5, 0.6, 0.4)
+        self.tickets = simulator.generate_tickets(self.model, 14, np.random.default_rng(1))
+
+    def run_simulation(self, count, shifts='08-17'):
+        technicians = simulator.make_technicians(
+            count, len(self.model['categories']), simulator.parse_shifts(shifts), np.random.default_rng(1)
+        )
+        return simulator.simulate(self.tickets, technicians, self.rule, 14, aging=priority_queue.aging_term)
+
+    def test_more_technicians_reduce_breaches(self):
+        """Test SLA breaches, waiting and utilization fall as staffing grows"""
+        short = self.run_simulation(1)
+        staffed = self.run_simulation(8)
+
+        self.assertEqual(staffed['tickets'], len(self.tickets['created']))
+        self.assertGreater(short['sla_breach_rate'], staffed['sla_breach_rate'])
+        self.assertGreater(short['mean_queue'], staffed['mean_queue'])
+        self.assertGreater(short['utilization'], staffed['utilization'])
+        self.assertEqual(staffed['sla_breach_rate'], 0.0)
+
+    def test_work_starts_inside_shift(self):
+        """Test tickets reported at night wait for the morning shift"""
+        self.assertEqual(simulator._next_on_shift(3 * 3600.0, 8 * 3600.0, 17 * 3600.0), 8 * 3600.0)
+        self.assertEqual(simulator._next_on_shift(18 * 3600.0, 8 * 3600.0, 17 * 3600.0), 86400.0 + 8 * 3600.0)
+        self.assertEqual(simulator._next_on_shift(23 * 3600.0, 22 * 3600.0, 6 * 3600.0), 23 * 3600.0)
+
+        night = self.run_simulation(8, shifts='08-17')
+        around_the_clock = self.run_simulation(8, shifts='00-24')
+        self.assertGreater(night['mean_wait_min'], around_the_clock['mean_wait_min'])
+
+
+class AdminSummaryTestCase(TestCase):
+    """Test the admin summary page is backed by a constant number of aggregate queries"""
+
+    def setUp(self):
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.admin = User.objects.create_user(username='admin001', password='pass123', role='admin')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.client.login(username='admin001', password='pass123')
+        cache.clear()
+
+    def add_data(self, technicians, tickets_each):
+        # ให้ data version เปลี่ยนเหมือนตอน commit จริง (TestCase ไม่ commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._add_data(technicians, tickets_each)
+
+    def _add_data(self, technicians, tickets_each):
+        for t in range(technicians):
+            tech = User.objects.create_user(
+                username=f'tech_{User.objects.count()}', password='pass123', role='technician'
+            )
+            for i in range(tickets_each):
+                ticket = Ticket.objects.create(
+                    title='Summary Ticket',
+                    description='Test',
+                    category=self.category,
+                    created_by=self.user,
+                    assigned_to=tech,
+                    status='COMPLETED' if i % 2 else 'IN_PROGRESS'
+                )
+                if ticket.status == 'COMPLETED':
+                    Ticket.objects.filter(id=ticket.id).update(
+                        completed_at=ticket.created_at + timedelta(hours=2)
+                    )
+                    TicketFeedback.objects.create(
+                        ticket=ticket, created_by=self.user, technician=tech, overall_rating=4
+                    )
+
+    def summary_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/dashboard/summary/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_is_constant(self):
+        """Test the query count does not grow with tickets or technicians"""
+        self.add_data(technicians=1, tickets_each=2)
+        _, small = self.summary_queries()
+
+        self.add_data(technicians=5, tickets_each=8)
+        response, large = self.summary_queries()
+
+        self.assertEqual(small, large)
+        self.assertEqual(response.context['total_tickets'], 42)
+        self.assertEqual(response.context['completed_tickets'], 21)
+        self.assertEqual(response.context['avg_completion_hours'], 2.0)  # ทุกแถว ไม่ใช่ 100 แถวแรก
+
+        stats = response.context['technician_stats']
+        self.assertEqual(sorted(s['assigned'] for s in stats), [2, 8, 8, 8, 8, 8])
+        self.assertEqual({s['completion_rate'] for s in stats}, {50.0})
+        self.assertEqual({s['avg_rating'] for s in stats}, {4.0})
+
+
+class DashboardCacheTestCase(TestCase):
+    """Test dashboard cache entries expire when ticket data changes"""
+
+    def setUp(self):
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.admin = User.objects.create_user(username='admin001', password='pass123', role='admin')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.client.login(username='admin001', password='pass123')
+        cache.clear()
+        data_cache.reset_metrics()
+
+    def create_ticket(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Ticket.objects.create(
+                title='Cached Ticket', description='Test', category=self.category, created_by=self.user
+            )
+
+    def summary(self, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/dashboard/summary/' + query)
+        self.assertEqual(response.status_code, 200)
+        return response.context['total_tickets'], len(queries)
+
+    def test_ticket_change_invalidates_cached_summary(self):
+        """Test a cached summary is reused until a ticket write bumps the data version"""
+        self.create_ticket()
+        total, cold = self.summary()
+        self.assertEqual(total, 1)
+
+        total, warm = self.summary()
+        self.assertEqual(total, 1)
+        self.assertLess(warm, cold)
+
+        # ยังไม่ commit = ยังไม่เปลี่ยน version
+        with self.captureOnCommitCallbacks(execute=False):
+            Ticket.objects.create(title='Uncommitted', description='Test', category=self.category, created_by=self.user)
+        self.assertEqual(self.summary()[0], 1)
+
+        self.create_ticket()
+        self.assertEqual(self.summary()[0], 3)
+
+        counts = data_cache.metrics()['caches']['admin_summary']
+        self.assertEqual((counts['hit'], counts['miss']), (2, 2))
+
+    def test_opt_out_bypasses_cache(self):
+        """Test ?nocache=1 and DASHBOARD_CACHE_DISABLED rebuild the page every time"""
+        self.create_ticket()
+        _, cold = self.summary()
+        self.assertEqual(self.summary('?nocache=1')[1], cold)
+
+        with override_settings(DASHBOARD_CACHE_DISABLED=['admin_summary', 'priority_queue']):
+            self.assertEqual(self.summary()[1], cold)
+
+        counts = data_cache.metrics()['caches']['admin_summary']
+        self.assertEqual((counts['hit'], counts['miss'], counts['bypass']), (0, 1, 2))
+
+        response = self.client.get('/dashboard/cache-stats/')
+        self.assertEqual(response.json()['caches']['admin_summary']['bypass'], 2)
+
+
+class MapFeaturesTestCase(TestCase):
+    """Test the bounding-box map endpoint returns compact, capped features"""
+
+    def setUp(self):
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.client.login(username='user001', password='pass123')
+
+    def create_ticket(self, lon, lat, status='PENDING'):
+        return Ticket.objects.create(
+            title='Map Ticket',
+            description='Long description ' * 50,
+            category=self.category,
+            created_by=self.user,
+            status=status,
+            location=Point(lon, lat, srid=4326)
+        )
+
+    def features(self, **params):
+        params.setdefault('bbox', '100.60,14.06,100.62,14.08')
+        params.setdefault('zoom', 17)
+        response = self.client.get('/dashboard/map/features/', params)
+        if not response.streaming:
+            return response.json()
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_bbox_status_and_limit(self):
+        """Test only tickets inside the bbox are returned, newest first, up to the limit"""
+        inside = [self.create_ticket(100.605 + i * 0.001, 14.07) for i in range(3)]
+        self.create_ticket(100.61, 14.07, status='COMPLETED')
+        self.create_ticket(100.70, 14.07)  # นอกกรอบ
+
+        data = self.features(status='pending')
+        self.assertFalse(data['truncated'])
+        self.assertEqual(
+            [f['properties']['id'] for f in data['features']],
+            [t.id for t in reversed(inside)]
+        )
+        self.assertEqual(
+            set(data['features'][0]['properties']),
+            {'id', 'status', 'category_id', 'urgency'}
+        )
+
+        with override_settings(MAP_FEATURE_LIMIT=2):
+            data = self.features()
+        self.assertTrue(data['truncated'])
+        self.assertEqual(len(data['features']), 2)
+
+    def test_invalid_parameters_and_details(self):
+        """Test bad bbox/zoom return 400 and details load per ticket"""
+        ticket = self.create_ticket(100.61, 14.07)
+        for params in ({'bbox': '1,2,3'}, {'bbox': '100.62,14.06,100.60,14.08'}, {'zoom': 'x'}):
+            params.setdefault('zoom', 16)
+            params.setdefault('bbox', '100.60,14.06,100.62,14.08')
+            self.assertEqual(self.client.get('/dashboard/map/features/', params).status_code, 400)
+
+        response = self.client.get(f'/dashboard/map/tickets/{ticket.id}/')
+        self.assertEqual(response.json()['title'], 'Map Ticket')
+        self.assertEqual(response.json()['category'], 'ไฟฟ้า')
+
+    @override_settings(MAP_CLUSTER_MAX_ZOOM=16)
+    def test_low_zoom_returns_cached_clusters(self):
+        """Test low zoom groups nearby tickets with per-status counts and caches per tile"""
+        cache.clear()
+        for i in range(4):
+            self.create_ticket(100.6050 + i * 0.0001, 14.0700, status='PENDING' if i else 'COMPLETED')
+        single = self.create_ticket(100.6190, 14.0790)
+
+        data = self.features(zoom=12)
+        self.assertTrue(data['clustered'])
+
+        clusters = [f['properties'] for f in data['features'] if f['properties'].get('cluster')]
+        points = [f['properties'] for f in data['features'] if not f['properties'].get('cluster')]
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0]['count'], 4)
+        self.assertEqual(clusters[0]['status'], {'PENDING': 3, 'COMPLETED': 1})
+        self.assertEqual(clusters[0]['category'], {str(self.category.id): 4})
+        self.assertEqual([p['id'] for p in points], [single.id])
+
+        # ครั้งที่สองอ่านจาก cache ของ tile ทั้งหมด (ไม่มี query GROUP BY)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.features(zoom=12), data)
+        self.assertFalse([q for q in queries if 'GROUP BY' in q['sql']])
+
+
+
+@override_settings(MAP_TILE_MIN_ZOOM=10, MAP_TILE_MAX_ZOOM=20)
+class VectorTileTestCase(TestCase):
+    """Test vector tiles are cached on disk and re-rendered only when a ticket in them changes"""
+
+    def setUp(self):
+        cache.clear()
+        tile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tile_dir.cleanup)
+        self.tile_dir = Path(tile_dir.name)
+        tile_settings = override_settings(MAP_TILE_CACHE_DIR=tile_dir.name)
+        tile_settings.enable()
+        self.addCleanup(tile_settings.disable)
+
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.client.login(username='user001', password='pass123')
+
+    def create_ticket(self, lon, lat):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Ticket.objects.create(
+                title='Tile Ticket',
+                description='Test',
+                category=self.category,
+                created_by=self.user,
+                location=Point(lon, lat, srid=4326)
+            )
+
+    def rendered(self, url):
+        """(เนื้อหา tile, render จากฐานข้อมูลหรือไม่)"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content, any('ST_AsMVT' in q['sql'] for q in queries)
+
+    def test_tile_cache_and_invalidation(self):
+        """Test a tile is served from disk until a ticket inside it changes"""
+        ticket = self.create_ticket(100.6050, 14.0700)
+        x, y = tile_versions.tile_of(100.6050, 14.0700, 17)
+        url = f'/dashboard/tiles/17/{x}/{y}.mvt'
+
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertIn(b'tickets', response.content)
+        self.assertIn(b'heat', response.content)
+        self.assertEqual(self.rendered(url), (response.content, False))
+
+        # Ticket นอก tile นี้ไม่ทำให้ไฟล์หมดอายุ
+        self.create_ticket(100.7000, 14.2000)
+        self.assertEqual(self.rendered(url), (response.content, False))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.status = 'COMPLETED'
+            ticket.save()
+        content, rendered = self.rendered(url)
+        self.assertTrue(rendered)
+        self.assertIn(b'COMPLETED', content)
+        # ไฟล์ version เก่าถูกลบ
+        self.assertEqual(len(list(self.tile_dir.rglob('*.mvt'))), 1)
+
+    def test_invalid_tiles(self):
+        """Test out-of-range tiles return 404 and bad filters 400"""
+        self.assertEqual(tile_versions.tile_of(0.0, 0.0, 1), (1, 1))
+        self.assertEqual(self.client.get('/dashboard/tiles/5/0/0.mvt').status_code, 404)
+        self.assertEqual(self.client.get('/dashboard/tiles/17/0/999999.mvt').status_code, 404)
+        response = self.client.get('/dashboard/tiles/17/0/0.mvt', {'status': '../pending'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class MapDeltaTestCase(TestCase):
+    """Test live map deltas are sent after commit and coalesced per window"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+
+    def test_ticket_save_publishes_delta_after_commit(self):
+        """Test a saved ticket is broadcast once the transaction commits"""
+        with mock.patch('notify.map_deltas.publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                ticket = Ticket.objects.create(
+                    title='Live Ticket',
+                    description='Test',
+                    category=self.category,
+                    created_by=self.user,
+                    location=Point(100.605, 14.07, srid=4326)
+                )
+                self.assertFalse(publish.called)
+
+        publish.assert_called_once_with([{
+            'id': ticket.id, 'lon': 100.605, 'lat': 14.07, 'status': 'PENDING',
+            'category_id': self.category.id, 'urgency': 'MEDIUM',
+        }])
+
+    @override_settings(MAP_DELTA_WINDOW_MS=50)
+    def test_consumer_coalesces_deltas(self):
+        """Test deltas within one window reach the browser as one message, latest per ticket"""
+        async def receive():
+            communicator = WebsocketCommunicator(MapConsumer.as_asgi(), '/ws/map/')
+            communicator.scope['user'] = self.user
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            layer = get_channel_layer()
+            await layer.group_send(map_deltas.MAP_GROUP, {
+                'type': 'map_deltas', 'deltas': [{'id': 1, 'status': 'PENDING'}, {'id': 2, 'status': 'PENDING'}],
+            })
+            await layer.group_send(map_deltas.MAP_GROUP, {
+                'type': 'map_deltas', 'deltas': [{'id': 1, 'status': 'WORKING'}],
+            })
+            message = await communicator.receive_json_from(timeout=1)
+            nothing_else = await communicator.receive_nothing(timeout=0.2)
+            await communicator.disconnect()
+            return message, nothing_else
+
+        message, nothing_else = async_to_sync(receive)()
+        self.assertEqual(message['type'], 'map_deltas')
+        self.assertEqual(message['deltas'], [{'id': 1, 'status': 'WORKING'}, {'id': 2, 'status': 'PENDING'}])
+        self.assertTrue(nothing_else)
+
+
+class ConditionalGetTestCase(TestCase):
+    """Test polled pages answer 304 until their data changes"""
+
+    def setUp(self):
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.technician = User.objects.create_user(username='tech001', password='pass123', role='technician')
+        self.ticket = Ticket.objects.create(
+            title='Poll Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            assigned_to=self.technician,
+            location=Point(100.605, 14.07, srid=4326)
+        )
+
+    def poll(self, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, **headers)
+
+    def test_job_list_revalidates(self):
+        """Test job_list returns 304 while assigned tickets are unchanged"""
+        self.client.login(username='tech001', password='pass123')
+        response = self.poll('/technician/jobs/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+
+        response = self.poll('/technician/jobs/', etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        # filter ต่างกันเป็นคนละ ETag
+        self.assertEqual(self.poll('/technician/jobs/?status=PENDING', etag).status_code, 200)
+
+        self.ticket.status = 'WORKING'
+        self.ticket.save()
+        response = self.poll('/technician/jobs/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_my_tickets_tracks_notifications(self):
+        """Test a new unread notification (navbar badge) changes the ETag"""
+        self.client.login(username='user001', password='pass123')
+        etag = self.poll('/tickets/my-tickets/')['ETag']
+        self.assertEqual(self.poll('/tickets/my-tickets/', etag).status_code, 304)
+
+        Notification.objects.create(
+            recipient=self.user, title='Test', message='Test', ticket=self.ticket, notification_type='STATUS_CHANGE'
+        )
+        self.assertEqual(self.poll('/tickets/my-tickets/', etag).status_code, 200)
+
+    def test_other_pages_stay_no_store(self):
+        """Test pages without validators keep the logout protection headers"""
+        self.client.login(username='user001', password='pass123')
+        response = self.client.get(f'/tickets/{self.ticket.id}/')
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertNotIn('ETag', response)
+
+class TicketSearchTestCase(TestCase):
+    """Test full-text search over segmented Thai ticket text"""
+
+    def setUp(self):
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.aircon = self.create_ticket('แอร์ไม่เย็น ห้อง 301', 'เปิดแล้วมีแต่ลมร้อน')
+        self.leak = self.create_ticket('น้ำรั่ว', 'ก๊อกน้ำในห้องน้ำชั้น 2 รั่ว', address='อาคาร SC')
+
+    def create_ticket(self, title, description, address=''):
+        return Ticket.objects.create(
+            title=title,
+            description=description,
+            address_description=address,
+            category=self.category,
+            created_by=self.user,
+            location=Point(100.605, 14.07, srid=4326)
+        )
+
+    def found(self, text):
+        return set(search.search(Ticket.objects.all(), text).values_list('id', flat=True))
+
+    def test_words_segment_thai(self):
+        """Test Thai runs are split and other words lower-cased"""
+        words = search.words('แอร์ไม่เย็น Room 301!')
+        self.assertIn('room', words)
+        self.assertIn('301', words)
+        self.assertGreater(len(words), 3)
+        self.assertEqual(search.words('  !!  '), [])
+
+    def test_search_matches_thai_and_address(self):
+        """Test Thai words inside a run and the address are searchable"""
+        self.assertEqual(self.found('แอร์'), {self.aircon.id})
+        self.assertEqual(self.found('ไม่เย็น'), {self.aircon.id})
+        self.assertEqual(self.found('ห้องน้ำ'), {self.leak.id})
+        self.assertEqual(self.found('sc'), {self.leak.id})
+        self.assertEqual(self.found('แอร์ น้ำรั่ว'), set())
+
+    def test_last_word_is_prefix(self):
+        """Test the last word matches as a prefix (search while typing)"""
+        self.assertEqual(self.found('30'), {self.aircon.id})
+
+    def test_title_ranks_first(self):
+        """Test a title match ranks above a description match"""
+        other = self.create_ticket('ไฟดับ', 'น้ำรั่วจากเพดานลงปลั๊ก')
+        ranked = list(
+            search.search(Ticket.objects.all(), 'น้ำรั่ว').order_by('-search_rank').values_list('id', flat=True)
+        )
+        self.assertEqual(ranked, [self.leak.id, other.id])
+
+    def test_save_rebuilds_vector_on_text_change(self):
+        """Test editing the text updates search_vector, other saves leave it"""
+        ticket = Ticket.objects.get(id=self.aircon.id)
+        ticket.title = 'พัดลมเสีย'
+        ticket.save(update_fields=['title'])
+        self.assertEqual(self.found('พัดลม'), {self.aircon.id})
+        self.assertEqual(self.found('แอร์'), set())
+
+        ticket = Ticket.objects.get(id=self.aircon.id)
+        ticket.status = 'WORKING'
+        with CaptureQueriesContext(connection) as captured:
+            ticket.save(update_fields=['status'])
+        self.assertFalse(any('search_vector' in query['sql'] for query in captured))
+
+    def test_backfill(self):
+        """Test backfill fills tickets created without a vector"""
+        Ticket.objects.update(search_vector=None)
+        self.assertEqual(self.found('แอร์'), set())
+        self.assertEqual(search.backfill(chunk_size=1, missing_only=True), 2)
+        self.assertEqual(self.found('แอร์'), {self.aircon.id})
+
+    def test_my_tickets_uses_search(self):
+        """Test my_tickets filters by full-text search ordered by rank"""
+        self.client.login(username='user001', password='pass123')
+        response = self.client.get('/tickets/my-tickets/', {'search': 'น้ำรั่ว'})
+        self.assertEqual([t.id for t in response.context['tickets']], [self.leak.id])
+        response = self.client.get('/tickets/my-tickets/', {'search': '!!'})
+        self.assertEqual(response.status_code, 200)
+
+
+class SimilarTicketsTestCase(TestCase):
+    """Test typo-tolerant trigram search over titles and locations"""
+
+    def setUp(self):
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.admin = User.objects.create_user(username='admin001', password='pass123', role='admin')
+        self.aircon = self.create_ticket('Aircon not cooling', 'SC building room 301')
+        self.projector = self.create_ticket('Projector broken', 'Library 2nd floor')
+        self.closed = self.create_ticket('Aircon leaking', 'SC building lobby', status='CLOSED')
+
+    def create_ticket(self, title, address, status='PENDING'):
+        return Ticket.objects.create(
+            title=title,
+            description='Test',
+            address_description=address,
+            status=status,
+            category=self.category,
+            created_by=self.user,
+            location=Point(100.605, 14.07, srid=4326)
+        )
+
+    def test_similar_tolerates_typos_across_fields(self):
+        """Test misspelled words match title and address, best match first"""
+        found = list(search.similar(Ticket.objects.filter(status='PENDING'), 'aircn SC'))
+        self.assertEqual(found[0].id, self.aircon.id)
+        self.assertNotIn(self.projector.id, [t.id for t in found])
+        self.assertGreater(found[0].similarity, 0)
+        self.assertEqual(list(search.similar(Ticket.objects.all(), '   ')), [])
+
+    def test_threshold(self):
+        """Test a stricter threshold drops weak matches"""
+        self.assertTrue(search.similar(Ticket.objects.all(), 'projecter'))
+        self.assertFalse(search.similar(Ticket.objects.all(), 'projecter', threshold=0.99))
+
+    def test_endpoint_returns_open_tickets(self):
+        """Test the JSON endpoint lists only open tickets unless an admin asks for all"""
+        self.client.login(username='user001', password='pass123')
+        response = self.client.get('/tickets/similar/', {'q': 'aircon SC', 'scope': 'all'})
+        self.assertEqual(response.status_code, 200)
+        ids = [row['id'] for row in response.json()['results']]
+        self.assertIn(self.aircon.id, ids)
+        self.assertNotIn(self.closed.id, ids)
+        self.assertEqual(self.client.get('/tickets/similar/', {'q': 'a'}).json(), {'results': []})
+
+        self.client.login(username='admin001', password='pass123')
+        response = self.client.get('/tickets/similar/', {'q': 'aircon SC', 'scope': 'all'})
+        self.assertIn(self.closed.id, [row['id'] for row in response.json()['results']])
+
+
+class KeysetPaginationTestCase(TestCase):
+    """Test cursor pagination of ticket lists"""
+
+    def setUp(self):
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        self.tickets = [
+            Ticket.objects.create(
+                title=f'Ticket {i}',
+                description='Test',
+                category=self.category,
+                created_by=self.user,
+                urgency_level=['LOW', 'HIGH'][i % 2],
+                location=Point(100.605, 14.07, srid=4326)
+            )
+            for i in range(7)
+        ]
+        # created_at ซ้ำกัน - id ต้องเป็นตัวตัดสิน
+        same_time = timezone.now()
+        Ticket.objects.filter(id__in=[t.id for t in self.tickets[2:5]]).update(created_at=same_time)
+
+    def walk(self, sort, page_size=2, queryset=None):
+        queryset = Ticket.objects.all() if queryset is None else queryset
+        ids, cursor = [], None
+        while True:
+            page = pagination.paginate(queryset, sort, cursor, page_size=page_size)
+            ids.extend(t.id for t in page)
+            if not page.has_next:
+                return ids
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once_in_order(self):
+        """Test walking the cursors returns the same rows as one ordered query"""
+        for sort, ordering in pagination.SORT_KEYS.items():
+            if sort == '-search_rank':
+                continue
+            expected = list(Ticket.objects.order_by(*ordering).values_list('id', flat=True))
+            self.assertEqual(self.walk(sort), expected, sort)
+
+    def test_search_rank_pages_through_ties(self):
+        """Test search results with tied ranks are paged without repeating rows"""
+        results = search.search(Ticket.objects.all(), 'ticket')
+        expected = list(results.order_by('-search_rank', '-pk').values_list('id', flat=True))
+        self.assertEqual(len(expected), 7)  # rank เท่ากันทุกแถว
+
+        self.assertEqual(self.walk('-search_rank', queryset=results), expected)
+
+    def test_next_page_is_one_query_without_offset(self):
+        """Test a next page is a single seek query"""
+        first = pagination.paginate(Ticket.objects.all(), '-created_at', page_size=3)
+        with CaptureQueriesContext(connection) as captured:
+            pagination.paginate(Ticket.objects.all(), '-created_at', first.next_cursor, page_size=3)
+        self.assertEqual(len(captured), 1)
+        self.assertNotIn('OFFSET', captured[0]['sql'])
+
+    def test_invalid_cursor(self):
+        """Test tampered cursors and cursors of another sort are rejected"""
+        page = pagination.paginate(Ticket.objects.all(), '-created_at', page_size=2)
+        with self.assertRaises(ValueError):
+            pagination.paginate(Ticket.objects.all(), '-created_at', page.next_cursor + 'x')
+        with self.assertRaises(ValueError):
+            pagination.paginate(Ticket.objects.all(), 'created_at', page.next_cursor)
+
+    def test_count(self):
+        """Test a list that fits one page is counted without a query, exact count on request"""
+        page = pagination.paginate(Ticket.objects.all(), '-created_at', page_size=10)
+        with self.assertNumQueries(0):
+            pagination.count(page, Ticket.objects.all())
+        self.assertEqual((page.count, page.count_estimated), (7, False))
+
+        page = pagination.paginate(Ticket.objects.all(), '-created_at', page_size=2)
+        pagination.count(page, Ticket.objects.all(), exact=True)
+        self.assertEqual((page.count, page.count_estimated), (7, False))
+
+    @override_settings(LIST_PAGE_SIZE=3)
+    def test_load_more_fragment(self):
+        """Test my_tickets renders a page of rows and the next cursor for load more"""
+        self.client.login(username='user001', password='pass123')
+        response = self.client.get('/tickets/my-tickets/')
+        page = response.context['tickets']
+        self.assertEqual(len(page), 3)
+        self.assertContains(response, 'โหลดเพิ่ม')
+
+        response = self.client.get('/tickets/my-tickets/', {'cursor': page.next_cursor, 'fragment': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['X-Next-Cursor'])
+        self.assertNotContains(response, '<html')
+        self.assertEqual(self.client.get('/tickets/my-tickets/', {'cursor': 'bad', 'fragment': '1'}).status_code, 400)
+
+
+class TicketQueryTestCase(TestCase):
+    """Test the shared ticket list filters and single-query status counters"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(username='user001', password='pass123', role='user')
+        cache.clear()
+        for status in ['PENDING', 'PENDING', 'WORKING', 'INSPECTING', 'CLOSED', 'REJECTED']:
+            self.create_ticket(status)
+
+    def create_ticket(self, status='PENDING', **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Ticket.objects.create(
+                title='Query Ticket', description='Test', category=self.category, created_by=self.user,
+                status=status, location=Point(100.605, 14.07, srid=4326), **fields
+            )
+
+    def ids(self, params):
+        return set(TicketQuery(params).apply(Ticket.objects.all()).values_list('id', flat=True))
+
+    def test_invalid_parameters_are_ignored(self):
+        """Test unknown status/urgency, a non-numeric category and bad dates do not filter"""
+        everything = set(Ticket.objects.values_list('id', flat=True))
+        params = {'status': 'NOPE', 'urgency': 'x', 'category': 'abc', 'date_from': '2026-13-01', 'sort': 'title'}
+        query = TicketQuery(params)
+        self.assertEqual(self.ids(params), everything)
+        self.assertEqual(query.sort_key, '-created_at')
+        self.assertTrue(query.is_filtered)
+
+    def test_filters(self):
+        """Test status and date range filters"""
+        self.assertEqual(len(self.ids({'status': 'PENDING'})), 2)
+        today = timezone.localdate()
+        self.assertEqual(len(self.ids({'date_from': today.isoformat(), 'date_to': today.isoformat()})), 6)
+        self.assertEqual(self.ids({'date_to': (today - timedelta(days=1)).isoformat()}), set())
+
+    def test_search_sorts_by_rank_unless_sort_selected(self):
+        """Test searching defaults to relevance order"""
+        self.assertEqual(TicketQuery({'search': 'query'}).sort_key, '-search_rank')
+        self.assertEqual(TicketQuery({'search': 'query', 'sort': 'created_at'}).sort_key, 'created_at')
+
+    def test_status_counts_single_query(self):
+        """Test every badge counter comes from one aggregate query"""
+        with self.assertNumQueries(1):
+            counts = status_counts(Ticket.objects.filter(created_by=self.user))
+        self.assertEqual(counts, {'total': 6, 'pending': 2, 'in_progress': 2, 'completed': 1})
+
+    def test_user_counts_cached_until_data_changes(self):
+        """Test cached counters are reused and refreshed after a ticket write"""
+        self.assertEqual(user_status_counts(self.user)['pending'], 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(user_status_counts(self.user)['pending'], 2)
+
+        self.create_ticket()
+        self.assertEqual(user_status_counts(self.user)['pending'], 3)
+
+
+class TicketListEntryTestCase(TestCase):
+    """Test the denormalized list rows follow ticket, photo, user and category changes"""
+
+    def setUp(self):
+        self.client = Client()
+        self.category = Category.objects.create(name='ไฟฟ้า', color='yellow')
+        self.user = User.objects.create_user(
+            username='user001', password='pass123', role='user', displayname_th='ผู้แจ้ง'
+        )
+        self.tech = User.objects.create_user(username='tech001', password='pass123', role='technician')
+        self.ticket = Ticket.objects.create(
+            title='ไฟดับ', description='Test', category=self.category, created_by=self.user,
+            location=Point(100.605, 14.07, srid=4326)
+        )
+
+    def entry(self):
+        return TicketListEntry.objects.get(ticket=self.ticket)
+
+    def test_save_writes_entry(self):
+        """Test creating and updating a ticket keeps its row in sync"""
+        entry = self.entry()
+        self.assertEqual(
+            (entry.title, entry.status_label, entry.category_name, entry.category_color, entry.created_by_name),
+            ('ไฟดับ', 'รอดำเนินการ', 'ไฟฟ้า', 'yellow', 'ผู้แจ้ง')
+        )
+        self.assertEqual(entry.overdue_at, self.ticket.created_at + timedelta(hours=24))
+
+        self.ticket.status = 'IN_PROGRESS'
+        self.ticket.assigned_to = self.tech
+        self.ticket.save()
+        entry = self.entry()
+        self.assertEqual(
+            (entry.status, entry.assigned_to_id, entry.assigned_to_name), ('IN_PROGRESS', self.tech.id, 'tech001')
+        )
+
+        self.ticket.status = 'CLOSED'
+        self.ticket.save()
+        self.assertIsNone(self.entry().overdue_at)
+        self.assertFalse(self.entry().is_overdue)
+
+    def test_photo_sets_thumbnail(self):
+        """Test a before photo becomes the row thumbnail and deleting it clears it"""
+        photo = BeforeAfterPhoto.objects.create(
+            ticket=self.ticket, photo_type='BEFORE', image='before_after/2026/10/a.jpg', uploaded_by=self.user
+        )
+        self.assertEqual(self.entry().thumbnail, 'before_after/2026/10/a.jpg')
+        photo.delete()
+        self.assertEqual(self.entry().thumbnail, '')
+
+    def test_rename_user_and_category(self):
+        """Test renaming a user or category updates rows that copied the name"""
+        self.user.displayname_th = 'ชื่อใหม่'
+        self.user.save()
+        self.category.color = 'red'
+        self.category.save()
+        entry = self.entry()
+        self.assertEqual((entry.created_by_name, entry.category_color), ('ชื่อใหม่', 'red'))
+
+    def test_delete_ticket_with_photo(self):
+        """Test deleting a ticket removes its row (photo signals do not recreate it)"""
+        BeforeAfterPhoto.objects.create(ticket=self.ticket, photo_type='BEFORE', image='before_after/a.jpg')
+        self.ticket.delete()
+        self.assertFalse(TicketListEntry.objects.exists())
+
+    def test_rebuild(self):
+        """Test rebuild repairs rows after writes that bypass Ticket.save"""
+        Ticket.objects.filter(id=self.ticket.id).update(title='แก้ตรง')
+        TicketListEntry.objects.filter(ticket=self.ticket).update(category_name='เก่า')
+        self.assertEqual(list_entries.rebuild(chunk_size=1), 1)
+        entry = self.entry()
+        self.assertEqual((entry.title, entry.category_name), ('แก้ตรง', 'ไฟฟ้า'))
+
+    def test_my_tickets_reads_without_joins(self):
+        """Test the my_tickets list query reads the row table only"""
+        self.client.login(username='user001', password='pass123')
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/tickets/my-tickets/')
+        self.assertContains(response, 'ไฟฟ้า')
+        rows = [q['sql'] for q in captured if 'FROM "ticket_list_entries"' in q['sql']]
+        self.assertEqual(len(rows), 1)
+        self.assertNotIn('JOIN', rows[0])
+
+
+class HeatGridTestCase(TestCase):
+    """Test heat grid against the exact radius count"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='ไฟฟ้า')
+        self.user = User.objects.create_user(
+            username='user001',
+            password='pass123',
+            role='user'
+        )
+
+    def create_ticket(self, lon, lat):
+        return Ticket.objects.create(
+            title='Heat Ticket',
+            description='Test',
+            category=self.category,
+            created_by=self.user,
+            location=Point(lon, lat, srid=4326)
+        )
+
+    def exact_count(self, point):
+        from django.contrib.gis.measure import D
+        return Ticket.objects.filter(location__distance_lte=(point, D(m=500))).count()
+
+    def test_grid_matches_exact_radius_count(self):
+        """Test grid count equals exact count away from the radius boundary"""
+        center = Point(100.605, 14.070, srid=4326)
+
+        # Inside: within ~300m of the center
+        for i in range(6):
+            self.create_ticket(100.605 + i * 0.0004, 14.070 + i * 0.0003)
+        # Outside: more than 1km away
+        for i in range(4):
+            self.create_ticket(100.620 + i * 0.001, 14.085)
+
+        self.assertEqual(self.exact_count(center), 6)
+        self.assertEqual(heat_grid.nearby_count(center), self.exact_count(center))
+
+        far = Point(100.6215, 14.085, srid=4326)
+        self.assertEqual(heat_grid.nearby_count(far), self.exact_count(far))
+
+    def test_rebuild_and_delete_keep_grid_consistent(self):
+        """Test rebuild reproduces incremental counts and delete decrements"""
+        center = Point(100.605, 14.070, srid=4326)
+        tickets = [self.create_ticket(100.605, 14.070 + i * 0.0005) for i in range(5)]
+
+        incremental = heat_grid.nearby_count(center)
+        heat_grid.rebuild()
+        self.assertEqual(heat_grid.nearby_count(center), incremental)
+
+        tickets[0].delete()
+        self.assertEqual(heat_grid.nearby_count(center), self.exact_count(center))
+
+
+    @override_settings(HEAT_GRID_WINDOW_DAYS=30)
+    def test_window_covers_exactly_window_days(self):
+        """Test nearby_count sums HEAT_GRID_WINDOW_DAYS day buckets, not one more"""
+        center = Point(100.605, 14.070, srid=4326)
+        inside, outside = self.create_ticket(100.605, 14.070), self.create_ticket(100.605, 14.070)
+        Ticket.objects.filter(id=inside.id).update(created_at=timezone.now() - timedelta(days=29))
+        Ticket.objects.filter(id=outside.id).update(created_at=timezone.now() - timedelta(days=30))
+        heat_grid.rebuild()
+
+        self.assertEqual(heat_grid.nearby_count(center), 1)
 
 class TicketViewsTestCase(TestCase):
     """Test Ticket Views"""
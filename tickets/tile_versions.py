@@ -0,0 +1,87 @@
+"""
+Tile Versions
+version ของ vector tile แต่ละแผ่น (z, x, y แบบ Web Mercator / XYZ) สำหรับ cache บนดิสก์
+
+- Ticket สร้าง/แก้/ลบ -> หลัง commit เพิ่ม version เฉพาะ tile ที่ตำแหน่งเดิมและใหม่ตกอยู่
+  ทุกระดับซูม MAP_TILE_MIN_ZOOM..MAP_TILE_MAX_ZOOM (tile อื่นใช้ไฟล์เดิมต่อได้)
+- version อยู่ใน Django cache (Redis ตอน production) จึงเห็นตรงกันทุก process
+- ไฟล์ tile ใช้ชื่อที่มี version (ดู dashboard/vector_tiles.py)
+"""
+
+import math
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _key(zoom, x, y):
+    return f'map-tile:version:{zoom}:{x}:{y}'
+
+
+def tile_of(lon, lat, zoom):
+    """tile (x, y) ที่พิกัดตกอยู่ที่ระดับซูม zoom"""
+    n = 2 ** zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = math.floor((lon + 180.0) / 360.0 * n)
+    y = math.floor((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def zoom_levels():
+    return range(settings.MAP_TILE_MIN_ZOOM, settings.MAP_TILE_MAX_ZOOM + 1)
+
+
+def version(zoom, x, y):
+    """version ปัจจุบันของ tile"""
+    key = _key(zoom, x, y)
+    value = cache.get(key)
+    if value is None:
+        # เริ่มจากเวลาปัจจุบัน - ถ้า key ถูก evict จะไม่ย้อนกลับไปใช้ไฟล์เก่า
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def tiles_of_points(points):
+    """
+    tile ทุกระดับซูมที่จุดเหล่านี้ตกอยู่
+
+    Args:
+        points: iterable ของ (lon, lat) - None ข้ามไป
+    """
+    tiles = set()
+    for point in points:
+        if point is None:
+            continue
+        for zoom in zoom_levels():
+            tiles.add((zoom, *tile_of(point[0], point[1], zoom)))
+    return tiles
+
+
+def invalidate(points):
+    """เพิ่ม version ของ tile ที่จุดเหล่านี้ตกอยู่ทันที"""
+    for zoom, x, y in tiles_of_points(points):
+        key = _key(zoom, x, y)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+def invalidate_on_commit(points):
+    """invalidate หลัง transaction commit (เหตุผลเดียวกับ data_cache.bump_on_commit)"""
+    points = list(points)
+    transaction.on_commit(lambda: invalidate(points))
+
+
+def point_of(location):
+    return (location.x, location.y) if location else None
+
+
+def ticket_changed(ticket):
+    """Ticket ถูกบันทึก/ลบ -> tile ของตำแหน่งตอนโหลดและตำแหน่งปัจจุบันหมดอายุ"""
+    current = point_of(ticket.location) if 'location' in ticket.__dict__ else None
+    points = {getattr(ticket, '_tile_point', None), current}
+    invalidate_on_commit(points)
+    ticket._tile_point = current
@@ -1,11 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.gis.geos import Point
 from django.utils import timezone
-from .models import Ticket, TicketStatusHistory, BeforeAfterPhoto, TicketFeedback
+from .models import Ticket, TicketListEntry, TicketStatusHistory, BeforeAfterPhoto, TicketFeedback, DispatchJob
+from . import conditional, pagination, search
+from .query import TicketQuery, user_status_counts
 from .forms import TicketForm
-from .dispatcher import auto_dispatch_ticket
+from .dispatch_queue import enqueue_dispatch, pending_dispatch_ids
 
 @login_required
 def create_ticket(request):
@@ -46,24 +51,31 @@ def create_ticket(request):
                 comment='สร้าง Ticket ใหม่'
             )
 
-            # Auto Dispatch
-            auto_dispatch_ticket(ticket)
+            # Auto Dispatch (ส่งเข้าคิว - worker จะมอบหมายช่างและแจ้งผลผ่าน WebSocket)
+            job = enqueue_dispatch(ticket, requested_by=request.user)
 
-            # Refresh ticket to get updated data
-            ticket.refresh_from_db()
-
-            if ticket.assigned_to:
-                messages.success(
-                    request,
-                    f'สร้าง Ticket #{ticket.id} เรียบร้อยแล้ว '
-                    f'และมอบหมายให้ {ticket.assigned_to.get_display_name()}'
-                )
-            else:
+            if job.status == 'QUEUED':
                 messages.info(
                     request,
                     f'สร้าง Ticket #{ticket.id} เรียบร้อยแล้ว '
-                    f'(ยังไม่สามารถมอบหมายช่างได้ในขณะนี้)'
+                    f'(กำลังมอบหมายช่าง…)'
                 )
+            else:
+                # ไม่ได้ส่งให้ worker (dispatch_queue.runs_async) - ประมวลผลเสร็จแล้วใน request นี้
+                ticket.refresh_from_db()
+
+                if ticket.assigned_to:
+                    messages.success(
+                        request,
+                        f'สร้าง Ticket #{ticket.id} เรียบร้อยแล้ว '
+                        f'และมอบหมายให้ {ticket.assigned_to.get_display_name()}'
+                    )
+                else:
+                    messages.info(
+                        request,
+                        f'สร้าง Ticket #{ticket.id} เรียบร้อยแล้ว '
+                        f'(ยังไม่สามารถมอบหมายช่างได้ในขณะนี้)'
+                    )
 
             return redirect('tickets:my_tickets')
     else:
@@ -71,90 +83,94 @@ def create_ticket(request):
 
     return render(request, 'user/create_ticket.html', {'form': form})
 
+def my_tickets_validators(request):
+    """my_tickets เปลี่ยนเมื่อ Ticket ของผู้ใช้หรือคิวมอบหมายช่าง ("กำลังมอบหมาย…") เปลี่ยน"""
+    last, count = conditional.queryset_state(Ticket.objects.filter(created_by=request.user))
+    queued = conditional.queryset_state(
+        DispatchJob.objects.filter(ticket__created_by=request.user, status='QUEUED'), field='id'
+    )
+    return (last, count, queued), last
+
+
 @login_required
+@conditional.conditional(my_tickets_validators)
 def my_tickets(request):
     """แสดง Ticket ทั้งหมดของผู้ใช้ พร้อม Search & Filter"""
-    # Base queryset
-    tickets = Ticket.objects.filter(created_by=request.user).select_related(
-        'category', 'assigned_to'
-    )
+    # Base queryset (แถวพร้อมแสดงของ TicketListEntry - ไม่ join หมวด/ช่าง ดู list_entries.py)
+    tickets = TicketListEntry.objects.filter(created_by=request.user)
 
-    # Get filter parameters
-    search_query = request.GET.get('search', '').strip()
-    status_filter = request.GET.get('status', '')
-    category_filter = request.GET.get('category', '')
-    urgency_filter = request.GET.get('urgency', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    sort_by = request.GET.get('sort', '-created_at')
-
-    # Apply search
-    if search_query:
-        from django.db.models import Q
-        tickets = tickets.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+    # ตัวกรอง/ค้นหา/เรียง (ดู query.py)
+    query = TicketQuery(request.GET)
 
-    # Apply filters
-    if status_filter:
-        tickets = tickets.filter(status=status_filter)
-
-    if category_filter:
-        tickets = tickets.filter(category_id=category_filter)
-
-    if urgency_filter:
-        tickets = tickets.filter(urgency_level=urgency_filter)
-
-    if date_from:
-        from datetime import datetime
-        try:
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d')
-            tickets = tickets.filter(created_at__gte=date_from_obj)
-        except ValueError:
-            pass
-
-    if date_to:
-        from datetime import datetime, timedelta
-        try:
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d')
-            # Add 1 day to include the entire end date
-            tickets = tickets.filter(created_at__lt=date_to_obj + timedelta(days=1))
-        except ValueError:
-            pass
-
-    # Apply sorting
-    if sort_by in ['-created_at', 'created_at', '-urgency_level', 'urgency_level']:
-        tickets = tickets.order_by(sort_by)
-    else:
-        tickets = tickets.order_by('-created_at')
+    # หน้าปัจจุบัน (keyset pagination - ปุ่ม "โหลดเพิ่ม" ส่ง cursor ของหน้าถัดไปมา)
+    try:
+        page = query.page(tickets, request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid cursor')
+    dispatching_ids = pending_dispatch_ids([t.id for t in page if t.status == 'PENDING' and not t.assigned_to_id])
+
+    if request.GET.get('fragment'):
+        return pagination.fragment(request, 'user/_ticket_rows.html', {
+            'tickets': page,
+            'dispatching_ids': dispatching_ids,
+        }, page)
+
+    # จำนวนผลลัพธ์ (เฉพาะเมื่อกรอง - นับจริงเมื่อขอ ?count=exact)
+    if query.is_filtered:
+        pagination.count(page, query.apply(tickets), exact=request.GET.get('count') == 'exact')
 
     # Get categories for filter dropdown
     from tickets.models import Category
     categories = Category.objects.filter(is_active=True)
 
-    # Count statistics (before filtering for accurate counts)
-    all_tickets = Ticket.objects.filter(created_by=request.user)
+    # Count statistics (ทุก Ticket ของผู้ใช้ ไม่ขึ้นกับตัวกรอง - 1 query, cache ตาม data version)
+    counts = user_status_counts(request.user, request)
 
     context = {
-        'tickets': tickets,
+        'tickets': page,
         'categories': categories,
-        'pending_count': all_tickets.filter(status='PENDING').count(),
-        'in_progress_count': all_tickets.filter(status__in=['IN_PROGRESS', 'INSPECTING', 'WORKING']).count(),
-        'completed_count': all_tickets.filter(status__in=['COMPLETED', 'CLOSED']).count(),
+        'pending_count': counts['pending'],
+        'in_progress_count': counts['in_progress'],
+        'completed_count': counts['completed'],
         # Pass filter values back to template
-        'search_query': search_query,
-        'status_filter': status_filter,
-        'category_filter': category_filter,
-        'urgency_filter': urgency_filter,
-        'date_from': date_from,
-        'date_to': date_to,
-        'sort_by': sort_by,
-        'filtered_count': tickets.count(),
+        **query.context(),
+        'filtered_count': page.count,
+        'count_estimated': page.count_estimated,
+        'dispatching_ids': dispatching_ids,
     }
 
     return render(request, 'user/my_tickets.html', context)
 
+@login_required
+def similar_tickets(request):
+    """
+    Ticket ที่คล้ายข้อความ (JSON) - หน้าแจ้งปัญหาใช้เตือน Ticket ซ้ำที่ยังเปิดอยู่
+
+    ?q=ข้อความ (หัวข้อ + สถานที่), ?scope=all (admin) รวม Ticket ที่ปิดแล้ว
+    """
+    query = request.GET.get('q', '').strip()
+    tickets = Ticket.objects.all()
+    if not (request.GET.get('scope') == 'all' and request.user.role == 'admin'):
+        tickets = tickets.exclude(status__in=['COMPLETED', 'CLOSED', 'REJECTED'])
+
+    results = []
+    if len(query) >= 2:
+        matches = search.similar(tickets, query).only('id', 'title', 'address_description', 'status')
+        results = [
+            {
+                'id': ticket.id,
+                'title': ticket.title,
+                'address_description': ticket.address_description,
+                'status': ticket.status,
+                'status_display': ticket.get_status_display(),
+                'similarity': round(ticket.similarity, 3),
+                'url': reverse('tickets:ticket_detail', args=[ticket.id]),
+            }
+            for ticket in matches[:settings.SEARCH_SIMILAR_LIMIT]
+        ]
+    return JsonResponse({'results': results})
+
+
 @login_required
 def ticket_detail(request, ticket_id):
     """รายละเอียด Ticket"""
@@ -75,6 +75,7 @@ INSTALLED_APPS = [
 # Add GIS support only if not using SQLite
 if not USE_SQLITE:
     INSTALLED_APPS.append('django.contrib.gis')
+    INSTALLED_APPS.append('django.contrib.postgres')  # full-text search (tickets/search.py)
 
 INSTALLED_APPS += [
     # Third-party apps
@@ -131,16 +132,97 @@ WSGI_APPLICATION = 'tu_report.wsgi.application'
 ASGI_APPLICATION = 'tu_report.asgi.application'
 
 # Channels Configuration
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'  # For development
-        # For production, use Redis:
-        # 'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        # 'CONFIG': {
-        #     "hosts": [('127.0.0.1', 6379)],
-        # },
-    },
-}
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    # Production: Redis ทำให้ทุก process (web, run_dispatcher) ส่ง event ถึงกันได้
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                "hosts": [REDIS_URL],
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer'  # For development
+        },
+    }
+
+# Cache
+# Production: Redis ร่วมกันทุก process / dev: local memory หรือไฟล์ (CACHE_DIR) ที่ใช้ร่วมกันได้หลาย process
+CACHE_DIR = config('CACHE_DIR', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+elif CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tu-report',
+        },
+    }
+
+# Dashboard cache ผูกกับ ticket data version (ดู tickets/data_cache.py)
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=300, cast=int)  # วินาที
+DASHBOARD_CACHE_DISABLED = config('DASHBOARD_CACHE_DISABLED', default='', cast=Csv())  # ชื่อ cache ที่ปิด หรือ all
+
+# Auto Dispatcher queue
+# True = view แค่ enqueue แล้วให้ worker (manage.py run_dispatcher) มอบหมายช่าง
+# False = มอบหมายทันทีใน request (สะดวกตอน dev ที่ไม่ได้รัน worker)
+DISPATCH_ASYNC = config('DISPATCH_ASYNC', default=True, cast=bool)
+DISPATCH_MAX_ATTEMPTS = config('DISPATCH_MAX_ATTEMPTS', default=3, cast=int)
+DISPATCH_RETRY_DELAY = config('DISPATCH_RETRY_DELAY', default=5, cast=float)  # วินาที ก่อนลองใหม่ครั้งแรก (เพิ่มเท่าตัว)
+
+# Technician position index (in-memory KD-tree ของตำแหน่งช่าง)
+PRESENCE_INDEX_ENABLED = config('PRESENCE_INDEX_ENABLED', default=True, cast=bool)
+DISPATCH_CANDIDATE_K = config('DISPATCH_CANDIDATE_K', default=50, cast=int)  # จำนวนช่างใกล้สุดที่พิจารณา
+DISPATCH_RADIUS_KM = config('DISPATCH_RADIUS_KM', default=None, cast=lambda v: float(v) if v else None)
+SKILL_CACHE_SECONDS = config('SKILL_CACHE_SECONDS', default=60, cast=int)  # อายุ cache ทักษะช่าง (bitmask)
+
+# Priority aging (Ticket ที่รอนานได้ priority เพิ่ม สูงสุด PRIORITY_AGING_MAX)
+PRIORITY_AGING_MAX = config('PRIORITY_AGING_MAX', default=2.0, cast=float)
+PRIORITY_AGING_HOURS = config('PRIORITY_AGING_HOURS', default=24.0, cast=float)  # ค่าคงที่เวลาของ aging
+PRIORITY_RESCORE_INTERVAL = config('PRIORITY_RESCORE_INTERVAL', default=900, cast=int)  # วินาที (run_dispatcher)
+PRIORITY_RESCORE_MIN_DELTA = config('PRIORITY_RESCORE_MIN_DELTA', default=0.1, cast=float)  # เขียนเมื่อคะแนนเปลี่ยนอย่างน้อยเท่านี้
+
+# แผนที่หลัก /dashboard/map/features/: จำนวนจุดสูงสุดต่อคำขอ และระดับซูมที่เริ่มแสดงทีละจุด
+MAP_FEATURE_LIMIT = config('MAP_FEATURE_LIMIT', default=5000, cast=int)
+MAP_CLUSTER_MAX_ZOOM = config('MAP_CLUSTER_MAX_ZOOM', default=16, cast=int)  # ซูมไม่เกินนี้ส่งเป็นกลุ่มจุด
+
+# Vector tile /dashboard/tiles/{z}/{x}/{y}.mvt: ระดับซูมที่ให้บริการ และโฟลเดอร์เก็บไฟล์ tile
+MAP_TILE_MIN_ZOOM = config('MAP_TILE_MIN_ZOOM', default=10, cast=int)
+MAP_TILE_MAX_ZOOM = config('MAP_TILE_MAX_ZOOM', default=20, cast=int)  # ซูมเกินนี้ browser ขยาย tile เดิม
+MAP_TILE_CACHE_DIR = config('MAP_TILE_CACHE_DIR', default=str(BASE_DIR / 'tile_cache'))
+MAP_DELTA_WINDOW_MS = config('MAP_DELTA_WINDOW_MS', default=250, cast=int)  # รวม delta ของแผนที่สดต่อช่วงเวลานี้
+
+# Heat grid (ความถี่ปัญหาในพื้นที่สำหรับ priority score)
+HEAT_GRID_CELL_M = config('HEAT_GRID_CELL_M', default=100, cast=int)  # ขนาดช่องกริด (เมตร)
+HEAT_GRID_REF_LAT = 14.07  # ละติจูดอ้างอิง (ศูนย์รังสิต)
+HEAT_GRID_WINDOW_DAYS = 30
+
+# ค้นหา Ticket (tickets/search.py): text search config ของ PostgreSQL - ภาษาไทยตัดคำเองก่อนจึงใช้ simple
+SEARCH_CONFIG = config('SEARCH_CONFIG', default='simple')
+# ค้นหาแบบทนคำสะกดต่าง (pg_trgm): similarity ขั้นต่ำ 0-1 และจำนวนผลของ endpoint similar/
+SEARCH_SIMILARITY_THRESHOLD = config('SEARCH_SIMILARITY_THRESHOLD', default=0.4, cast=float)
+SEARCH_SIMILAR_LIMIT = 10
+
+# รายการ Ticket (tickets/pagination.py): จำนวนแถวต่อหน้า / ต่อการกด "โหลดเพิ่ม"
+LIST_PAGE_SIZE = config('LIST_PAGE_SIZE', default=25, cast=int)
 
 # Database
 # Use SQLite for local development (if GDAL not installed) or PostgreSQL+PostGIS for production